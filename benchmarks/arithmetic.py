@@ -0,0 +1,48 @@
+"""
+Micro-benchmark of the arithmetic of abstract values.
+
+Measures how many operations per second can be performed on the values used by the
+transformed code (`PythonValue`s wrapping `Int`, `Float`, `Bool` and `NdArray`).
+
+Run it from the root of the repository with::
+
+    python benchmarks/arithmetic.py
+"""
+
+import timeit
+from typing import Callable, List, Tuple  # noqa: F401
+
+import pytropos.internals.values as pv
+from pytropos.libs_checking.numpy import NdArray
+from pytropos.internals.values.python_values import PythonValue
+
+
+def benchmarks() -> 'List[Tuple[str, Callable[[], object]]]':
+    i, j = pv.int(3), pv.int(7)
+    f, g = pv.float(2.5), pv.float(0.5)
+    b = pv.bool(True)
+    top = pv.int()
+    arr = PythonValue(NdArray(pv.tuple(pv.int(3), pv.int(4))))
+
+    return [
+        ('Int + Int', lambda: i.add(j)),
+        ('Int < Int', lambda: i.lt(j)),
+        ('Int / Int', lambda: i.truediv(j)),
+        ('Int + Float', lambda: i.add(f)),
+        ('Float * Float', lambda: f.mul(g)),
+        ('Bool + Int', lambda: b.add(i)),
+        ('Int? + Int', lambda: top.add(i)),
+        ('NdArray + Int', lambda: arr.add(i)),
+        ('Int.val', lambda: i.val.val),
+        ('Int.is_top()', lambda: i.val.is_top()),
+    ]
+
+
+def main(number: int = 20000, repeat: int = 5) -> None:
+    for name, stmt in benchmarks():
+        best = min(timeit.repeat(stmt, number=number, repeat=repeat))
+        print(f"{name:<16} {number/best:>14,.0f} ops/s")
+
+
+if __name__ == '__main__':
+    main()
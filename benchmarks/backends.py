@@ -0,0 +1,57 @@
+"""
+Benchmark of the two backends that run the analysis (see `pytropos.main.backends`).
+
+Analyses the files in `tests/inputs` (those with an expected output) with each backend
+and reports the time taken to go from the source to something that can be run (parsing
+and transforming/compiling) and the total time of the analysis.
+
+Run it from the root of the repository with::
+
+    python benchmarks/backends.py
+"""
+
+import glob
+import io
+import time
+from os import path
+from contextlib import redirect_stdout, redirect_stderr
+from typing import List, Tuple  # noqa: F401
+
+import pytropos.main as main
+from pytropos.internals.errors import TypeCheckLogger
+
+
+def measure(sources: 'List[Tuple[str, str]]', backend: str, number: int) -> 'Tuple[float, float]':
+    """Best time (in ms) of compiling all files and of analysing all files"""
+    best_compile = best_total = float('inf')
+    for _ in range(number):
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            start = time.perf_counter()
+            for filename, source in sources:
+                main.compile_pytropos(source, filename, backend=backend)
+            best_compile = min(best_compile, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for filename, source in sources:
+                main.run_pytropos(source, filename, backend=backend)
+                TypeCheckLogger.clean_sing()
+            best_total = min(best_total, time.perf_counter() - start)
+    return 1000 * best_compile, 1000 * best_total
+
+
+def main_(number: int = 5) -> None:
+    files = [
+        f for f in sorted(glob.glob('tests/inputs/*/??-*.py'))
+        if path.isfile(path.join(path.dirname(f), 'outputs', path.basename(f)[:-3]+'.txt'))
+    ]
+    sources = [(f, open(f).read()) for f in files]
+
+    print(f"{len(files)} files")
+    print(f"{'backend':>10} {'compile':>12} {'total':>12}")
+    for backend in main.backends:
+        compile_time, total = measure(sources, backend, number)
+        print(f"{backend:>10} {compile_time:>9.1f} ms {total:>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main_()
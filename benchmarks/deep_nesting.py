@@ -0,0 +1,54 @@
+"""
+Benchmark of copying, joining and forgetting (making Top) deeply nested values.
+
+Builds lists nested `depth` levels deep (`[[...[0]...]]`) and measures the time it takes
+to copy and join Stores holding them, and to convert them into Top. Deep enough values
+used to exceed the recursion limit, they are reported as `RecursionError`.
+
+Run it from the root of the repository with::
+
+    python benchmarks/deep_nesting.py
+"""
+
+import time
+from typing import Callable  # noqa: F401
+
+import pytropos.internals as pt
+import pytropos.internals.values as pv
+from pytropos.internals.values.python_values import PythonValue
+
+
+def nested_list(depth: int, innermost: int = 0) -> PythonValue:
+    val = pv.list([pv.int(innermost)])
+    for _ in range(depth):
+        val = pv.list([val])
+    return val
+
+
+def measure(fun: 'Callable[[], object]', number: int) -> str:
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            fun()
+        return f"{(time.perf_counter() - start) / number * 1000:>10.2f} ms"
+    except RecursionError:
+        return f"{'RecursionError':>13}"
+
+
+def main(depths: 'tuple' = (100, 500, 5000, 50000), number: int = 5) -> None:
+    print(f"{'depth':>6} {'Store.copy':>13} {'Store.join':>13} {'copy + to Top':>13}")
+    for depth in depths:
+        st = pt.Store()
+        st2 = st.copy()
+        st['a'] = nested_list(depth)
+        st2['a'] = nested_list(depth, innermost=1)
+
+        def to_top() -> None:
+            st.copy()['a'].convert_into_top(set())
+
+        print(f"{depth:>6} {measure(st.copy, number)} {measure(lambda: st.join(st2), number)}"
+              f" {measure(to_top, number)}")
+
+
+if __name__ == '__main__':
+    main()
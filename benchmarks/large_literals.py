@@ -0,0 +1,79 @@
+"""
+Benchmark of stores holding large lists.
+
+Measures the time taken to copy and join a Store holding a list of `n` integers (a large
+literal) when the list is left untouched and when one of its elements is modified, and
+the time taken to go through its elements in order (to print it or to infer the shape of
+an array made from it). Lists are measured twice: keeping all their elements and
+summarised (see `AnalysisOptions.summary_threshold`).
+
+Run it from the root of the repository with::
+
+    python benchmarks/large_literals.py
+"""
+
+import timeit
+from typing import Callable  # noqa: F401
+
+import pytropos.internals.values as pv
+from pytropos.internals import Store
+from pytropos.internals.context import analysis_context
+from pytropos.libs_checking.numpy import getshape_list
+
+
+def store_with_list(n: int) -> Store:
+    st = Store()
+    st['lst'] = pv.list([pv.int(i) for i in range(n)])
+    return st
+
+
+def measure(stmt: 'Callable[[], object]', repeat: int = 5) -> float:
+    """Best time (in ms) of running `stmt` once"""
+    return 1000 * min(timeit.repeat(stmt, number=1, repeat=repeat))
+
+
+def run(sizes: 'tuple') -> None:
+    print(f"{'n':>8} {'Store.copy':>12} {'copy + set':>12} {'Store.join':>12}")
+    for n in sizes:
+        st = store_with_list(n)
+
+        def copy_and_set() -> None:
+            st2 = st.copy()
+            st2['lst'].subs()[pv.int(0)] = pv.int(-1)
+
+        st2 = st.copy()
+        st2['lst'].subs()[pv.int(n-1)] = pv.int(-1)
+
+        print(f"{n:>8} {measure(st.copy):>9.2f} ms {measure(copy_and_set):>9.2f} ms"
+              f" {measure(lambda: st.join(st2)):>9.2f} ms")
+
+    print()
+    print(f"{'n':>8} {'repr':>12} {'del lst[0]':>12} {'shape':>12} {'shape (n/100, 100)':>20}")
+    for n in sizes:
+        lst = pv.list([pv.int(i) for i in range(n)])
+        matrix = pv.list([pv.list([pv.int(i) for i in range(100)]) for _ in range(n // 100)])
+
+        def delete_first() -> None:
+            del lst.copy_mut({lst.val.mut_id: lst}).subs()[pv.int(0)]
+
+        print(f"{n:>8} {measure(lambda: lst.val.abstract_repr):>9.2f} ms"
+              f" {measure(delete_first):>9.2f} ms"
+              f" {measure(lambda: getshape_list(lst.val)):>9.2f} ms"
+              f" {measure(lambda: getshape_list(matrix.val)):>17.2f} ms")
+
+
+def main(sizes: 'tuple' = (100, 10000, 100000)) -> None:
+    ctx = analysis_context()
+    options = ctx.options
+    threshold = options.summary_threshold
+    for title, summary_threshold in [('Exact lists', None),
+                                     (f'Summarised lists (threshold {threshold})', threshold)]:
+        print(title)
+        ctx.options = options._replace(summary_threshold=summary_threshold)
+        run(sizes)
+        print()
+    ctx.options = options
+
+
+if __name__ == '__main__':
+    main()
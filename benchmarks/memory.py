@@ -0,0 +1,74 @@
+"""
+Memory benchmark of the analysis.
+
+Analyses the files in `tests/inputs` (those with an expected output) and reports the peak
+memory allocated (measured with `tracemalloc`) while analysing them. It also reports the
+size of the most common values.
+
+Run it from the root of the repository with::
+
+    python benchmarks/memory.py
+"""
+
+import glob
+import io
+import sys
+from os import path
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import List, Tuple  # noqa: F401
+
+import pytropos.internals.values as pv
+import pytropos.main as main
+from pytropos.internals.errors import TypeCheckLogger
+
+
+def object_size(obj: object) -> int:
+    """Size of an object, including its __dict__ if it has one"""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def peak_memory(filepath: str) -> int:
+    TypeCheckLogger.clean_sing()
+    source = open(filepath).read()
+
+    tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        main.run_pytropos(source, filepath)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak
+
+
+def memory_of_ints(n: int = 100000) -> int:
+    """Memory taken by `n` different PythonValue(Int)s"""
+    tracemalloc.start()
+    vals = [pv.int(i) for i in range(n)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del vals
+    return size
+
+
+def main_() -> None:
+    for name, val in [('Int', pv.int(2)), ('Float', pv.float(2.0)), ('Bool', pv.bool(True))]:
+        print(f"PythonValue({name}) {object_size(val) + object_size(val.val):>8} bytes")
+    print(f"100,000 PythonValue(Int)s {memory_of_ints()/1024:>8,.0f} KiB")
+
+    files = [
+        f for f in sorted(glob.glob('tests/inputs/*/??-*.py'))
+        if path.isfile(path.join(path.dirname(f), 'outputs', path.basename(f)[:-3]+'.txt'))
+    ]
+    peaks = [(peak_memory(f), f) for f in files]  # type: List[Tuple[int, str]]
+
+    print(f"Peak memory (total for {len(files)} files) {sum(p for p, _ in peaks)/1024:>10,.0f} KiB")
+    for peak, f in sorted(peaks, reverse=True)[:5]:
+        print(f"  {f:<50} {peak/1024:>8,.0f} KiB")
+
+
+if __name__ == '__main__':
+    main_()
@@ -1,4 +1,6 @@
 from .miscelaneous import typed_ast3_to_ast
-from .transformer import PytroposTransformer, AstTransformerError
+from .transformer import PytroposTransformer, AstTransformerError, transformer_version
+from .closures import ClosureCompiler, ClosureProgram
 
-__all__ = ["typed_ast3_to_ast", "PytroposTransformer", 'AstTransformerError']
+__all__ = ["typed_ast3_to_ast", "PytroposTransformer", 'AstTransformerError',
+           'transformer_version', 'ClosureCompiler', 'ClosureProgram']
@@ -0,0 +1,474 @@
+"""
+An alternative to PytroposTransformer that doesn't generate any code.
+
+The ClosureCompiler walks the (typed) AST of a module once and builds a tree of closures,
+one per node, that analyse the code directly on a Store: a statement becomes a function
+`Store -> Store` and an expression a function `Store -> PythonValue`. Nothing has to be
+converted into a Python AST, compiled or exec'd, and positions and constants (eg, `3`
+or `True`) are computed once, when the closures are built, instead of every time they
+are used.
+
+The analysis is the same as the one made by the code generated by PytroposTransformer.
+"""
+
+from typing import TYPE_CHECKING, Callable
+from typing import Any, Dict, List, Optional, Tuple, Union  # noqa: F401
+
+from typed_ast import ast3
+
+import pytropos.internals as pt
+import pytropos.libs_checking as libs_checking
+from pytropos.internals.values.python_values import PythonValue
+
+from .miscelaneous import AstTransformerError
+from .transformer import PytroposTransformer, operations, compopt
+
+if TYPE_CHECKING:
+    from pytropos.internals.miscelaneous import Pos  # noqa: F401
+
+__all__ = ['ClosureCompiler', 'ClosureProgram']
+
+Stmt = Callable[[pt.Store], pt.Store]
+Expr = Callable[[pt.Store], PythonValue]
+# Assigns a value to a target (eg, `a`, `a.b` or `a[b]`)
+Target = Callable[[pt.Store, PythonValue], None]
+Deletion = Callable[[pt.Store], None]
+
+
+def _print_store(st: pt.Store) -> pt.Store:
+    print(st)
+    return st
+
+
+class ClosureProgram(object):
+    """A module compiled by ClosureCompiler. Calling it runs the analysis, the Store
+    resulting is saved in `pt_globals['st']` (as the code generated by
+    PytroposTransformer does)"""
+
+    def __init__(self, console: bool) -> None:
+        self.console = console
+        self.body = _block([])
+        self.pt_globals = {}  # type: Dict[str, Any]
+
+    def __call__(self, pt_globals: 'Dict[str, Any]') -> None:
+        self.pt_globals = pt_globals
+        if self.console:
+            st = pt_globals['st']
+        else:
+            st = pt.Store()
+            pt.loadBuiltinFuncs(st)
+            pt_globals['st'] = st
+        pt_globals['st'] = self.body(st)
+
+
+class ClosureCompiler(object):
+    def __init__(self,
+                 filename: str,
+                 cursorline: Optional[int] = None,
+                 console: bool = False,
+                 profile: bool = False
+                 ) -> None:
+        self.filename = filename
+        self.cursorline = cursorline
+        self.console = console
+        # Measure the time spent analysing each statement (see `pt.profiled`)
+        self.profile = profile
+        self.program = ClosureProgram(console)
+
+    def compile(self, node: ast3.Module) -> ClosureProgram:
+        """Compiles a module. Raises AstTransformerError if the module uses something
+        Pytropos doesn't support"""
+        cursorline_at_end = \
+            self.cursorline is not None \
+            and len(node.body) > 0 \
+            and node.body[-1].lineno < self.cursorline
+
+        self.program = ClosureProgram(self.console)
+        stmts = self._stmts(node.body)
+        if cursorline_at_end:
+            stmts.append(_print_store)
+        self.program.body = _block(stmts)
+        return self.program
+
+    def pos(self, node: ast3.AST) -> 'Optional[Pos]':
+        if not hasattr(node, 'lineno'):
+            return None
+        return ((node.lineno, node.col_offset), self.filename)  # type: ignore
+
+    def key(self, name: str, node: ast3.AST) -> 'Union[str, Tuple[str, Pos]]':
+        """The key used to access a variable or attribute (with its position if known)"""
+        pos = self.pos(node)
+        return name if pos is None else (name, pos)
+
+    def unsupported(self, node: ast3.AST) -> AstTransformerError:
+        node_type = type(node).__name__
+        if hasattr(node, 'lineno'):
+            return AstTransformerError(
+                f"{self.filename}:{node.lineno}:{node.col_offset}: Fatal Error:"  # type: ignore
+                f" Pytropos doesn't support {node_type!r} yet. "
+                "Sorry for the inconvinience :S"
+            )
+        return AstTransformerError(
+            f"Fatal Error: Pytropos doesn't support {node_type!r} yet."
+            " Sorry for the inconvinience :S"
+        )
+
+    def _stmts(self, nodes: 'List[ast3.stmt]') -> 'List[Stmt]':
+        stmts = []  # type: List[Stmt]
+        for node in nodes:
+            method = getattr(self, f'stmt_{type(node).__name__}', None)
+            if method is None:
+                raise self.unsupported(node)
+            if self.cursorline is not None and self.cursorline == node.lineno:
+                stmts.append(_print_store)
+            stmt = method(node)  # type: Stmt
+            pos = self.pos(node)
+            if self.profile and pos is not None:
+                stmt = _profiled(stmt, pos)
+            stmts.append(stmt)
+        return stmts
+
+    def stmt_block(self, nodes: 'List[ast3.stmt]') -> Stmt:
+        return _block(self._stmts(nodes))
+
+    def expr(self, node: ast3.expr) -> Expr:
+        method = getattr(self, f'expr_{type(node).__name__}', None)
+        if method is None:
+            raise self.unsupported(node)
+        return method(node)  # type: ignore
+
+    def target(self, node: ast3.expr) -> Target:
+        """Compiles the target of an assignment"""
+        pos = self.pos(node)
+
+        if isinstance(node, ast3.Name):
+            name_key = self.key(node.id, node)
+
+            def assign_name(st: pt.Store, val: PythonValue) -> None:
+                st[name_key] = val
+            return assign_name
+
+        elif isinstance(node, ast3.Attribute):
+            value = self.expr(node.value)
+            attr_key = self.key(node.attr, node)
+
+            def assign_attr(st: pt.Store, val: PythonValue) -> None:
+                value(st).attr[attr_key] = val
+            return assign_attr
+
+        elif isinstance(node, ast3.Subscript):
+            value = self.expr(node.value)
+            index = self._index(node.slice)
+
+            def assign_subs(st: pt.Store, val: PythonValue) -> None:
+                value(st).subs(pos)[index(st)] = val
+            return assign_subs
+
+        raise self.unsupported(node)
+
+    def deletion(self, node: ast3.expr) -> Deletion:
+        """Compiles the target of a `del` statement"""
+        pos = self.pos(node)
+
+        if isinstance(node, ast3.Name):
+            name_key = self.key(node.id, node)
+
+            def del_name(st: pt.Store) -> None:
+                del st[name_key]
+            return del_name
+
+        elif isinstance(node, ast3.Attribute):
+            value = self.expr(node.value)
+            attr_key = self.key(node.attr, node)
+
+            def del_attr(st: pt.Store) -> None:
+                del value(st).attr[attr_key]
+            return del_attr
+
+        elif isinstance(node, ast3.Subscript):
+            value = self.expr(node.value)
+            index = self._index(node.slice)
+
+            def del_subs(st: pt.Store) -> None:
+                del value(st).subs(pos)[index(st)]
+            return del_subs
+
+        raise self.unsupported(node)
+
+    def _index(self, node: ast3.slice) -> Expr:
+        if not isinstance(node, ast3.Index):
+            raise self.unsupported(node)
+        return self.expr(node.value)
+
+    def _operation(self, op: str, left: Expr, right: Expr, pos: 'Optional[Pos]') -> Expr:
+        def operation(st: pt.Store) -> PythonValue:
+            return left(st).operate(op, right(st), pos)
+        return operation
+
+    # Statements
+
+    def stmt_Expr(self, node: ast3.Expr) -> Stmt:
+        value = self.expr(node.value)
+
+        if self.console:
+            program = self.program
+
+            def expr_console(st: pt.Store) -> pt.Store:
+                program.pt_globals['print_console'](value(st))
+                return st
+            return expr_console
+
+        def expr(st: pt.Store) -> pt.Store:
+            value(st)
+            return st
+        return expr
+
+    def stmt_Assign(self, node: ast3.Assign) -> Stmt:
+        value = self.expr(node.value)
+        targets = [self.target(t) for t in node.targets]
+
+        if len(targets) == 1:
+            target = targets[0]
+
+            def assign(st: pt.Store) -> pt.Store:
+                target(st, value(st))
+                return st
+            return assign
+
+        def assign_many(st: pt.Store) -> pt.Store:
+            val = value(st)
+            for target in targets:
+                target(st, val)
+            return st
+        return assign_many
+
+    def stmt_AugAssign(self, node: ast3.AugAssign) -> Stmt:
+        """`A (op)= B` is analysed as `A = A (op) (B)`"""
+        op_type = type(node.op)
+        if op_type not in operations:
+            raise self.unsupported(node.op)
+        value = self._operation(operations[op_type], self.expr(node.target),
+                                self.expr(node.value), self.pos(node))
+        target = self.target(node.target)
+
+        def augassign(st: pt.Store) -> pt.Store:
+            target(st, value(st))
+            return st
+        return augassign
+
+    def stmt_AnnAssign(self, node: ast3.AnnAssign) -> Stmt:
+        if node.value is None:
+            raise AstTransformerError(
+                f"{self.filename}:{node.lineno}:{node.col_offset}: Fatal Error: "
+                "Only annotated assignments are allowed (variables with initial values). "
+                "I.e., no full support for PEP 526 yet. Sorry :("
+            )
+        pos = self.pos(node)
+        ann = self.expr(node.annotation)
+        value = self.expr(node.value)
+        target = self.target(node.target)
+
+        def annassign(st: pt.Store) -> pt.Store:
+            target(st, pt.annotation(ann(st), value(st), pos))
+            return st
+        return annassign
+
+    def stmt_If(self, node: ast3.If) -> Stmt:
+        test = self.expr(node.test)
+        body = self.stmt_block(node.body)
+        orelse = self.stmt_block(node.orelse) if node.orelse else None
+
+        def if_(st: pt.Store) -> pt.Store:
+            return pt.runIf(st, test(st), body, orelse)
+        return if_
+
+    def stmt_While(self, node: ast3.While) -> Stmt:
+        if node.orelse:
+            raise AstTransformerError(
+                f"{self.filename}:{node.lineno}:{node.col_offset}: Fatal Error: "
+                "Pytropos doesn't support else statement in while loop yet, sorry :("
+            )
+        pos = self.pos(node)
+        test = self.expr(node.test)
+        body = self.stmt_block(node.body)
+
+        def while_(st: pt.Store) -> pt.Store:
+            return pt.runWhile(st, test, body, pos=pos)
+        return while_
+
+    def stmt_Delete(self, node: ast3.Delete) -> Stmt:
+        targets = [self.deletion(t) for t in node.targets]
+
+        def delete(st: pt.Store) -> pt.Store:
+            for target in targets:
+                target(st)
+            return st
+        return delete
+
+    def stmt_Import(self, node: ast3.Import) -> Stmt:
+        supported = PytroposTransformer._supported_modules
+        modules = [
+            (alias.asname or alias.name,
+             getattr(libs_checking, supported[alias.name])
+             if alias.name in supported else pt.ModuleTop)
+            for alias in node.names
+        ]  # type: List[Tuple[str, PythonValue]]
+
+        def import_(st: pt.Store) -> pt.Store:
+            for name, module in modules:
+                st[name] = module
+            return st
+        return import_
+
+    def stmt_ImportFrom(self, node: ast3.ImportFrom) -> Stmt:
+        supported = PytroposTransformer._supported_modules
+        module = None  # type: Optional[PythonValue]
+        if node.module in supported:
+            module = getattr(libs_checking, supported[node.module])
+
+        if node.names[0].name == '*':
+            def import_star(st: pt.Store) -> pt.Store:
+                st.importStar(module)
+                return st
+            return import_star
+
+        names = [(alias.asname or alias.name, self.key(alias.name, node))
+                 for alias in node.names]
+
+        def import_from(st: pt.Store) -> pt.Store:
+            for name, attr_key in names:
+                st[name] = pt.Top if module is None else module.attr[attr_key]
+            return st
+        return import_from
+
+    # Expressions
+
+    def expr_Num(self, node: ast3.Num) -> Expr:
+        if isinstance(node.n, int):
+            val = pt.int(node.n)
+        elif isinstance(node.n, float):
+            val = pt.float(node.n)
+        else:
+            raise AstTransformerError(
+                f"Number of type {type(node.n)} isn't supported by pytropos. Sorry :S"
+            )
+        return _constant(val)
+
+    def expr_NameConstant(self, node: ast3.NameConstant) -> Expr:
+        if isinstance(node.value, bool):
+            return _constant(pt.bool(node.value))
+        elif node.value is None:
+            return _constant(pt.none())
+        raise AstTransformerError(
+            f"Pytropos doesn't recognise {type(node.value)} as a constant. Sorry"
+        )
+
+    def expr_Name(self, node: ast3.Name) -> Expr:
+        key = self.key(node.id, node)
+
+        def name(st: pt.Store) -> PythonValue:
+            return st[key]
+        return name
+
+    def expr_Attribute(self, node: ast3.Attribute) -> Expr:
+        value = self.expr(node.value)
+        key = self.key(node.attr, node)
+
+        def attribute(st: pt.Store) -> PythonValue:
+            return value(st).attr[key]
+        return attribute
+
+    def expr_Subscript(self, node: ast3.Subscript) -> Expr:
+        pos = self.pos(node)
+        value = self.expr(node.value)
+        index = self._index(node.slice)
+
+        def subscript(st: pt.Store) -> PythonValue:
+            return value(st).subs(pos)[index(st)]
+        return subscript
+
+    def expr_BinOp(self, node: ast3.BinOp) -> Expr:
+        op_type = type(node.op)
+        if op_type not in operations:
+            raise self.unsupported(node.op)
+        return self._operation(operations[op_type], self.expr(node.left),
+                               self.expr(node.right), self.pos(node))
+
+    def expr_Compare(self, node: ast3.Compare) -> Expr:
+        assert len(node.ops) == 1, "Pytropos only supports comparisions of two values at the time"
+        op_type = type(node.ops[0])
+        if op_type not in compopt:
+            raise self.unsupported(node.ops[0])
+        return self._operation(compopt[op_type], self.expr(node.left),
+                               self.expr(node.comparators[0]), self.pos(node))
+
+    def expr_Call(self, node: ast3.Call) -> Expr:
+        pos = self.pos(node)
+        func = self.expr(node.func)
+
+        args = []  # type: List[Expr]
+        starred = None  # type: Optional[Expr]
+        for arg in node.args:
+            if isinstance(arg, ast3.Starred):
+                starred = self.expr(arg.value)
+                break
+            args.append(self.expr(arg))
+
+        kwargs = []  # type: List[Tuple[str, Expr]]
+        for kw in node.keywords:
+            if kw.arg is None:
+                raise AstTransformerError(
+                    f"{self.filename}:{node.lineno}:{node.col_offset}: Fatal Error: "
+                    "No kargs parameters is allowed when calling a function"
+                )
+            kwargs.append((kw.arg, self.expr(kw.value)))
+
+        def call(st: pt.Store) -> PythonValue:
+            fun = func(st)
+            vals = tuple([arg(st) for arg in args])
+            args_ = pt.Args(
+                vals,
+                None if starred is None else starred(st),
+                {k: v(st) for k, v in kwargs} if kwargs else None
+            )
+            return fun.call(st, args_, pos=pos)
+        return call
+
+    def expr_List(self, node: ast3.List) -> Expr:
+        elts = [self.expr(e) for e in node.elts]
+
+        def list_(st: pt.Store) -> PythonValue:
+            return pt.list([e(st) for e in elts])
+        return list_
+
+    def expr_Tuple(self, node: ast3.Tuple) -> Expr:
+        elts = [self.expr(e) for e in node.elts]
+
+        def tuple_(st: pt.Store) -> PythonValue:
+            return pt.tuple(*[e(st) for e in elts])
+        return tuple_
+
+
+def _constant(val: PythonValue) -> Expr:
+    """Constants are immutable, the same value is returned every time"""
+    def constant(st: pt.Store) -> PythonValue:
+        return val
+    return constant
+
+
+def _profiled(stmt: Stmt, pos: 'Pos') -> Stmt:
+    def profiled(st: pt.Store) -> pt.Store:
+        with pt.profiled(pos):
+            return stmt(st)
+    return profiled
+
+
+def _block(stmts: 'List[Stmt]') -> Stmt:
+    if len(stmts) == 1:
+        return stmts[0]
+
+    def block(st: pt.Store) -> pt.Store:
+        for stmt in stmts:
+            st = stmt(st)
+        return st
+    return block
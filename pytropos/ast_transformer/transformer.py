@@ -5,7 +5,12 @@ from typed_ast import ast3
 
 from .miscelaneous import AstTransformerError, copy_ast3
 
-__all__ = ['PytroposTransformer', 'AstTransformerError']
+__all__ = ['PytroposTransformer', 'AstTransformerError', 'transformer_version']
+
+# The version must be increased every time the code generated by the transformer changes
+# (or the code compiled by previous versions won't work). It is part of the key of the
+# compiled code saved in the cache
+transformer_version = 4
 
 VisitorOutput = Union[List[ast3.AST], ast3.AST, None]
 
@@ -48,7 +53,11 @@ no_need_to_transform = set(operations).union(compopt).union([  # type: ignore
 ])
 
 
-def pos_as_tuple(node: Union[ast3.expr, ast3.stmt]) -> Optional[ast3.Tuple]:
+def pos_as_tuple(node: Union[ast3.expr, ast3.stmt], filename: str) -> Optional[ast3.Tuple]:
+    """Returns the position of the node, `((lineno, col_offset), filename)`.
+
+    The tuple is made only of literals, so Python compiles it (and the tuples containing
+    it, eg `('var', pos)`) into a constant instead of building it every time it's used"""
     if not hasattr(node, 'lineno'):
         return None
 
@@ -58,7 +67,7 @@ def pos_as_tuple(node: Union[ast3.expr, ast3.stmt]) -> Optional[ast3.Tuple]:
                 elts=[ast3.Num(node.lineno), ast3.Num(node.col_offset)],
                 ctx=ast3.Load()
             ),
-            ast3.Name(id='fn', ctx=ast3.Load())
+            ast3.Str(s=filename)
         ],
         ctx=ast3.Load()
     )
@@ -68,13 +77,16 @@ class PytroposTransformer(ast3.NodeTransformer):
     def __init__(self,
                  filename: str,
                  cursorline: Optional[int] = None,
-                 console: bool = False
+                 console: bool = False,
+                 profile: bool = False
                  ) -> None:
         super().__init__()
         self.filename = filename
         self.scope_level = 0
         self.cursorline = cursorline
         self.console = console
+        # Measure the time spent analysing each statement (see `pt.profiled`)
+        self.profile = profile
 
     _supported_modules = {'numpy': 'numpy_module',
                           'pytropos.hints.numpy': 'hints_numpy_module'}
@@ -107,10 +119,13 @@ class PytroposTransformer(ast3.NodeTransformer):
         method_name = f'visit_{node_type.__name__}'
         if hasattr(self, method_name):
             method = getattr(self, method_name)
+            new_node = method(node)  # type: VisitorOutput
+            if self.profile and isinstance(node, ast3.stmt):
+                new_node = self.add_stmt_profiling(node, new_node)
             if isoncursor:
-                return self.add_stmt_print_store(method(node))
+                return self.add_stmt_print_store(new_node)
             else:
-                return method(node)  # type: ignore
+                return new_node
 
         # Ignoring supported operators (like Div, Mul, ...)
         if node_type in no_need_to_transform:
@@ -134,6 +149,31 @@ class PytroposTransformer(ast3.NodeTransformer):
             and hasattr(node, "lineno") \
             and self.cursorline == node.lineno
 
+    def add_stmt_profiling(self, stmt: ast3.stmt, node: VisitorOutput) -> VisitorOutput:
+        """Wraps the code of a statement in `with pt.profiled(pos): ...`"""
+        if node is None or node == []:
+            return node
+        pos = pos_as_tuple(stmt, self.filename)
+        if pos is None:
+            return node
+
+        return ast3.With(
+            items=[ast3.withitem(
+                context_expr=ast3.Call(
+                    func=ast3.Attribute(
+                        value=ast3.Name(id='pt', ctx=ast3.Load()),
+                        attr='profiled',
+                        ctx=ast3.Load(),
+                    ),
+                    args=[pos],
+                    keywords=[],
+                ),
+                optional_vars=None,
+            )],
+            body=node if isinstance(node, list) else [node],
+            type_comment=None,
+        )
+
     def add_stmt_print_store(self, node: VisitorOutput) -> VisitorOutput:
         if isinstance(node, list):
             return [self._show_store_contents_expr()] + node  # type: ignore
@@ -206,7 +246,7 @@ class PytroposTransformer(ast3.NodeTransformer):
             keywords=[
                 ast3.keyword(
                     arg='pos',
-                    value=pos_as_tuple(node),
+                    value=pos_as_tuple(node, self.filename),
                     ctx=ast3.Load()
                 )
             ])
@@ -235,7 +275,7 @@ class PytroposTransformer(ast3.NodeTransformer):
             keywords=[
                 ast3.keyword(
                     arg='pos',
-                    value=pos_as_tuple(node),
+                    value=pos_as_tuple(node, self.filename),
                     ctx=ast3.Load()
                 )
             ])
@@ -265,7 +305,7 @@ class PytroposTransformer(ast3.NodeTransformer):
                 "I.e., no full support for PEP 526 yet. Sorry :("
             )
 
-        pos = pos_as_tuple(node)
+        pos = pos_as_tuple(node, self.filename)
 
         # Deleting annotation :S
         self.generic_visit(node)
@@ -299,7 +339,7 @@ class PytroposTransformer(ast3.NodeTransformer):
             st[('var', ...)]
         """
 
-        pos = pos_as_tuple(node)
+        pos = pos_as_tuple(node, self.filename)
         if pos is not None:
             varname = ast3.Tuple(
                 elts=[
@@ -338,7 +378,6 @@ class PytroposTransformer(ast3.NodeTransformer):
                     'st = pt.Store()\n'
                     'pt.loadBuiltinFuncs(st)\n'
                     # 'st.load_module(pytropos.libs.base, "__builtins__")\n'
-                    f'fn = {self.filename!r}\n'
                 ).body +
                 node.body
             )
@@ -452,7 +491,7 @@ class PytroposTransformer(ast3.NodeTransformer):
             def while_(st):
                 body
                 return st
-            st = pt.runWhile(st, while_qstn, while_)
+            st = pt.runWhile(st, while_qstn, while_, pos=...)
         """
         if node.orelse:
             raise AstTransformerError(
@@ -500,7 +539,13 @@ class PytroposTransformer(ast3.NodeTransformer):
                         ast3.Name(id='while_qst', ctx=ast3.Load()),
                         ast3.Name(id='while_', ctx=ast3.Load())
                     ],
-                    keywords=[],
+                    keywords=[
+                        ast3.keyword(
+                            arg='pos',
+                            value=pos_as_tuple(node, self.filename),
+                            ctx=ast3.Load()
+                        )
+                    ],
                 )
             )
         ]
@@ -673,7 +718,7 @@ class PytroposTransformer(ast3.NodeTransformer):
             keywords=[
                 ast3.keyword(
                     arg='pos',
-                    value=pos_as_tuple(node),
+                    value=pos_as_tuple(node, self.filename),
                     ctx=ast3.Load()
                 )
             ],
@@ -696,7 +741,7 @@ class PytroposTransformer(ast3.NodeTransformer):
 
         self.generic_visit(node)
 
-        pos = pos_as_tuple(node)
+        pos = pos_as_tuple(node, self.filename)
         if pos is not None:
             varname = ast3.Tuple(
                 elts=[
@@ -761,7 +806,7 @@ class PytroposTransformer(ast3.NodeTransformer):
                 attr='subs',
                 ctx=ast3.Load(),
             ),
-            args=[pos_as_tuple(node)],
+            args=[pos_as_tuple(node, self.filename)],
             keywords=[],
         )
 
@@ -820,7 +865,7 @@ class PytroposTransformer(ast3.NodeTransformer):
             libs.extend(
                 ast3.parse(  # type: ignore
                     '\n'.join([
-                        f"st['{asname}'] = {self._supported_modules[name]}"
+                        f"st['{asname or name}'] = {self._supported_modules[name]}"
                         for name, asname in modules_supported
                     ])
                 ).body
@@ -893,7 +938,7 @@ class PytroposTransformer(ast3.NodeTransformer):
                 for alias in node.names:
                     # st['asname'] = modname.attr['name']
 
-                    pos = pos_as_tuple(node)
+                    pos = pos_as_tuple(node, self.filename)
 
                     if pos is not None:
                         attrname = ast3.Tuple(
@@ -0,0 +1,159 @@
+"""
+On-disk cache for the results of analysing a file.
+
+Results are stored in a directory (`.pytropos_cache` by default) and are indexed by a key
+computed from the contents of the file, its name, Pytropos version and any analysis flag
+that could alter the result of the analysis. A hit allows to skip parsing, transforming
+and executing the file all together.
+
+The code generated to analyse a file is saved too (like `__pycache__` does for python
+files), so that parsing and transforming the file can be skipped even if the analysis has
+to run again.
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import sys
+import tempfile
+from typing import TYPE_CHECKING
+
+from pytropos import metadata
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple  # noqa: F401
+    from types import CodeType  # noqa: F401
+    from pytropos.internals.errors import TypeCheckWarning  # noqa: F401
+
+__all__ = ['default_cache_dir', 'result_key', 'load_result', 'save_result',
+           'code_key', 'load_code', 'save_code']
+
+default_cache_dir = '.pytropos_cache'
+
+
+def _hash(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode('utf-8', 'surrogatepass'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def result_key(source: str, filename: str, flags: 'Dict[str, Any]') -> str:
+    """Returns the key under which the results of analysing `source` are saved"""
+    return _hash(
+        metadata.version,
+        json.dumps(flags, sort_keys=True),
+        filename,
+        source
+    )
+
+
+def _entry_path(cache_dir: str, kind: str, key: str, ext: str) -> str:
+    return os.path.join(cache_dir, kind, key[:2], key + ext)
+
+
+def _write_atomically(path: str, content: bytes) -> None:
+    """Writes a file in the cache. Several processes may write the same entry at the same
+    time (eg, in batch mode), so the file is written somewhere else and then moved"""
+    cache_root = os.path.dirname(os.path.dirname(os.path.dirname(path)))
+    if not os.path.isdir(cache_root):
+        os.makedirs(cache_root, exist_ok=True)
+        # Nobody wants to commit the cache by mistake
+        with open(os.path.join(cache_root, '.gitignore'), 'w') as f:
+            f.write('*\n')
+
+    dirname = os.path.dirname(path)
+    os.makedirs(dirname, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=dirname, delete=False) as tmpfile:
+        tmppath = tmpfile.name
+        tmpfile.write(content)
+    try:
+        os.replace(tmppath, path)
+    except OSError:
+        os.unlink(tmppath)
+        raise
+
+
+def load_result(
+        cache_dir: str,
+        key: str
+) -> 'Optional[Tuple[int, List[TypeCheckWarning]]]':
+    """Returns the exitcode and warnings found for an analysis, if it is in the cache"""
+    try:
+        with open(_entry_path(cache_dir, 'results', key, '.json'), 'r') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    warnings = []  # type: List[TypeCheckWarning]
+    for err_code, msg, pos in entry['warnings']:
+        if pos is not None:
+            pos_in_file, file = pos
+            pos = (None if pos_in_file is None else tuple(pos_in_file), file)
+        warnings.append((err_code, msg, pos))
+
+    return entry['exitcode'], warnings
+
+
+def save_result(
+        cache_dir: str,
+        key: str,
+        exitcode: int,
+        warnings: 'List[TypeCheckWarning]'
+) -> None:
+    """Saves the exitcode and warnings of an analysis in the cache.
+
+    Failing to write into the cache is not an error, the entry is just not saved"""
+    entry = {'exitcode': exitcode, 'warnings': warnings}
+    try:
+        _write_atomically(
+            _entry_path(cache_dir, 'results', key, '.json'),
+            json.dumps(entry).encode('utf-8')
+        )
+    except OSError:
+        pass
+
+
+def code_key(
+        source: str,
+        filename: str,
+        transformer_version: int,
+        cursorline: 'Optional[int]' = None,
+        console: bool = False,
+        profile: bool = False
+) -> str:
+    """Returns the key under which the code generated to analyse `source` is saved.
+
+    Code objects can only be loaded by the same python version that created them, thus
+    the python version is part of the key"""
+    return _hash(
+        sys.implementation.cache_tag or sys.version,
+        str(transformer_version),
+        repr((cursorline, console, profile)),
+        filename,
+        source
+    )
+
+
+def load_code(cache_dir: str, key: str) -> 'Optional[CodeType]':
+    """Returns the code generated to analyse a file, if it is in the cache"""
+    try:
+        with open(_entry_path(cache_dir, 'code', key, '.marshal'), 'rb') as f:
+            code = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    return code  # type: ignore
+
+
+def save_code(cache_dir: str, key: str, code: 'CodeType') -> None:
+    """Saves the code generated to analyse a file in the cache"""
+    try:
+        _write_atomically(  # type: ignore
+            _entry_path(cache_dir, 'code', key, '.marshal'),
+            marshal.dumps(code)
+        )
+    except OSError:
+        pass
@@ -2,12 +2,12 @@ from .values import (
     int, float, bool, none, list, tuple, Args, ModuleTop, Top
 )
 from .store import Store
-from .control import runIf, runWhile, annotation
+from .control import runIf, runWhile, annotation, profiled
 
 __all__ = [
     'int', 'float', 'bool', 'none', 'list', 'tuple', 'Args', 'ModuleTop', 'Top',
     'Store',
-    'runIf', 'runWhile', 'annotation',
+    'runIf', 'runWhile', 'annotation', 'profiled',
     'loadBuiltinFuncs'
 ]
 
@@ -17,6 +17,9 @@ class AbstractDomain(ABC):
     - Narrowing Operator (optional)
     """
 
+    # Subclasses may define __slots__ to save memory (values are created by the thousands)
+    __slots__ = ()
+
     @classmethod
     @abstractmethod
     def top(cls) -> Any:
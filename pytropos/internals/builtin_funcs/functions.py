@@ -127,8 +127,7 @@ class function_type_int(BuiltinType):
         if n.is_top():
             return top
 
-        if isinstance(n.val, (Int, Float, Bool)) and not n.val.is_top():
-            assert n.val.val is not None
+        if isinstance(n.val, (Int, Float, Bool)) and n.val.val is not None:
             return PythonValue(Int(int(n.val.val)))
 
         return top
@@ -0,0 +1,88 @@
+"""
+The state of an analysis that isn't part of the Store: the options of the analysis,
+loggers (warnings found, loops run), counters and the bookkeeping of the operations
+walking mutable values.
+
+Each thread (and each `contextvars.Context`) has its own AnalysisContext, so several
+analyses can be run at the same time in different threads, even with different options.
+"""
+
+from contextvars import ContextVar, copy_context
+from typing import NamedTuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type  # noqa: F401
+
+__all__ = ['MAX_LOOPS', 'LoopSettings', 'AnalysisOptions', 'AnalysisContext',
+           'analysis_context']
+
+
+MAX_LOOPS = 100
+
+
+class LoopSettings(NamedTuple):
+    """How loops are analysed by `runWhile`"""
+    # Iterations run one after the other while the condition of the loop is known
+    max_unrolled: int = MAX_LOOPS
+    # Iterations to join before widening
+    widening_delay: int = 0
+    # Iterations to find a fix point. If they aren't enough, all variables modified by the
+    # loop become Top
+    max_iterations: int = 1000
+    # Iterations to refine (narrow) the values found by widening
+    narrowing_steps: int = 2
+
+
+class AnalysisOptions(NamedTuple):
+    """Options that alter the result of an analysis, they are set from the command line
+    (`pytropos.main`)"""
+    # How loops are analysed (see `runWhile`)
+    loops: LoopSettings = LoopSettings()
+    # If True, the values that an unknown Int or Float can take are bounded by an interval
+    # (eg, joining Int(3) and Int(4) gives Int[3, 4] instead of Int(?)). Intervals are only
+    # created by joins, any other operation of the constants domain stays the same
+    intervals: bool = False
+    # Lists and tuples created with more elements than this (all of them immutable and of
+    # the same type) are summarised: only their size and the join of all their elements
+    # are kept. None disables summaries
+    summary_threshold: Optional[int] = 1000
+
+
+class AnalysisContext(object):
+    """State of a single analysis"""
+
+    def __init__(self, options: AnalysisOptions = AnalysisOptions()) -> None:
+        self.options = options
+        # Instances of the classes using the metaclass Singleton (eg, TypeCheckLogger)
+        self.singletons = {}  # type: Dict[Type, Any]
+        # Number of times a mutable value has been modified in place
+        self.modifications = 0
+        # Pairs of mutable values being compared (see `AbstractMutVal.__eq__`)
+        self.eq_visited = ({}, {})  # type: Tuple[Dict[int, int], Dict[int, int]]
+        # Mutable values being printed (see `PythonValue.__repr__`)
+        self.repr_visited = set()  # type: Set[int]
+        # Work pending while copying or joining mutable values (see `python_values._defer`)
+        self.deferred = None  # type: Optional[List[Callable[[], None]]]
+        # Whether the work done is counted (see `metrics`)
+        self.count_metrics = False
+
+    def run(self, fun: 'Callable[..., Any]', *args: Any) -> Any:
+        """Runs `fun` with this AnalysisContext as the current one"""
+        return copy_context().run(_run_in, self, fun, args)
+
+
+_current = ContextVar('analysis_context')  # type: ContextVar[AnalysisContext]
+
+
+def _run_in(ctx: AnalysisContext, fun: 'Callable[..., Any]', args: 'Tuple') -> Any:
+    _current.set(ctx)
+    return fun(*args)
+
+
+def analysis_context() -> AnalysisContext:
+    """Returns the AnalysisContext of the current thread (or context), a new one is created
+    the first time it is called"""
+    try:
+        return _current.get()
+    except LookupError:
+        ctx = AnalysisContext()
+        _current.set(ctx)
+        return ctx
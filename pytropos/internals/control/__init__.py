@@ -1,4 +1,5 @@
 from .execute import runIf, runWhile
 from .hints import annotation
+from .profiling import profiled
 
-__all__ = ['runIf', 'runWhile', 'annotation']
+__all__ = ['runIf', 'runWhile', 'annotation', 'profiled']
@@ -3,15 +3,16 @@ from typing import TYPE_CHECKING
 from ..values.builtin_values import Bool
 from ..values.python_values import PythonValue
 from ..store import Store
+from ..errors import TypeCheckLogger
+from ..miscelaneous import Pos, Singleton
+from ..context import MAX_LOOPS, LoopSettings, analysis_context  # noqa: F401
 
 if TYPE_CHECKING:
-    from typing import Callable, Optional  # noqa: F401
+    from typing import Callable, Optional, Dict, List, Set  # noqa: F401
+    from ..errors import TypeCheckWarning  # noqa: F401
 
 
-__all__ = ['runIf', 'runWhile']
-
-
-MAX_LOOPS = 100
+__all__ = ['runIf', 'runWhile', 'LoopSettings', 'LoopsLogger']
 
 
 def runIf(
@@ -33,8 +34,8 @@ def runIf(
         if else_:
             store = else_(store)
             # print(f"store_else = {store}")
-        # TODO(helq): replace join with join_destructive
-        return store.join(store_if)
+        store.join_destructive(store_if)
+        return store
     elif bool_qst.val is True:
         return if_(store)
     else:
@@ -44,14 +45,21 @@ def runIf(
 def runWhile(
         store: Store,
         while_qst: 'Callable[[Store], PythonValue]',
-        while_: 'Callable[[Store], Store]'
+        while_: 'Callable[[Store], Store]',
+        pos: 'Optional[Pos]' = None
 ) -> 'Store':
     """
-    Runs the code ten times, if the condition doesn't become False, then tries to find a
-    fix point using `widen_op`.
+    Runs the body of the loop while its condition is known to be True (at most
+    `max_unrolled` times, see the LoopSettings in the options of the analysis). If the
+    condition doesn't become False, then tries to find a fix point: the first
+    `widening_delay` iterations are joined, the rest are widened. Finally, the fix point
+    is refined (narrowed) running the body of the loop at most `narrowing_steps` times.
+
+    The number of iterations is registered in `LoopsLogger` under `pos`.
     """
+    settings = analysis_context().options.loops
 
-    for i in range(MAX_LOOPS):
+    for unrolled in range(settings.max_unrolled):
         val = while_qst(store).bool()
         assert isinstance(val.val, Bool)
         bool_val = val.val
@@ -59,23 +67,122 @@ def runWhile(
         if bool_val.is_top():  # Bool(?)
             break
         elif bool_val.val is False:
+            LoopsLogger().new_run(pos, unrolled, 0, 0, False)
             return store
         # else bool_val is True the execution of while_ should continue
 
         store = while_(store)
+    else:
+        unrolled = settings.max_unrolled
 
-    # If I arrived here, I know that 10 loops wheren't enough or bool_var is Bool(?),
-    # either way we need to find a fix point
+    # If I arrived here, I know that max_unrolled loops weren't enough or bool_var is
+    # Bool(?), either way we need to find a fix point
+    # Notice that `.copy` cannot be replaced by `.copy_soft`, `while_` may modify mutable
+    # values in place
+    entry = store.copy() if settings.narrowing_steps > 0 else None
     fix_point = False
-    while not fix_point:
-        new_store = while_(store.copy())  # TODO(helq): change for .copy_soft
+    iterations = 0
+    while not fix_point and iterations < settings.max_iterations:
+        new_store = while_(store.copy())
         while_qst(store)
-        store, fix_point = store.widen_op(new_store)  # TODO(helq): change for widen_op_destructive
-
-    # TODO(helq): after the widen_op is applied, use narrow_op!
-    # while not fix_point:
-    #     new_store = while_(store.copy())
-    #     while_qst(store)
-    #     store, fix_point = store.narrow_op(new_store)
+        if iterations < settings.widening_delay:
+            fix_point = store.join_destructive(new_store)
+        else:
+            fix_point = store.widen_op_destructive(new_store)
+        iterations += 1
+
+    # No fix point was found in the budget given, giving up on the values computed in the
+    # loop: every variable the loop may write becomes Top. A single run of the body isn't
+    # enough (eg, a branch may only be taken once other variables are Top), so the body is
+    # run until it doesn't write any variable that isn't Top already. It terminates
+    # because every run makes Top at least one more variable
+    if not fix_point:
+        while store.to_top_destructive(while_(store.copy())):
+            pass
+
+    narrowed = 0
+    if entry is not None:
+        narrowed = _narrow(store, entry, while_, settings.narrowing_steps)
+        store.forget_copy(entry)
+
+    LoopsLogger().new_run(pos, unrolled, iterations, narrowed, not fix_point)
 
     return store
+
+
+def _narrow(
+        store: Store,
+        entry: Store,
+        while_: 'Callable[[Store], Store]',
+        steps: int
+) -> int:
+    """Narrows `store` (a fix point of the loop) in place. Returns the number of
+    iterations run.
+
+    `entry` is the store at the entry of the loop, the values a variable can take in the
+    loop are those in the entry or those computed by the body of the loop"""
+    logger = TypeCheckLogger()
+    reported = len(logger.warnings)
+
+    narrowed = 0
+    for narrowed in range(1, steps+1):
+        new_store = while_(store.copy())
+        new_store.join_destructive(entry)
+        if store.narrow_op_destructive(new_store):
+            break
+
+    # The body of the loop has already been run (on larger values), only the warnings that
+    # haven't been found before are kept
+    seen = set(logger.warnings[:reported])  # type: Set[TypeCheckWarning]
+    new_warnings = []  # type: List[TypeCheckWarning]
+    for warning in logger.warnings[reported:]:
+        if warning not in seen:
+            seen.add(warning)
+            new_warnings.append(warning)
+    logger.warnings[reported:] = new_warnings
+
+    return narrowed
+
+
+class LoopsLogger(object, metaclass=Singleton):
+    """Records how many iterations were needed to analyse each loop"""
+
+    def __init__(self) -> None:
+        # For each loop: times it was run, iterations unrolled, iterations to find a fix
+        # point, iterations narrowing and times no fix point was found
+        self.loops = {}  # type: Dict[Optional[Pos], List[int]]
+
+    def new_run(self,
+                pos: 'Optional[Pos]',
+                unrolled: int,
+                iterations: int,
+                narrowed: int,
+                budget_exhausted: bool) -> None:
+        stats = self.loops.setdefault(pos, [0, 0, 0, 0, 0])
+        stats[0] += 1
+        stats[1] += unrolled
+        stats[2] += iterations
+        stats[3] += narrowed
+        stats[4] += int(budget_exhausted)
+
+    def __str__(self) -> str:
+        lines = []  # type: List[str]
+        # Sorting loops by their position in the code (loops without position go first)
+        loops = sorted(self.loops.items(),
+                       key=lambda loop: ('', (0, 0)) if loop[0] is None
+                       else (loop[0][1], loop[0][0] or (0, 0)))
+        for pos, (runs, unrolled, iterations, narrowed, exhausted) in loops:
+            if pos is None:
+                where = "<file-unknown>::"
+            elif pos[0] is None:
+                where = f"{pos[1]}::"
+            else:
+                where = f"{pos[1]}:{pos[0][0]}:{pos[0][1]}"
+            line = f"{where}: loop run {runs} time(s), {unrolled} iteration(s) unrolled, " \
+                f"{iterations} iteration(s) to find a fix point"
+            if narrowed:
+                line += f", {narrowed} iteration(s) narrowing"
+            if exhausted:
+                line += f", no fix point found {exhausted} time(s)"
+            lines.append(line)
+        return '\n'.join(lines)
@@ -0,0 +1,127 @@
+"""
+Profiling of the analysis (`pytropos --profile`).
+
+When profiling, the code analysing a file runs every statement inside `profiled(pos)`,
+which records in StatementsProfiler the time spent analysing the statement (and the
+statements inside it, eg, the body of a loop).
+"""
+
+import marshal
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+from ..miscelaneous import Pos, Singleton
+from .execute import LoopsLogger
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple  # noqa: F401
+
+__all__ = ['StatementsProfiler', 'profiled']
+
+
+class StatementsProfiler(object, metaclass=Singleton):
+    """Records the time spent analysing each statement"""
+
+    def __init__(self) -> None:
+        # For each statement: times it was run, time spent analysing it (including the
+        # statements inside it) and time spent in the statement itself (seconds)
+        self.stmts = {}  # type: Dict[Pos, List[Any]]
+        # The same for each pair (statement, statement containing it)
+        self.callers = {}  # type: Dict[Tuple[Pos, Pos], List[Any]]
+        # Statements being run: position, start time and time spent in inner statements
+        self._running = []  # type: List[List[Any]]
+
+    def enter(self, pos: Pos) -> None:
+        self._running.append([pos, perf_counter(), 0.0])
+
+    def exit(self) -> None:
+        pos, start, inner = self._running.pop()
+        elapsed = perf_counter() - start
+
+        stats = self.stmts.setdefault(pos, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] += elapsed - inner
+
+        if self._running:
+            parent = self._running[-1]
+            parent[2] += elapsed
+            caller_stats = self.callers.setdefault((pos, parent[0]), [0, 0.0, 0.0])
+            caller_stats[0] += 1
+            caller_stats[1] += elapsed
+            caller_stats[2] += elapsed - inner
+
+    def report(self, source: 'Optional[str]' = None) -> str:
+        """Returns a table with the statements sorted by the time spent analysing them.
+
+        For loops, the iterations column counts all iterations run to analyse it (see
+        LoopsLogger). The code of each statement is taken from `source` if given"""
+        lines = source.splitlines() if source is not None else []  # type: List[str]
+        loops = LoopsLogger().loops
+
+        table = [f"{'line':>6} {'runs':>6} {'cumulative':>12} {'own':>12} {'iterations':>10}"
+                 "  statement"]
+        for pos, (runs, cumulative, own) in sorted(self.stmts.items(),
+                                                   key=lambda s: s[1][1], reverse=True):
+            if pos in loops:
+                iterations = str(sum(loops[pos][1:4]))
+            else:
+                iterations = '-'
+            table.append(
+                f"{_line(pos):>6} {runs:>6} {1000*cumulative:>9.2f} ms {1000*own:>9.2f} ms"
+                f" {iterations:>10}  {_code(pos, lines)}"
+            )
+        return '\n'.join(table)
+
+    def __str__(self) -> str:
+        return self.report()
+
+    def dump_stats(self, path: str, source: 'Optional[str]' = None) -> None:
+        """Saves the times in `path` in the format of `pstats` (the format `cProfile`
+        uses), so they can be inspected with `pstats.Stats` or viewers of profiles.
+        Every statement is presented as a function called by the statement containing it"""
+        lines = source.splitlines() if source is not None else []  # type: List[str]
+
+        def key(pos: Pos) -> 'Tuple[str, int, str]':
+            return (pos[1], _line(pos), _code(pos, lines) or f'<statement {_line(pos)}>')
+
+        callers = {}  # type: Dict[Pos, Dict[Tuple[str, int, str], Tuple[Any, ...]]]
+        for (pos, parent), (runs, cumulative, own) in self.callers.items():
+            callers.setdefault(pos, {})[key(parent)] = (runs, runs, own, cumulative)
+
+        stats = {
+            key(pos): (runs, runs, own, cumulative, callers.get(pos, {}))
+            for pos, (runs, cumulative, own) in self.stmts.items()
+        }
+        with open(path, 'wb') as f:
+            marshal.dump(stats, f)
+
+
+class _Profiled(object):
+    __slots__ = ('pos', 'profiler')
+
+    def __init__(self, pos: Pos) -> None:
+        self.pos = pos
+
+    def __enter__(self) -> None:
+        self.profiler = StatementsProfiler()
+        self.profiler.enter(self.pos)
+
+    def __exit__(self, *exc_info: 'Any') -> None:
+        self.profiler.exit()
+
+
+def profiled(pos: Pos) -> _Profiled:
+    """Context manager measuring the time spent analysing the statement at `pos`"""
+    return _Profiled(pos)
+
+
+def _line(pos: Pos) -> int:
+    return 0 if pos[0] is None else pos[0][0]
+
+
+def _code(pos: Pos, lines: 'List[str]') -> str:
+    lineno = _line(pos)
+    if 0 < lineno <= len(lines):
+        return lines[lineno - 1].strip()
+    return ''
@@ -9,10 +9,11 @@ from typing import Optional
 from typing import List, Tuple  # noqa: F401
 import typing as ty  # noqa: F401
 
-__all__ = ['TypeCheckLogger']
+__all__ = ['TypeCheckLogger', 'TypeCheckWarning', 'format_warnings']
 
 
 WarningType = str
+TypeCheckWarning = Tuple[str, WarningType, Optional[Pos]]
 
 # Warning scheme:
 # F___ : Internal failure
@@ -65,7 +66,7 @@ WarningType = str
 
 class TypeCheckLogger(object, metaclass=Singleton):
     def __init__(self) -> None:
-        self.warnings = []  # type: List[Tuple[WarningType, str, Optional[Pos]]]
+        self.warnings = []  # type: List[TypeCheckWarning]
 
     def new_warning(self, err_code: str, msg: WarningType, pos: Optional[Pos]) -> None:
         self.warnings.append(
@@ -73,10 +74,15 @@ class TypeCheckLogger(object, metaclass=Singleton):
         )
 
     def __str__(self) -> str:
-        return '\n'.join(map(_warning_to_str, self.warnings))
+        return format_warnings(self.warnings)
 
 
-def _warning_to_str(warn: Tuple[WarningType, str, Optional[Pos]]) -> str:
+def format_warnings(warnings: 'List[TypeCheckWarning]') -> str:
+    """Returns the warnings as they are shown to the user, one per line"""
+    return '\n'.join(map(_warning_to_str, warnings))
+
+
+def _warning_to_str(warn: TypeCheckWarning) -> str:
     # TODO(helq): add file to the stuff to the stuff position
     warntype, msg, pos = warn
     if pos is None:
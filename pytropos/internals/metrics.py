@@ -0,0 +1,72 @@
+"""
+Counters of the work done by an analysis (`pytropos --metrics FILE`).
+
+Counting is disabled by default, it is enabled for an analysis setting `count_metrics` in
+its `AnalysisContext` (done from the command line, `pytropos.main`). The counters of each
+analysis are kept in Metrics (a single instance per analysis):
+
+- `store_copies`, `store_joins`, `store_widenings`: calls to `Store.copy`, `Store.join`
+  (and `join_destructive`) and `Store.widen_op` (and `widen_op_destructive`)
+- `mut_values_copied`: mutable values (eg, lists) copied while copying Stores
+- `mut_values_created`: mutable values created
+- `top_promotions`: values (variables or mutable values) made Top because their value
+  couldn't be computed, eg, when no fix point is found for a loop
+- `peak_live_mut_values`: highest number of mutable values alive (not yet collected) at
+  the same time
+"""
+
+import weakref
+from typing import TYPE_CHECKING
+
+from .context import analysis_context
+from .miscelaneous import Singleton
+
+if TYPE_CHECKING:
+    from typing import Any, Dict  # noqa: F401
+
+__all__ = ['enabled', 'counters', 'Metrics', 'count', 'new_mut_value']
+
+counters = ['store_copies', 'store_joins', 'store_widenings', 'mut_values_copied',
+            'mut_values_created', 'top_promotions']
+
+
+class Metrics(object, metaclass=Singleton):
+    """Counters of the current analysis"""
+
+    def __init__(self) -> None:
+        self.counters = dict.fromkeys(counters, 0)  # type: Dict[str, int]
+        self.live_mut_values = 0
+        self.peak_live_mut_values = 0
+        # Weak references to the mutable values alive (to know when they are collected)
+        self._mut_values = {}  # type: Dict[int, weakref.ref]
+
+    def as_dict(self) -> 'Dict[str, Any]':
+        return dict(self.counters, peak_live_mut_values=self.peak_live_mut_values)
+
+
+def enabled() -> bool:
+    """Whether the counters of the current analysis are updated"""
+    return analysis_context().count_metrics
+
+
+def count(counter: str, n: int = 1) -> None:
+    """Adds `n` to a counter of the current analysis"""
+    Metrics().counters[counter] += n
+
+
+def new_mut_value(val: object) -> None:
+    """Registers the creation of a mutable value"""
+    metrics = Metrics()
+    metrics.counters['mut_values_created'] += 1
+    metrics.live_mut_values += 1
+    if metrics.live_mut_values > metrics.peak_live_mut_values:
+        metrics.peak_live_mut_values = metrics.live_mut_values
+
+    mut_values = metrics._mut_values
+
+    def collected(ref: 'weakref.ref') -> None:
+        metrics.live_mut_values -= 1
+        del mut_values[id(ref)]
+
+    ref = weakref.ref(val, collected)
+    mut_values[id(ref)] = ref
@@ -1,7 +1,9 @@
 from typing import Dict, Type, Any  # noqa: F401
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Callable, Iterable, TypeVar
 
-__all__ = ['NonImplementedPT', 'Singleton', 'Pos']
+from .context import analysis_context
+
+__all__ = ['NonImplementedPT', 'Singleton', 'Pos', 'walk']
 
 Pos = Tuple[Optional[Tuple[int, int]], str]
 
@@ -12,13 +14,29 @@ class NonImplementedPT(Exception):
 
 # taken from: https://stackoverflow.com/a/6798042
 class Singleton(type):
-    _instances = {}  # type: Dict[Type, Any]
+    """There is a single instance of the class per analysis (see `AnalysisContext`)"""
 
     def __call__(cls, *args, **kwargs):  # type: ignore
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
+        instances = analysis_context().singletons
+        if cls not in instances:
+            instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
+        return instances[cls]
 
     def clean_sing(cls) -> None:
-        if cls in cls._instances:
-            del cls._instances[cls]
+        instances = analysis_context().singletons
+        if cls in instances:
+            del instances[cls]
+
+
+T = TypeVar('T')
+
+
+def walk(roots: 'Iterable[T]', visit: 'Callable[[T], Iterable[T]]') -> None:
+    """Traverses a graph depth-first using an explicit stack, so graphs of any depth can be
+    traversed (a recursive traversal is bounded by the recursion limit).
+
+    `visit` is called on each node reached and returns the nodes to visit next. It is in
+    charge of remembering the nodes already visited (if the graph has cycles)"""
+    stack = list(roots)
+    while stack:
+        stack.extend(visit(stack.pop()))
@@ -0,0 +1,181 @@
+from collections.abc import MutableMapping
+from itertools import count
+from typing import Iterator
+from typing import Optional, Dict, List, Set, Tuple, AbstractSet  # noqa: F401
+
+from ..values.python_values.python_values import PythonValue, AbstractMutVal
+
+__all__ = ['Scope']
+
+
+class Scope(MutableMapping):
+    """
+    A mapping from variable names to values that is copied lazily (copy-on-write).
+
+    Copying a Scope takes constant time, both copies share the same underlying dict until
+    one of them is modified. The keys holding mutable values are tracked, so that copying
+    a Store only needs to visit them (immutable values can be shared between copies). The
+    copies of mutable values are kept apart from the shared dict (see `set_untracked`),
+    thus copying a Store doesn't copy the dict.
+
+    A Scope also remembers which variables have been written since it was copied, thus
+    joining a Scope with one of its copies only requires to look at the variables modified
+    on either of them (see `modified_since_copy`).
+    """
+
+    __copies_ids = count()
+
+    def __init__(self) -> None:
+        self._vars = {}  # type: Dict[str, PythonValue]
+        self._mut_keys = set()  # type: Set[str]
+        # If True, _vars and _mut_keys may be used by another Scope and must be copied
+        # before modifying them
+        self._shared = False
+        # Values replacing those in _vars without modifying it (see `set_untracked`), and
+        # whether the dict may be used by another Scope
+        self._copies = {}  # type: Dict[str, PythonValue]
+        self._copies_shared = False
+        # Variables written, grouped by the copies of this Scope made in the middle. The
+        # first entry contains the variables written since this Scope was created (and
+        # the id of the copy this Scope is, if any), every copy adds a new entry
+        self._written = [(-1, set())]  # type: List[Tuple[int, Set[str]]]
+        # Number of modifications to mutable values when this Scope was created
+        self._mutations = AbstractMutVal.modifications()
+
+    def copy(self) -> 'Scope':
+        copy_id = next(Scope.__copies_ids)
+        self._written.append((copy_id, set()))
+
+        new = Scope.__new__(Scope)  # type: Scope
+        new._vars = self._vars
+        new._mut_keys = self._mut_keys
+        new._shared = self._shared = True
+        new._copies = self._copies
+        new._copies_shared = self._copies_shared = True
+        new._written = [(copy_id, set())]
+        new._mutations = AbstractMutVal.modifications()
+        return new
+
+    def _own(self) -> None:
+        """Makes sure no other Scope uses the dict and set of this Scope (the values kept
+        apart are moved into the dict)"""
+        if self._shared:
+            self._vars = self._vars.copy()
+            self._mut_keys = self._mut_keys.copy()
+            self._shared = False
+            if self._copies:
+                self._vars.update(self._copies)
+                self._copies = {}
+                self._copies_shared = False
+
+    def shares_vars_with(self, other: 'Scope') -> bool:
+        """Returns True if no Scope has been modified since they were copied from each
+        other, ie, both Scopes contain the same values (or copies of the same mutable
+        values, see `set_untracked`)"""
+        return self._vars is other._vars
+
+    @property
+    def mut_keys(self) -> 'AbstractSet[str]':
+        """Keys whose values are mutable.
+
+        Notice that it may contain a key whose value stopped being mutable after it was
+        saved (a joined mutable value may become Top), so `is_mut` must still be checked"""
+        return self._mut_keys
+
+    def _copy_entry(self, copy: 'Scope') -> 'Optional[int]':
+        """Returns the position in `_written` of the entry started when `copy` was made"""
+        copy_id = copy._written[0][0]
+        # The copy being joined is usually the last one made
+        for i in range(len(self._written)-1, 0, -1):
+            if self._written[i][0] == copy_id:
+                return i
+        return None
+
+    def modified_since_copy(self, copy: 'Scope') -> 'Optional[Set[str]]':
+        """Returns the variables that may have a different value in this Scope and
+        `copy`. Any variable not returned holds the same value (the same object) in both
+        Scopes, or an exact copy of it if the value is mutable.
+
+        Returns None if `copy` isn't a copy of this Scope (or `forget_copy` was called).
+
+        Mutable values are modified in place, outside of the Scope. If any mutable value
+        has been modified since the copy was made, all variables holding mutable values
+        are returned."""
+        if self._vars is copy._vars:
+            written = set()  # type: Set[str]
+        else:
+            i = self._copy_entry(copy)
+            if i is None:
+                return None
+            written = set()
+            for _, w in self._written[i:] + copy._written:
+                written.update(w)
+
+        if copy._mutations != AbstractMutVal.modifications() \
+                or any(k in self._mut_keys or k in copy._mut_keys for k in written):
+            written.update(self._mut_keys, copy._mut_keys)
+
+        return written
+
+    def forget_copy(self, copy: 'Scope') -> None:
+        """Stops tracking the variables written since `copy` was made, eg, after the copy
+        has been joined back into this Scope"""
+        i = self._copy_entry(copy)
+        if i is not None:
+            self._written[i-1][1].update(*(w for _, w in self._written[i:]))
+            del self._written[i:]
+
+    def set_untracked(self, key: str, value: PythonValue) -> None:
+        """Sets a variable without registering it as written. The new value must be
+        equivalent to the previous one (eg, a copy of it).
+
+        If the dict is shared with another Scope, it isn't copied: the value is saved
+        apart and only this Scope sees it"""
+        if not self._shared:
+            self._vars[key] = value
+            return
+        if self._copies_shared:
+            self._copies = self._copies.copy()
+            self._copies_shared = False
+        self._copies[key] = value
+
+    def snapshot(self) -> 'List[Tuple[str, PythonValue]]':
+        """Returns the variables and their values. Unlike `copy`, it isn't tracked and the
+        dict isn't shared (the Scope can be modified later without copying it)"""
+        if self._copies:
+            return list(dict(self._vars, **self._copies).items())
+        return list(self._vars.items())
+
+    def __getitem__(self, key: str) -> PythonValue:
+        if key in self._copies:
+            return self._copies[key]
+        return self._vars[key]
+
+    def __setitem__(self, key: str, value: PythonValue) -> None:
+        self._own()
+        self._vars[key] = value
+        if value.is_mut():
+            self._mut_keys.add(key)
+        else:
+            self._mut_keys.discard(key)
+        self._written[-1][1].add(key)
+
+    def __delitem__(self, key: str) -> None:
+        self._own()
+        del self._vars[key]
+        self._mut_keys.discard(key)
+        self._written[-1][1].add(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._vars
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._vars)
+
+    def __len__(self) -> int:
+        return len(self._vars)
+
+    def __repr__(self) -> str:
+        if self._copies:
+            return repr(dict(self._vars, **self._copies))
+        return repr(self._vars)
@@ -1,19 +1,45 @@
 from typing import Tuple, Union, Iterable
-from typing import Optional, Dict  # noqa: F401
+from typing import Optional, Dict, Set, List  # noqa: F401
 
 from ..values.python_values import PythonValue
+from ..values.python_values.python_values import AbstractMutVal
 from ..values.python_values.wrappers import BuiltinModule
 from ..errors import TypeCheckLogger
 from ..abstract_domain import AbstractDomain
+from .. import metrics
 
 # from .global_scope import FrozenGlobalScope, GlobalScope
 # from .cell import Cell
 
-from ..miscelaneous import Pos
+from ..miscelaneous import Pos, walk
+from .scope import Scope
 
 __all__ = ['Store']
 
 
+def _widen_joined_muts(
+        olds: 'List[PythonValue]',
+        mut_heap: 'Dict[Tuple[str, int], Tuple[int, int, PythonValue]]'
+) -> None:
+    """Widens the mutable values created by joining the values in `olds` with other values
+    (the new values are saved in `mut_heap`, see `PythonValue.join_mut`)"""
+    old_vals = {}  # type: Dict[int, AbstractMutVal]
+
+    def visit(val: AbstractMutVal) -> 'List[AbstractMutVal]':
+        if val.mut_id in old_vals:
+            return []
+        old_vals[val.mut_id] = val
+        return [v.val for v in val.children.values() if isinstance(v.val, AbstractMutVal)]
+
+    walk([v.val for v in olds if isinstance(v.val, AbstractMutVal)], visit)
+
+    for (side, mut_id), (_, _, new_val) in mut_heap.items():
+        if side == 'left' and mut_id in old_vals and new_val.is_mut():
+            assert isinstance(new_val.val, AbstractMutVal)
+            if not new_val.val.is_top():
+                new_val.val.widen_joined(old_vals[mut_id])
+
+
 # TODO(helq): The global scope doesn't not contain builtins, but the builtins are always
 # present and should be checked if the variable is not local/nonlocal or global
 
@@ -34,7 +60,7 @@ class Store(AbstractDomain):
                 self._im_top = True
             else:
                 self._im_top = False
-                self._global_scope = {}  # type: Dict[str, PythonValue]
+                self._global_scope = Scope()
                 self._builtin_values = {}  # type: Dict[str, PythonValue]
                 self._starred = False
         else:
@@ -58,24 +84,34 @@ class Store(AbstractDomain):
         """
         Returns a copy of the Store.
         Any modification to this shouldn't alter the original store.
+
+        Non mutable values are shared by both stores (the scope is copied lazily), only
+        mutable values are cloned. The clones are kept apart from the scope (see
+        `Scope.set_untracked`), so the time taken depends only on the mutable values.
         """
+        if metrics.enabled():
+            metrics.count('store_copies')
+
         new_store = Store()
+        new_globals = new_store._global_scope = self._global_scope.copy()
 
         mut_heap = {}  # type: Dict[int, PythonValue]
-        new_globals = new_store._global_scope
-
-        for k, val in self._global_scope.items():
+        for k in self._global_scope.mut_keys:
+            val = self._global_scope[k]
             if val.is_mut():
-                new_globals[k] = val.copy_mut(mut_heap)
-            else:
-                new_globals[k] = val  # non mutable objects don't need to be cloned
+                new_globals.set_untracked(k, val.copy_mut(mut_heap))
 
         new_store._builtin_values = self._builtin_values
 
         return new_store
 
+    def forget_copy(self, copy: 'Store') -> None:
+        """Stops tracking the variables written since `copy` (a copy of this store) was
+        made. Needed for copies that aren't joined back (joining already does it)"""
+        self._global_scope.forget_copy(copy._global_scope)
+
     def items(self) -> Iterable[Tuple[str, PythonValue]]:
-        return self._global_scope.copy().items()
+        return self._global_scope.snapshot()
 
     def __getitem__(self, key_: Union[str, Tuple[str, Pos]]) -> PythonValue:
         if not isinstance(key_, tuple):
@@ -130,87 +166,276 @@ class Store(AbstractDomain):
     def __repr__(self) -> str:
         return f"Store({self._global_scope})"
 
-    def join(self, other: 'Store') -> 'Store':
-        left_keys = set(self._global_scope)
-        right_keys = set(other._global_scope)
-        keys = left_keys.union(right_keys)
+    def copy_soft(self) -> 'Store':
+        """
+        Returns a copy of the Store that shares all its values with the original store.
+
+        Assigning or deleting variables in the copy doesn't alter the original store but
+        modifying a mutable value does, use `copy` if any code is going to run on the
+        copy. Copying is done in constant time.
+        """
         new_store = Store()
-        assert self._builtin_values is other._builtin_values
+        new_store._global_scope = self._global_scope.copy()
         new_store._builtin_values = self._builtin_values
-        new_globals = new_store._global_scope
-        mut_heap = {}  # type: Dict[Tuple[str, int], Tuple[int, int, PythonValue]]
-
-        for key in keys:
-            # The key is only in the left store
-            if key not in right_keys:
-                # handling the mutable case
-                left_val = self._global_scope[key]
-                if left_val.is_mut():
-                    left_val.new_vals_to_top(mut_heap, "left")
+        return new_store
 
-                new_globals[key] = PythonValue.top()
+    def join(self, other: 'Store') -> 'Store':
+        if metrics.enabled():
+            metrics.count('store_joins')
+        keys = self._global_scope.modified_since_copy(other._global_scope)
+        new_store = self.copy_soft()
+        new_store._join_in_place(other, keys)
+        self._global_scope.forget_copy(new_store._global_scope)
+        return new_store
 
-            # The key is only in the right store
-            elif key not in left_keys:
-                # handling the mutable case
-                right_val = other._global_scope[key]
-                if right_val.is_mut():
-                    right_val.new_vals_to_top(mut_heap, "right")
+    def join_destructive(self, other: 'Store') -> bool:
+        """Joins `other` into this store, ie, this store is modified in place. Returns True
+        if no variable changed (the store already contained `other`).
+
+        Only variables whose values change are reassigned and mutable values are never
+        modified in place (`join_mut` creates new values), thus any store sharing values
+        with this (see `copy_soft`) is left untouched.
+
+        If `other` is a copy of this store, only the variables modified in any of them
+        since the copy was made are visited."""
+        if metrics.enabled():
+            metrics.count('store_joins')
+        keys = self._global_scope.modified_since_copy(other._global_scope)
+        unchanged = self._join_in_place(other, keys)
+        self._global_scope.forget_copy(other._global_scope)
+        return unchanged
+
+    def _join_in_place(self, other: 'Store', keys: 'Optional[Set[str]]') -> bool:
+        """Joins `other` into this store, only the variables in `keys` are visited (all
+        if None). Returns True if no variable changed"""
+        assert self._builtin_values is other._builtin_values
+        left_globals = self._global_scope
+        right_globals = other._global_scope
+        mut_heap = {}  # type: Dict[Tuple[str, int], Tuple[int, int, PythonValue]]
 
-                new_globals[key] = PythonValue.top()
+        if keys is None:
+            keys = set(left_globals).union(right_globals)
 
-            # the key is in both stores
-            else:
-                val1 = self._global_scope[key]
-                val2 = other._global_scope[key]
+        unchanged = True
 
-                if val1.is_mut():
-                    if val2.is_mut():  # both (val1 and val2) are mutable
-                        new_globals[key] = val1.join_mut(val2, mut_heap)
+        for key in keys:
+            if key in left_globals:
+                left_val = left_globals[key]
 
-                    else:  # val1 mutable, val2 not mutable
-                        val1.new_vals_to_top(mut_heap, 'left')
-                        new_globals[key] = PythonValue.top()
+                # the key is in both stores
+                if key in right_globals:
+                    new_val = self._join_vals(left_val, right_globals[key], mut_heap)
 
+                # The key is only in the left store
                 else:
-                    if val2.is_mut():  # val1 not mutable, val2 mutable
-                        val2.new_vals_to_top(mut_heap, 'right')
-                        new_globals[key] = PythonValue.top()
+                    new_val = self._val_to_top(left_val, mut_heap, 'left')
 
-                    else:  # both (val1 and val2) are not mutable
-                        new_globals[key] = val1.join(val2)
+                if new_val is not left_val:
+                    left_globals[key] = new_val
+                    unchanged = False
 
-        return new_store
+            # The key is only in the right store
+            elif key in right_globals:
+                left_globals[key] = self._val_to_top(right_globals[key], mut_heap, 'right')
+                unchanged = False
+
+        return unchanged
+
+    @staticmethod
+    def _val_to_top(
+            val: PythonValue,
+            mut_heap: 'Dict[Tuple[str, int], Tuple[int, int, PythonValue]]',
+            side: str
+    ) -> PythonValue:
+        # handling the mutable case
+        if val.is_mut():
+            val.new_vals_to_top(mut_heap, side)
+        return PythonValue.top()
+
+    @classmethod
+    def _join_vals(
+            cls,
+            val1: PythonValue,
+            val2: PythonValue,
+            mut_heap: 'Dict[Tuple[str, int], Tuple[int, int, PythonValue]]'
+    ) -> PythonValue:
+        if val1.is_mut():
+            if val2.is_mut():  # both (val1 and val2) are mutable
+                return val1.join_mut(val2, mut_heap)
+            else:  # val1 mutable, val2 not mutable
+                return cls._val_to_top(val1, mut_heap, 'left')
+
+        elif val2.is_mut():  # val1 not mutable, val2 mutable
+            return cls._val_to_top(val2, mut_heap, 'right')
+
+        else:  # both (val1 and val2) are not mutable
+            return val1.join(val2)
 
     def widen_op(self, other: 'Store') -> 'Tuple[Store, bool]':
         """
         Works like `.join` but it is warrantied to terminate if it is applied over and
         over increasing values.
         """
-        keys = set(self._global_scope).union(other._global_scope)
-        common_keys = set(self._global_scope).intersection(other._global_scope)
-        new_store = Store()
+        if metrics.enabled():
+            metrics.count('store_widenings')
+        keys = self._global_scope.modified_since_copy(other._global_scope)
+        new_store = self.copy_soft()
+        fix_point = new_store._widen_op_in_place(other, keys)
+        self._global_scope.forget_copy(new_store._global_scope)
+        return new_store, fix_point
+
+    def widen_op_destructive(self, other: 'Store') -> bool:
+        """Applies `widen_op` in place (see `join_destructive`). Returns True if a fix
+        point has been reached"""
+        if metrics.enabled():
+            metrics.count('store_widenings')
+        keys = self._global_scope.modified_since_copy(other._global_scope)
+        fix_point = self._widen_op_in_place(other, keys)
+        self._global_scope.forget_copy(other._global_scope)
+        return fix_point
+
+    def _widen_op_in_place(self, other: 'Store', keys: 'Optional[Set[str]]') -> bool:
         assert self._builtin_values is other._builtin_values
-        new_store._builtin_values = self._builtin_values
+        left_globals = self._global_scope
+        right_globals = other._global_scope
+        mut_heap = {}  # type: Dict[Tuple[str, int], Tuple[int, int, PythonValue]]
+        # Mutable values are joined first and widened once all of them have been joined
+        joined_muts = {}  # type: Dict[str, Tuple[PythonValue, PythonValue]]
+
+        if keys is None:
+            keys = set(left_globals).union(right_globals)
+
         fix_point = True
 
         for key in keys:
-            if key not in common_keys:
-                new_store._global_scope[key] = PythonValue.top()
+            if key in left_globals and key in right_globals:
+                val1 = left_globals[key]
+                val2 = right_globals[key]
+
+                # if the same object is saved in both Stores, there is nothing to do
+                if val1 is val2:
+                    continue
+
+                if val1.is_mut() or val2.is_mut():
+                    joined_muts[key] = (val1, self._join_vals(val1, val2, mut_heap))
+                elif not self._widen_val_in_place(key, val1, val2):
+                    fix_point = False
+
+            # The key is only in one of the stores
+            elif key in left_globals or key in right_globals:
+                left_val = left_globals.get(key)
+                if left_val is not None and left_val.is_mut():
+                    joined_muts[key] = \
+                        (left_val, self._val_to_top(left_val, mut_heap, 'left'))
+                else:
+                    left_globals[key] = PythonValue.top()
+                    fix_point = False
+
+        if joined_muts and not self._widen_muts_in_place(joined_muts, mut_heap):
+            fix_point = False
+
+        return fix_point
+
+    def _widen_val_in_place(self, key: str, val1: PythonValue, val2: PythonValue) -> bool:
+        """Widens the immutable value of a variable. Returns True if it didn't change"""
+        new_val, fix = val1.widen_op(val2)
+        if new_val is not val1:
+            self._global_scope[key] = new_val
+        return fix
+
+    def _widen_muts_in_place(
+            self,
+            joined_muts: 'Dict[str, Tuple[PythonValue, PythonValue]]',
+            mut_heap: 'Dict[Tuple[str, int], Tuple[int, int, PythonValue]]'
+    ) -> bool:
+        """Widens the mutable values already joined (old and joined value for each
+        variable). Returns True if no value changed"""
+        _widen_joined_muts([old for old, _ in joined_muts.values()], mut_heap)
+
+        fix_point = True
+        for key, (old, new_val) in joined_muts.items():
+            # All mutable values are replaced, even if they didn't change, otherwise two
+            # variables pointing to the same object could end up pointing to different
+            # objects
+            self._global_scope[key] = new_val
+            if not new_val == old:
                 fix_point = False
-            else:
-                val1 = self._global_scope[key]
-                val2 = other._global_scope[key]
+        return fix_point
+
+    def narrow_op(self, other: 'Store') -> 'Tuple[Store, bool]':
+        """
+        Refines the values of this store using the values of `other` (a smaller store, eg,
+        the result of running the body of a loop on this store).
+        """
+        keys = self._global_scope.modified_since_copy(other._global_scope)
+        new_store = self.copy()
+        fix_point = new_store._narrow_op_in_place(other, keys)
+        self._global_scope.forget_copy(new_store._global_scope)
+        return new_store, fix_point
+
+    def narrow_op_destructive(self, other: 'Store') -> bool:
+        """Applies `narrow_op` in place (see `join_destructive`). Returns True if nothing
+        changed. Notice that mutable values are narrowed in place"""
+        keys = self._global_scope.modified_since_copy(other._global_scope)
+        fix_point = self._narrow_op_in_place(other, keys)
+        self._global_scope.forget_copy(other._global_scope)
+        return fix_point
+
+    def _narrow_op_in_place(self, other: 'Store', keys: 'Optional[Set[str]]') -> bool:
+        left_globals = self._global_scope
+        right_globals = other._global_scope
+        visited = set()  # type: Set[Tuple[int, int]]
+
+        if keys is None:
+            keys = set(left_globals).union(right_globals)
+
+        fix_point = True
+
+        # Variables in only one of the stores are left as they are
+        for key in keys:
+            if key in left_globals and key in right_globals:
+                val1 = left_globals[key]
+                val2 = right_globals[key]
 
-                # if the same object is saved in both Stores, don't copy it!
                 if val1 is val2:
-                    new_store._global_scope[key] = val1
+                    continue
+
+                if val1.is_mut() and val2.is_mut():
+                    if not val1.narrow_mut(val2, visited):
+                        fix_point = False
                 else:
-                    new_store._global_scope[key], fix = val1.widen_op(val2)
+                    new_val, fix = val1.narrow_op(val2)
+                    if new_val is not val1:
+                        left_globals[key] = new_val
                     if not fix:
                         fix_point = False
 
-        return new_store, fix_point
+        return fix_point
+
+    def to_top_destructive(self, other: 'Store') -> bool:
+        """Makes Top every variable that may have a different value in this store and
+        `other` (a copy of this store, see `join_destructive`). Returns True if any
+        variable wasn't Top already"""
+        keys = self._global_scope.modified_since_copy(other._global_scope)
+        if keys is None:
+            keys = set(self._global_scope).union(other._global_scope)
+
+        # Mutable values are never modified in place, they are just replaced by Top (and
+        # all variables holding mutable values are in `keys` if any of them changed)
+        changed = False
+        for key in keys:
+            if key in self._global_scope:
+                if self._global_scope[key].is_top():
+                    continue
+            elif key not in other._global_scope:
+                continue
+            self._global_scope[key] = PythonValue.top()
+            changed = True
+            if metrics.enabled():
+                metrics.count('top_promotions')
+
+        self._global_scope.forget_copy(other._global_scope)
+        return changed
 
     def importStar(self, val: 'Optional[PythonValue]' = None) -> None:
         """Import all variables exported by a module (if the module is supported)
@@ -1,3 +1,5 @@
+from functools import lru_cache
+from math import copysign
 from typing import Any, TYPE_CHECKING
 from typing import Optional  # noqa: F401
 
@@ -20,21 +22,44 @@ if TYPE_CHECKING:
     b_float = __builtins__.float
 
 
-def int(val: 'Optional[b_int]' = None) -> PythonValue:
-    """Returns an Int wrapped into a PythonValue"""
+# Ints, Floats and Bools are immutable, so the same object can be returned every time a
+# constant is created (eg, every time a loop body is executed). Only the most recently
+# used constants are kept.
+@lru_cache(maxsize=1024, typed=True)
+def _interned_int(val: 'Optional[b_int]') -> PythonValue:
     return PythonValue(Int(val))
 
 
+@lru_cache(maxsize=1024, typed=True)
+def _interned_float(val: 'Optional[b_float]') -> PythonValue:
+    return PythonValue(Float(val))
+
+
+_bools = {
+    val: PythonValue(Bool(val)) for val in [True, False, None]
+}  # type: Dict[Optional[b_bool], PythonValue]
+
+
+def int(val: 'Optional[b_int]' = None) -> PythonValue:
+    """Returns an Int wrapped into a PythonValue (equal ints may share the same object)"""
+    return _interned_int(val)
+
+
 def float(val: 'Optional[b_float]' = None) -> PythonValue:
-    """Returns a Float wrapped into a PythonValue"""
+    """Returns a Float wrapped into a PythonValue (equal floats may share the same
+    object)"""
     # assert val is None or isinstance(val, __builtins__['float']), \
     #     f"I accept either a float or a None value, but I was given {type(val)}"
-    return PythonValue(Float(val))
+
+    # -0.0 == 0.0 but they are different values, and NaN is different to itself
+    if val is not None and (val != val or (val == 0 and copysign(1, val) < 0)):
+        return PythonValue(Float(val))
+    return _interned_float(val)
 
 
 def bool(val: 'Optional[b_bool]' = None) -> PythonValue:
-    """Returns a Bool wrapped into a PythonValue"""
-    return PythonValue(Bool(val))
+    """Returns a Bool wrapped into a PythonValue (there are only three of them)"""
+    return _bools[val]
 
 
 def __createNonePV() -> Any:
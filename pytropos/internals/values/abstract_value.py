@@ -6,7 +6,18 @@ from ..abstract_domain import AbstractDomain
 
 from ..miscelaneous import Pos
 
-__all__ = ['AbstractValue']
+__all__ = ['AbstractValue', 'clear_ops_cache']
+
+
+# Methods implementing the operations between AbstractValues, keyed by (op, type of left
+# operand, type of right operand). It is filled by `PythonValue.operate`
+ops_cache = {}  # type: Dict[Tuple[str, type, type], Any]
+
+
+def clear_ops_cache() -> None:
+    """Forgets how operations have been resolved. Call it after adding (or removing)
+    op_* methods to a class that already exists"""
+    ops_cache.clear()
 
 
 class AbstractValue(AbstractDomain):
@@ -15,6 +26,13 @@ class AbstractValue(AbstractDomain):
     like `object` for all objects in python.
     """
 
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)  # type: ignore
+        # A new class may override the operations of the classes it derives from
+        clear_ops_cache()
+
     @abstractmethod
     def join(self, other: Any) -> Any:
         """Returns the new value that captures the other two (self and other)"""
@@ -24,6 +42,10 @@ class AbstractValue(AbstractDomain):
         """Implement this method if the AbstractValue requires a widening operator"""
         raise NotImplementedError()
 
+    def narrow_op(self, other: Any) -> 'Tuple[Any, bool]':
+        """Implement this method if the values widened can be refined (narrowed)"""
+        raise NotImplementedError()
+
     @property
     @abstractmethod
     def type_name(self) -> str:
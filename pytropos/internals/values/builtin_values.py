@@ -1,14 +1,22 @@
 import re
-from functools import partial
-from typing import Optional, Any, Union
+from math import inf, isnan, nan
+from typing import Optional, Any, Union, Callable, Iterable, Tuple, TypeVar
+from typing import Dict  # noqa: F401
 
-from .abstract_value import AbstractValue
+from .abstract_value import AbstractValue, clear_ops_cache
 from ..errors import TypeCheckLogger
 from ..miscelaneous import Pos
+from ..context import analysis_context
 
 __all__ = ['Int', 'Float', 'Bool', 'NoneType']
 
 
+def _intervals() -> bool:
+    """Whether the values that an unknown Int or Float can take are bounded by an interval
+    in the current analysis (see `AnalysisOptions.intervals`)"""
+    return analysis_context().options.intervals
+
+
 ops_symbols = {
     'add': '+',
     'sub': '+',
@@ -39,13 +47,33 @@ class Int(AbstractValue):
     The abstraction function is Int(n) and the concretisation is all naturals for n==None
     and {n} for n
     """
-    def __init__(self, val: Optional[int] = None) -> None:
+    __slots__ = ('val', 'bounds')
+
+    def __init__(
+            self,
+            val: Optional[int] = None,
+            bounds: 'Optional[Tuple[float, float]]' = None
+    ) -> None:
         """
-        If val is None, then the Int value is Top
+        If val is None, then the Int value is Top, unless `bounds` are given (see
+        `AnalysisOptions.intervals`)
         """
         self.val = val
+        self.bounds = bounds
+
+    @classmethod
+    def from_bounds(cls, lower: float, upper: float) -> 'Int':
+        """Returns the Int representing all integers between lower and upper"""
+        if _isnan(lower) or _isnan(upper) or lower == inf or upper == -inf \
+                or (lower == -inf and upper == inf):
+            return cls.top()
+        if lower == upper:
+            return Int(int(lower))
+        return Int(None, (lower, upper))
 
     def __repr__(self) -> str:
+        if self.bounds is not None:
+            return f"Int({self.val}, bounds={self.bounds})"
         return f"Int({self.val})"
 
     __top = None  # type: Int
@@ -58,12 +86,23 @@ class Int(AbstractValue):
         return cls.__top
 
     def is_top(self) -> bool:
-        return self.val is None
+        return self.val is None and self.bounds is None
 
     def join(self, other: 'Int') -> 'Int':
-        if self.val == other.val:
+        if self.is_top() or (self.val is not None and self.val == other.val):
             return self
-        return Int()
+        if not _intervals():
+            return Int()
+        return _join_bounds(self, other, Int.from_bounds)
+
+    def widen_op(self, other: 'Int') -> 'Tuple[Int, bool]':
+        """Any bound that grows is moved to infinity"""
+        return _widen_bounds(self, other, Int.from_bounds)
+
+    def narrow_op(self, other: 'Int') -> 'Tuple[Int, bool]':
+        """Infinite bounds (eg, Top) can be refined to the bounds of other (other is
+        smaller than self)"""
+        return _narrow_bounds(self, other, Int.from_bounds)
 
     @property
     def type_name(self) -> str:
@@ -71,6 +110,8 @@ class Int(AbstractValue):
 
     @property
     def abstract_repr(self) -> str:
+        if self.bounds is not None:
+            return "int[{}, {}]".format(*self.bounds)
         if self.val is None:
             return "int?"
         else:
@@ -81,80 +122,17 @@ class Int(AbstractValue):
             return False
         if self.is_top() and other.is_top():
             return True
-        return self.val == other.val
+        return self.val == other.val and self.bounds == other.bounds
 
+    # The methods op_OP, op_OP_Int and op_OP_Bool (eg, op_add, op_add_Int) for the
+    # operations in these sets are defined below with _define_ops
     _int_to_int_ops = {'add', 'sub', 'mul', 'radd', 'rsub', 'rmul'}
     _int_to_bool_ops = {'eq', 'ne', 'lt', 'le', 'gt', 'ge'}
     _int_to_int_ops_shift = {'lshift', 'rshift', 'rlshift', 'rrshift'}
     _int_to_int_ops_div = {'truediv', 'floordiv', 'mod', 'rtruediv', 'rfloordiv', 'rmod'}
 
-    def __getattribute__(self, name: str) -> Any:
-        # Checking if name is 'op_OP' (eg, 'op_add')
-        op = extract_op.match(name)
-        if op and (
-            not op[3]  # allowing op_add
-            or op[3] in ('Int', 'Bool')  # allowing op_add_Bool
-        ):
-            if op[1] in Int._int_to_int_ops:
-                return partial(Int.__operate_int_to_int, self, op[1])
-            if op[1] in Int._int_to_bool_ops:
-                return partial(Int.__operate_int_to_bool, self, op[1])
-            if op[1] in Int._int_to_int_ops_shift:
-                return partial(Int.__operate_int_to_int_shift, self, op[1])
-            if op[1] in Int._int_to_int_ops_div:
-                return partial(Int.__operate_int_div, self, op[1])
-
-        return object.__getattribute__(self, name)
-
-    def __operate_int_to_int(self, op: str, other: 'Int', pos: Optional[Pos]) -> 'Int':
-        if self.val is None or other.val is None:
-            return Int.top()
-
-        new_val = getattr(int, f"__{op}__")(self.val, other.val)
-        return Int(new_val)
-
-    def __operate_int_to_bool(self, op: str, other: 'Int', pos: Optional[Pos]) -> 'Bool':
-        if self.val is None or other.val is None:
-            return Bool.top()
-
-        new_val = getattr(int, f"__{op}__")(self.val, other.val)
-        return Bool(new_val)
-
-    def __operate_int_to_int_shift(self, op: str, other: 'Int', pos: Optional[Pos]) -> 'Int':
-        if self.val is None or other.val is None:
-            return Int.top()
-
-        try:
-            new_val = getattr(int, f"__{op}__")(self.val, other.val)
-        except ValueError as msg:
-            TypeCheckLogger().new_warning(
-                "E002", f"ValueError: {msg}", pos)
-            return Int.top()
-
-        return Int(new_val)
-
-    def __operate_int_div(
-            self,
-            op: str,
-            other: 'Int',
-            pos: Optional[Pos]) -> Union['Int', 'Float', None]:
-        if self.val is None or other.val is None:
-            return None
-
-        try:
-            new_val = getattr(int, f"__{op}__")(self.val, other.val)
-        except ZeroDivisionError as msg:
-            TypeCheckLogger().new_warning(
-                "E001", f"ZeroDivisionError: {msg}", pos)
-            return None
-
-        return Int(new_val) if isinstance(new_val, int) else Float(new_val)
-
     def op_bool(self, pos: Optional[Pos]) -> 'Bool':
-        if self.is_top():
-            return Bool.top()
-        else:
-            return Bool(bool(self.val))
+        return _bounds_to_bool(self)
 
 
 class Float(AbstractValue):
@@ -163,13 +141,36 @@ class Float(AbstractValue):
     The abstraction function is Float(n) and the concretisation is floating numbers for
     n==None and {n} for n
     """
-    def __init__(self, val: Optional[float] = None) -> None:
+    __slots__ = ('val', 'bounds')
+
+    def __init__(
+            self,
+            val: Optional[float] = None,
+            bounds: 'Optional[Tuple[float, float]]' = None
+    ) -> None:
         """
-        If val is None, then the Float value is Top
+        If val is None, then the Float value is Top, unless `bounds` are given (see
+        `AnalysisOptions.intervals`)
         """
         self.val = val
+        self.bounds = bounds
+
+    @classmethod
+    def from_bounds(cls, lower: float, upper: float) -> 'Float':
+        """Returns the Float representing all floats between lower and upper"""
+        if _isnan(lower) or _isnan(upper) or (lower == -inf and upper == inf):
+            return cls.top()
+        try:
+            lower, upper = float(lower), float(upper)
+        except OverflowError:  # an int too large for a float
+            return cls.top()
+        if lower == upper:
+            return Float(lower)
+        return Float(None, (lower, upper))
 
     def __repr__(self) -> str:
+        if self.bounds is not None:
+            return f"Float({self.val}, bounds={self.bounds})"
         return f"Float({self.val})"
 
     __top = None  # type: Float
@@ -182,12 +183,23 @@ class Float(AbstractValue):
         return cls.__top
 
     def is_top(self) -> bool:
-        return self.val is None
+        return self.val is None and self.bounds is None
 
     def join(self, other: 'Float') -> 'Float':
-        if self.val == other.val:
+        if self.is_top() or (self.val is not None and self.val == other.val):
             return self
-        return Float()
+        if not _intervals():
+            return Float()
+        return _join_bounds(self, other, Float.from_bounds)
+
+    def widen_op(self, other: 'Float') -> 'Tuple[Float, bool]':
+        """Any bound that grows is moved to infinity"""
+        return _widen_bounds(self, other, Float.from_bounds)
+
+    def narrow_op(self, other: 'Float') -> 'Tuple[Float, bool]':
+        """Infinite bounds (eg, Top) can be refined to the bounds of other (other is
+        smaller than self)"""
+        return _narrow_bounds(self, other, Float.from_bounds)
 
     @property
     def type_name(self) -> str:
@@ -195,6 +207,8 @@ class Float(AbstractValue):
 
     @property
     def abstract_repr(self) -> str:
+        if self.bounds is not None:
+            return "float[{}, {}]".format(*self.bounds)
         if self.val is None:
             return "float?"
         else:
@@ -205,109 +219,17 @@ class Float(AbstractValue):
             return False
         if self.is_top() and other.is_top():
             return True
-        return self.val == other.val
+        return self.val == other.val and self.bounds == other.bounds
 
+    # The methods op_OP, op_OP_Int and op_OP_Bool are defined below with _define_ops.
+    # Notice that floats don't support shifts (`2.0 << 1` fails), so no shift operation is
+    # defined
     _to_floats_ops = set(['add', 'sub', 'mul', 'radd', 'rsub', 'rmul'])
     _to_bools_ops = set(['eq', 'ne', 'lt', 'le', 'gt', 'ge'])
     _to_floats_div_ops = set(['truediv', 'floordiv', 'mod', 'rtruediv', 'rfloordiv', 'rmod'])
-    _to_any_shift_ops = set(['rshift', 'lshift', 'rrshift', 'rlshift'])
-
-    def __getattribute__(self, name: str) -> Any:
-        # Checking if name is 'op_OP' (eg, 'op_add')
-        op = extract_op.match(name)
-        if op and (
-                op[3] is None or  # Allowing op_add
-                op[3] in ('Int', 'Bool')  # Allowing op_add_Int
-        ):
-            if op[1] in self._to_floats_ops:
-                return partial(Float.__operate_to_floats, self, op[1])
-            if op[1] in self._to_bools_ops:
-                return partial(Float.__operate_to_bools, self, op[1])
-            if op[1] in self._to_floats_div_ops:
-                return partial(Float.__operate_to_floats_div, self, op[1])
-            if op[1] in self._to_any_shift_ops:
-                return partial(Float.__operate_to_any, self, op[1])
-
-        return object.__getattribute__(self, name)
-
-    def __operate_to_floats(
-            self,
-            op: str,
-            other: 'Union[Float, Int]',
-            pos: Optional[Pos]
-    ) -> 'Float':
-        if self.val is None or other.val is None:
-            return Float.top()
-
-        new_val = getattr(float, f'__{op}__')(self.val, other.val)
-        return Float(new_val)
-
-    def __operate_to_bools(
-            self,
-            op: str,
-            other: 'Union[Float, Int]',
-            pos: Optional[Pos]
-    ) -> 'Bool':
-        if self.val is None or other.val is None:
-            return Bool.top()
-
-        new_val = getattr(float, f'__{op}__')(self.val, other.val)
-        return Bool(new_val)
-
-    def __operate_to_floats_div(
-            self,
-            op: str,
-            other: 'Union[Float, Int]',
-            pos: Optional[Pos]
-    ) -> 'Float':
-        if self.val is None or other.val is None:
-            return Float.top()
-
-        try:
-            new_val = getattr(float, f'__{op}__')(self.val, other.val)
-        except ZeroDivisionError as msg:
-            TypeCheckLogger().new_warning(
-                "E001", f"ZeroDivisionError: {msg}", pos)
-            return Float.top()
-
-        return Float(new_val)
-
-    def __operate_to_any(
-            self,
-            op: str,
-            other: 'Union[Float, Int]',
-            pos: Optional[Pos]
-    ) -> 'Union[Float, Int, None]':
-        if self.val is None or other.val is None:
-            return None
-
-        try:
-            new_val = getattr(float, f'__{op}__')(self.val, other.val)
-        except ZeroDivisionError as msg:
-            new_val = None
-            TypeCheckLogger().new_warning("E001", "ZeroDivisionError: " + str(msg), pos)
-        except OverflowError as msg:
-            new_val = None
-            TypeCheckLogger().new_warning("E003", "OverflowError: " + str(msg), pos)
-
-        if isinstance(new_val, int):
-            return Int(new_val)
-        if isinstance(new_val, float):
-            return Float(new_val)
-        if new_val is not None:
-            TypeCheckLogger().new_warning(
-                "W001",
-                "Weird return value: I expected an int or float from operating {} with "
-                "{} but got a {} instead".format(self.val, other.val, type(new_val)),
-                pos)
-
-        return None
 
     def op_bool(self, pos: Optional[Pos]) -> 'Bool':
-        if self.is_top():
-            return Bool.top()
-        else:
-            return Bool(bool(self.val))
+        return _bounds_to_bool(self)
 
 
 class Bool(AbstractValue):
@@ -321,6 +243,8 @@ class Bool(AbstractValue):
             \   /
             Bottom  <  this isn't implemented
     """
+    __slots__ = ('val',)
+
     def __init__(self, val: Optional[bool] = None) -> None:
         """
         If val is None, then the Bool value is Top
@@ -330,6 +254,11 @@ class Bool(AbstractValue):
     def __repr__(self) -> str:
         return f"Bool({self.val})"
 
+    @property
+    def bounds(self) -> 'Optional[Tuple[float, float]]':
+        """A Bool behaves like an Int in an interval between 0 and 1"""
+        return None if self.val is not None else (0, 1)
+
     __top = None  # type: Bool
 
     @classmethod
@@ -343,7 +272,7 @@ class Bool(AbstractValue):
         return self.val is None
 
     def join(self, other: 'Bool') -> 'Bool':
-        if self.val is other.val:
+        if self.val is None or self.val is other.val:
             return self
         return Bool()
 
@@ -365,7 +294,8 @@ class Bool(AbstractValue):
             return True
         return self.val == other.val
 
-    __getattribute__ = Int.__getattribute__
+    # The same operations defined for Int (op_add, op_add_Int, ...) are defined for Bool
+    # with _define_ops below
 
     def op_bool(self, pos: Optional[Pos]) -> 'Bool':
         return self
@@ -374,6 +304,8 @@ class Bool(AbstractValue):
 class NoneType(AbstractValue):
     "None Abstract Domain. It's composed of a single Value: None"
 
+    __slots__ = ()
+
     __instance = None  # type: NoneType
 
     def __new__(cls) -> 'NoneType':
@@ -409,26 +341,308 @@ class NoneType(AbstractValue):
             return True
         return False
 
-    def __getattribute__(self, name: str) -> Any:
-        # Checking if name is 'op_OP' (eg, 'op_add')
+    def __getattr__(self, name: str) -> Any:
+        # Only called if the attribute wasn't found, ie, for op_ne_TYPE where TYPE is any
+        # type (op_ne, op_eq_Int, op_eq_Bool and op_eq_Float are defined below)
         op = extract_op.match(name)
+        if op and op[1] == 'ne':  # None.ne(None) => False
+            return self.op_ne
+        raise AttributeError(f"'NoneType' object has no attribute '{name}'")
 
-        if op and (
-                op[1] == 'ne' or  # None.ne(None) => False
-                (op[1] == 'eq' and op[3] in ('Int', 'Bool', 'Float'))  # None.ne(5) => False
-        ):
-            return partial(NoneType.__operate_ret_false, self)
-
-        return object.__getattribute__(self, name)
-
-    # def op_eq(self, other: 'NoneType', pos: Optional[Pos]) -> 'Bool':  # type: ignore
-    #     return Bool(True)
-
-    def __operate_ret_false(
-            self,
-            other: AbstractValue,
-            pos: Optional[Pos]) -> Bool:
+    def op_ne(self, other: AbstractValue, pos: Optional[Pos]) -> 'Bool':
         return Bool(False)
 
+    # None.eq(5) => False
+    op_eq_Int = op_eq_Bool = op_eq_Float = op_ne
+
     def op_bool(self, pos: Optional[Pos]) -> 'Bool':
         return Bool(False)
+
+
+# Numbers represented by intervals
+N = TypeVar('N', Int, Float)
+
+
+def _isnan(x: float) -> bool:
+    # ints may be too large to be converted into floats (isnan fails on them)
+    return isinstance(x, float) and isnan(x)
+
+
+def _get_bounds(val: 'Union[Int, Float, Bool]') -> 'Tuple[float, float]':
+    """Returns the interval of numbers the value may take"""
+    if val.val is not None:
+        if _isnan(val.val):
+            return (-inf, inf)
+        return (val.val, val.val)
+    return val.bounds or (-inf, inf)
+
+
+def _join_bounds(
+        left: N,
+        right: N,
+        from_bounds: 'Callable[[float, float], N]'
+) -> N:
+    (lower1, upper1), (lower2, upper2) = _get_bounds(left), _get_bounds(right)
+    if lower1 <= lower2 and upper2 <= upper1:
+        return left
+    return from_bounds(min(lower1, lower2), max(upper1, upper2))
+
+
+def _widen_bounds(
+        old: N,
+        new: N,
+        from_bounds: 'Callable[[float, float], N]'
+) -> 'Tuple[N, bool]':
+    if not _intervals():
+        joined = old.join(new)
+        return joined, joined == old
+
+    (lower1, upper1), (lower2, upper2) = _get_bounds(old), _get_bounds(new)
+    lower = lower1 if lower1 <= lower2 else -inf
+    upper = upper1 if upper2 <= upper1 else inf
+    if (lower, upper) == (lower1, upper1):
+        return old, True
+    return from_bounds(lower, upper), False
+
+
+def _narrow_bounds(
+        old: N,
+        new: N,
+        from_bounds: 'Callable[[float, float], N]'
+) -> 'Tuple[N, bool]':
+    (lower1, upper1), (lower2, upper2) = _get_bounds(old), _get_bounds(new)
+    lower = lower2 if lower1 == -inf else lower1
+    upper = upper2 if upper1 == inf else upper1
+    if (lower, upper) == (lower1, upper1) or lower > upper:
+        return old, True
+    return from_bounds(lower, upper), False
+
+
+def _bounds_to_bool(val: 'Union[Int, Float]') -> Bool:
+    if val.val is not None:
+        return Bool(bool(val.val))
+    lower, upper = _get_bounds(val)
+    if lower > 0 or upper < 0:
+        return Bool(True)
+    return Bool.top()
+
+
+def _mul_bounds(left: 'Tuple[float, float]', right: 'Tuple[float, float]') -> 'Tuple[float, float]':
+    # 0 * inf is nan (a float may be inf), the nan bound turns the result into Top
+    products = [a*b for a in left for b in right]
+    if any(_isnan(p) for p in products):
+        return nan, nan
+    return min(products), max(products)
+
+
+def _int_mul_bounds(
+        left: 'Tuple[float, float]',
+        right: 'Tuple[float, float]'
+) -> 'Tuple[float, float]':
+    # 0 * inf is nan, but the bound can't be bigger than 0 (inf is never a value of Int)
+    products = [a*b if a and b else 0 for a in left for b in right]
+    return min(products), max(products)
+
+
+def _lt_bounds(left: 'Tuple[float, float]', right: 'Tuple[float, float]') -> Optional[bool]:
+    if left[1] < right[0]:
+        return True
+    if left[0] >= right[1]:
+        return False
+    return None
+
+
+def _le_bounds(left: 'Tuple[float, float]', right: 'Tuple[float, float]') -> Optional[bool]:
+    if left[1] <= right[0]:
+        return True
+    if left[0] > right[1]:
+        return False
+    return None
+
+
+def _ne_bounds(left: 'Tuple[float, float]', right: 'Tuple[float, float]') -> Optional[bool]:
+    if left[1] < right[0] or right[1] < left[0]:
+        return True
+    return None
+
+
+# Operations on intervals, an operation returns the interval of all the results of
+# operating any number in `left` with any number in `right`. Comparisons return None if
+# the result may be either True or False
+bounds_ops = {
+    'add': lambda left, right: (left[0]+right[0], left[1]+right[1]),
+    'sub': lambda left, right: (left[0]-right[1], left[1]-right[0]),
+    'mul': _mul_bounds,
+    'lt': _lt_bounds,
+    'le': _le_bounds,
+    'gt': lambda left, right: _lt_bounds(right, left),
+    'ge': lambda left, right: _le_bounds(right, left),
+    'ne': _ne_bounds,
+    'eq': lambda left, right: False if _ne_bounds(left, right) else None,
+}  # type: Dict[str, Callable[[Tuple[float, float], Tuple[float, float]], Any]]
+
+# The same operations when both operands are Ints (or Bools)
+int_bounds_ops = dict(bounds_ops, mul=_int_mul_bounds)
+
+
+def _bounds_op(
+        py_op: 'Callable[[Any, Any], Any]',
+        ops: 'Dict[str, Callable[[Tuple[float, float], Tuple[float, float]], Any]]' = bounds_ops
+) -> 'Callable[[Any, Any], Any]':
+    """Returns the operation on intervals equivalent to `py_op` (eg, `int.__radd__`)"""
+    name = py_op.__name__[2:-2]
+    if name in ops:
+        return ops[name]
+    # reversed operation, eg, radd
+    op = ops[name[1:]]
+    return lambda left, right: op(right, left)
+
+
+def _define_ops(
+        cls: type,
+        ops: Iterable[str],
+        make_op: 'Callable[[Callable[[Any, Any], Any]], Callable[..., Any]]',
+        py_type: type,
+        suffixes: Iterable[str] = ('', '_Int', '_Bool')
+) -> None:
+    """Defines the methods op_OP+SUFFIX (eg, op_add, op_add_Int and op_add_Bool) in `cls`
+    for each operation in `ops`.
+
+    `make_op` creates the method from the python operation, eg, `int.__add__`. Operations
+    not supported by `py_type` are skipped"""
+    for op in ops:
+        py_op = getattr(py_type, f'__{op}__', None)
+        if py_op is None:
+            continue
+        method = make_op(py_op)
+        method.__name__ = f'op_{op}'
+        method.__qualname__ = f'{cls.__name__}.op_{op}'
+        for suffix in suffixes:
+            setattr(cls, f'op_{op}{suffix}', method)
+    clear_ops_cache()
+
+
+def _int_to_int(py_op: 'Callable[[int, int], int]') -> 'Callable[..., Int]':
+    bounds_op = _bounds_op(py_op, int_bounds_ops)
+
+    def op(self: Int, other: Int, pos: Optional[Pos]) -> Int:
+        if self.val is None or other.val is None:
+            if _intervals():
+                try:
+                    return Int.from_bounds(*bounds_op(_get_bounds(self), _get_bounds(other)))
+                except OverflowError:  # an int too large for a float operated with inf
+                    return Int.top()
+            return Int.top()
+
+        return Int(py_op(self.val, other.val))
+    return op
+
+
+def _int_to_bool(py_op: 'Callable[[int, int], bool]') -> 'Callable[..., Bool]':
+    bounds_op = _bounds_op(py_op, int_bounds_ops)
+
+    def op(self: Int, other: Int, pos: Optional[Pos]) -> Bool:
+        if self.val is None or other.val is None:
+            if _intervals():
+                return Bool(bounds_op(_get_bounds(self), _get_bounds(other)))
+            return Bool.top()
+
+        return Bool(py_op(self.val, other.val))
+    return op
+
+
+def _int_to_int_shift(py_op: 'Callable[[int, int], int]') -> 'Callable[..., Int]':
+    def op(self: Int, other: Int, pos: Optional[Pos]) -> Int:
+        if self.val is None or other.val is None:
+            return Int.top()
+
+        try:
+            new_val = py_op(self.val, other.val)
+        except ValueError as msg:
+            TypeCheckLogger().new_warning(
+                "E002", f"ValueError: {msg}", pos)
+            return Int.top()
+
+        return Int(new_val)
+    return op
+
+
+def _int_div(
+        py_op: 'Callable[[int, int], Union[int, float]]'
+) -> 'Callable[..., Union[Int, Float, None]]':
+    def op(self: Int, other: Int, pos: Optional[Pos]) -> 'Union[Int, Float, None]':
+        if self.val is None or other.val is None:
+            return None
+
+        try:
+            new_val = py_op(self.val, other.val)
+        except ZeroDivisionError as msg:
+            TypeCheckLogger().new_warning(
+                "E001", f"ZeroDivisionError: {msg}", pos)
+            return None
+
+        return Int(new_val) if isinstance(new_val, int) else Float(new_val)
+    return op
+
+
+for _cls in [Int, Bool]:
+    _define_ops(_cls, Int._int_to_int_ops, _int_to_int, int)
+    _define_ops(_cls, Int._int_to_bool_ops, _int_to_bool, int)
+    _define_ops(_cls, Int._int_to_int_ops_shift, _int_to_int_shift, int)
+    _define_ops(_cls, Int._int_to_int_ops_div, _int_div, int)
+
+
+def _to_floats(
+        py_op: 'Callable[[float, Union[float, int]], float]'
+) -> 'Callable[..., Float]':
+    bounds_op = _bounds_op(py_op)
+
+    def op(self: Float, other: 'Union[Float, Int]', pos: Optional[Pos]) -> Float:
+        if self.val is None or other.val is None:
+            if _intervals():
+                try:
+                    return Float.from_bounds(*bounds_op(_get_bounds(self), _get_bounds(other)))
+                except OverflowError:  # an int too large for a float operated with inf
+                    return Float.top()
+            return Float.top()
+
+        return Float(py_op(self.val, other.val))
+    return op
+
+
+def _to_bools(
+        py_op: 'Callable[[float, Union[float, int]], bool]'
+) -> 'Callable[..., Bool]':
+    bounds_op = _bounds_op(py_op)
+
+    def op(self: Float, other: 'Union[Float, Int]', pos: Optional[Pos]) -> Bool:
+        if self.val is None or other.val is None:
+            if _intervals():
+                return Bool(bounds_op(_get_bounds(self), _get_bounds(other)))
+            return Bool.top()
+
+        return Bool(py_op(self.val, other.val))
+    return op
+
+
+def _to_floats_div(
+        py_op: 'Callable[[float, Union[float, int]], float]'
+) -> 'Callable[..., Float]':
+    def op(self: Float, other: 'Union[Float, Int]', pos: Optional[Pos]) -> Float:
+        if self.val is None or other.val is None:
+            return Float.top()
+
+        try:
+            new_val = py_op(self.val, other.val)
+        except ZeroDivisionError as msg:
+            TypeCheckLogger().new_warning(
+                "E001", f"ZeroDivisionError: {msg}", pos)
+            return Float.top()
+
+        return Float(new_val)
+    return op
+
+
+_define_ops(Float, Float._to_floats_ops, _to_floats, float)
+_define_ops(Float, Float._to_bools_ops, _to_bools, float)
+_define_ops(Float, Float._to_floats_div_ops, _to_floats_div, float)
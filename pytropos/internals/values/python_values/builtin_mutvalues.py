@@ -1,4 +1,5 @@
 from math import isinf
+from operator import itemgetter
 from typing import Optional, Any, TYPE_CHECKING
 
 from .python_values import (
@@ -11,14 +12,45 @@ from ..abstract_value import AbstractValue
 from ...errors import TypeCheckLogger
 
 from ...miscelaneous import Pos
+from ...context import analysis_context
 
 if TYPE_CHECKING:
-    from typing import List as List_, Dict, Tuple as Tuple_, Set  # noqa: F401
+    from typing import List as List_, Dict, Tuple as Tuple_, Set, Iterable  # noqa: F401
     from .python_values import AttrsContainer  # noqa: F401
 
 __all__ = ['List', 'Tuple']
 
 
+# Sizes a list or tuple can take when widened (besides infinity)
+SIZE_THRESHOLDS = (0, 1, 2, 3, 4, 8, 16)
+
+# Key of the children of a summarised list or tuple holding the join of its elements
+SUMMARY = ('summary', None)
+
+
+def _is_homogeneous(lst: 'List_[PythonValue]') -> bool:
+    """Checks whether all values are immutable and of the same type"""
+    first = type(lst[0].val)
+    if not issubclass(first, AbstractValue) or issubclass(first, AbstractMutVal):
+        return False
+    return all(type(v.val) is first for v in lst)
+
+
+def widen_size(
+        old: 'Tuple_[int, float]',
+        new: 'Tuple_[int, float]'
+) -> 'Tuple_[int, float]':
+    """Widens the range of sizes `old` with `new`. The bounds that change jump to the next
+    threshold (see SIZE_THRESHOLDS), so a list that grows in a loop only takes a couple
+    of iterations to reach a fix point"""
+    lower, upper = new
+    if lower < old[0]:
+        lower = max(t for t in SIZE_THRESHOLDS if t <= lower)
+    if upper > old[1]:
+        upper = next((t for t in SIZE_THRESHOLDS if t >= upper), float('inf'))
+    return lower, upper
+
+
 class TupleOrList(AbstractMutVal):
     def __init__(self,
                  lst: 'Optional[List_[PythonValue]]' = None,
@@ -29,11 +61,17 @@ class TupleOrList(AbstractMutVal):
 
         if lst is not None:
             assert children is None, "Cannot initialise TupleOrList with both a list and children"
-            # Copying list to children values
-            for i, val in enumerate(lst):
-                self.children[('index', i)] = val
-
             n = len(lst)
+            # Large lists are summarised (see `AnalysisOptions.summary_threshold`)
+            summary_threshold = analysis_context().options.summary_threshold
+            if summary_threshold is not None and n > summary_threshold \
+                    and _is_homogeneous(lst):
+                self.children[SUMMARY] = _join_all(lst)
+            else:
+                # Copying list to children values
+                for i, val in enumerate(lst):
+                    self.children[('index', i)] = val
+
             if size is None:
                 self.size = (n, n)  # type: Tuple_[int, float]
             else:
@@ -56,13 +94,11 @@ class TupleOrList(AbstractMutVal):
 
     def _elems(self) -> 'List_[str]':
         """Returns the representation of the internal elements of the list or tuple"""
-        indices: 'List_[Tuple_[int, PythonValue]]'
-        indices = sorted([
-            (i[1], v)
-            for i, v in self.children.items()
-            if isinstance(i, tuple) and i[0] == 'index'
-        ])
-        # print(f"indices = {indices}")
+        summary = self.summary
+        if summary is not None:
+            return [repr(summary), '...'] if self.size[1] > 1 else [repr(summary)]
+
+        indices = self.sorted_indices()
 
         output = []  # type: List_[str]
         i = j = 0
@@ -103,10 +139,76 @@ class TupleOrList(AbstractMutVal):
                  mut_heap: 'Dict[Tuple_[str, int], Tuple_[int, int, PythonValue]]',
                  ) -> 'Any':
         assert type(self) is type(other)
-        new = super().join_mut(other, mut_heap)
+        if self.summary is not None or other.summary is not None:
+            summaries = [self._summarise(mut_heap, 'left'), other._summarise(mut_heap, 'right')]
+            summary = _join_all(s for s in summaries if s is not None)
+            new = type(self)(children={SUMMARY: summary})
+        else:
+            new = super().join_mut(other, mut_heap)
         new.size = (min(self.size[0], other.size[0]), max(self.size[1], other.size[1]))
         return new
 
+    @property
+    def summary(self) -> 'Optional[PythonValue]':
+        """The join of all elements if the list or tuple is summarised, None otherwise"""
+        return self.children.get(SUMMARY)
+
+    def _summarise(
+            self,
+            mut_heap: 'Dict[Tuple_[str, int], Tuple_[int, int, PythonValue]]',
+            side: str
+    ) -> 'Optional[PythonValue]':
+        """Returns the join of all elements (None if there are no elements). Mutable
+        elements (which are forgotten) are made top, as in `join_mut`"""
+        summary = self.summary
+        if summary is not None:
+            return summary
+
+        indices = self.sorted_indices()
+        if len(indices) < self.size[1]:
+            return PythonValue.top()
+        for _, val in indices:
+            if val.is_mut():
+                val.new_vals_to_top(mut_heap, side)
+                return PythonValue.top()
+        return _join_all(v for _, v in indices) if indices else None
+
+    def add_to_summary(self, val: 'PythonValue') -> None:
+        """Joins a new element to the summary of the list or tuple"""
+        summary = self.summary
+        assert summary is not None
+        if val.is_mut():
+            val = PythonValue.top()
+        self.own_children()[SUMMARY] = summary.join(val)
+
+    def widen_joined(self, old: 'Any') -> None:
+        super().widen_joined(old)
+        if not old.is_top():
+            self.size = widen_size(old.size, self.size)
+
+    def narrow_mut(self,
+                   other: 'Any',
+                   visited: 'Set[Tuple_[int, int]]'
+                   ) -> 'bool':
+        if (self.mut_id, other.mut_id) in visited:
+            return True
+        fix = super().narrow_mut(other, visited)
+        if self.is_top() or other.is_top():
+            return fix
+
+        # Only the bounds that can't be refined otherwise (0 and infinity) are narrowed
+        lower, upper = self.size
+        if lower == 0 and other.size[0] > 0:
+            lower = other.size[0]
+        if isinf(upper) and not isinf(other.size[1]):
+            upper = other.size[1]
+
+        if (lower, upper) != self.size and lower <= upper:
+            self.size = (lower, upper)
+            self.modified()
+            fix = False
+        return fix
+
     def convert_into_top(self, converted: 'Set[int]') -> None:
         super().convert_into_top(converted)  # clears children too
         if hasattr(self, 'size'):
@@ -127,7 +229,8 @@ class TupleOrList(AbstractMutVal):
           should invalid the list
 
         otherwise a number in the range [0, len(array)]"""
-        if ival.is_top():
+        # Top or an interval of ints
+        if ival.val is None:
             return -2
 
         index = ival.val
@@ -154,17 +257,19 @@ class TupleOrList(AbstractMutVal):
         return index
 
     def sorted_indices(self) -> 'List_[Tuple_[int, PythonValue]]':
-        return sorted([
-            (i[1], v)
-            for i, v in self.children.items()
-            if isinstance(i, tuple) and i[0] == 'index'
-        ])
+        """Returns the known elements (and their indices) of the list or tuple in order.
+
+        Elements are (almost always) stored in order (see `AbstractMutVal.join_mut`), so
+        sorting them takes linear time"""
+        indices = [(k[1], v) for k, v in self.children.items() if k[0] == 'index']
+        indices.sort(key=itemgetter(0))
+        return indices
 
     def sorted_indices_ints(self) -> 'List_[Int]':
         assert self.is_size_determined()
         lst = [Int.top()]*self.size[0]
         for i, v in self.children.items():
-            if isinstance(i, tuple) and i[0] == 'index':
+            if i[0] == 'index':
                 assert isinstance(v.val, Int)
                 lst[i[1]] = v.val
         return lst
@@ -222,7 +327,7 @@ class List(TupleOrList):
         else:
             return AttrsMutContainer(
                 'list',
-                self.children,
+                self,
                 {'append':
                  lambda: PythonValue(BuiltinFun(
                      'append',
@@ -239,10 +344,14 @@ class List(TupleOrList):
         return SubscriptsTupleOrListContainer(self, read_only=False, pos=pos)
 
     def _method_append(self, val: 'PythonValue', pos: Optional[Pos]) -> 'PythonValue':
-        if self.size[0] == self.size[1]:
+        self.modified()
+        if self.summary is not None:
+            self.size = (self.size[0]+1, self.size[1]+1)
+            self.add_to_summary(val)
+        elif self.size[0] == self.size[1]:
             s = self.size[0]
             self.size = (s+1, s+1)
-            self.children[('index', s)] = val
+            self.own_children()[('index', s)] = val
         else:
             self.size = (self.size[0]+1, self.size[1]+1)
 
@@ -286,7 +395,7 @@ class Tuple(TupleOrList):
     def get_attrs(self) -> 'AttrsContainer':
         if self.is_top():
             return AttrsTopContainer()
-        return AttrsMutContainer('Tuple', self.children, read_only=True)
+        return AttrsMutContainer('Tuple', self, read_only=True)
 
     def get_subscripts(self, pos: 'Optional[Pos]') -> SubscriptsContainer:
         if self.is_top():
@@ -295,7 +404,7 @@ class Tuple(TupleOrList):
 
     @staticmethod
     def fromList(lst: List) -> 'Tuple':
-        new_children = {k: v for k, v in lst.children.items() if k[0] == 'index'}
+        new_children = {k: v for k, v in lst.children.items() if k[0] != 'attr'}
         new_tuple = Tuple(children=new_children)
         new_tuple.size = lst.size
         return new_tuple
@@ -328,7 +437,9 @@ class SubscriptsTupleOrListContainer(SubscriptsContainer):
 
         # It's an integer but we don't know which
         index = self.torl.check_index(key.val, self.pos)
-        if index >= 0 and ('index', index) in self.torl.children:
+        if index >= 0 and self.torl.summary is not None:
+            return self.torl.summary
+        elif index >= 0 and ('index', index) in self.torl.children:
             return self.torl.children['index', index]
         else:
             return PythonValue.top()
@@ -363,19 +474,20 @@ class SubscriptsTupleOrListContainer(SubscriptsContainer):
         if index == -2:
             self.torl.convert_into_top(set())
         elif index >= 0:
-            if ('index', index) in self.torl.children:
-                del self.torl.children['index', index]
+            self.torl.modified()
+            children = self.torl.own_children()
 
             s1, s2 = self.torl.size
             self.torl.size = max(0, s1-1), max(0, s2-1)
+            if self.torl.summary is not None:
+                return
 
-            children = self.torl.children
-            for i, v in children.copy().items():
-                if isinstance(i, tuple) \
-                        and i[0] == 'index' \
-                        and i[1] >= index:
-                    del children[i]
-                    children['index', i[1]-1] = v
+            # Shifting the elements after index (in order, so none is overwritten)
+            for i, v in self.torl.sorted_indices():
+                if i >= index:
+                    del children['index', i]
+                    if i > index:
+                        children['index', i-1] = v
 
     def __setitem__(self, key: PythonValue, val: PythonValue) -> None:
         if self.read_only:
@@ -401,6 +513,19 @@ class SubscriptsTupleOrListContainer(SubscriptsContainer):
         # It's an integer but we don't know which
         index = self.torl.check_index(key.val, self.pos)
         if index >= 0:
-            self.torl.children['index', index] = val
+            self.torl.modified()
+            if self.torl.summary is not None:
+                self.torl.add_to_summary(val)
+            else:
+                self.torl.own_children()['index', index] = val
         elif index == -2:
             self.torl.convert_into_top(set())
+
+
+def _join_all(vals: 'Iterable[PythonValue]') -> PythonValue:
+    """Joins all (immutable) values, there must be at least one"""
+    it = iter(vals)
+    joined = next(it)
+    for val in it:
+        joined = joined.join(val)
+    return joined
@@ -1,13 +1,12 @@
+from itertools import count
+
 __all__ = ['new_id']
 
-__current_id = 0
+# Ids are unique in the whole process (not only in an analysis), as some values are shared
+# by all analyses (eg, top values). Taking the next value of a count is thread-safe
+__ids = count()
 
 
 def new_id() -> int:
     """Returns a new id everytime it is called"""
-    global __current_id
-
-    toret = __current_id
-    __current_id += 1
-
-    return toret
+    return next(__ids)
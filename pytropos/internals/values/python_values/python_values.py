@@ -1,22 +1,43 @@
 from abc import ABC, abstractmethod
 from enum import Enum
-from functools import partial
 # from math import isinf
 from typing import Union, Optional, Any
-from typing import Callable, Tuple, Dict, List, Set, Type  # noqa: F401
+from typing import Callable, Iterable, Tuple, Dict, List, Set, Type  # noqa: F401
 
 from ..builtin_values import Bool, ops_symbols
-from ..abstract_value import AbstractValue
+from ..abstract_value import AbstractValue, ops_cache
 from ...abstract_domain import AbstractDomain
 from ...errors import TypeCheckLogger
+from ...context import analysis_context
+from ... import metrics
 from .objects_ids import new_id
 
-from ...miscelaneous import Pos
+from ...miscelaneous import Pos, walk
 
 
 __all__ = ['PythonValue', 'PT', 'AbstractMutVal', 'Args']
 
 
+# Copying (joining, ...) an object copies its children too. The children found while an
+# object is being copied are copied after it, instead of right away (recursively), thus
+# copying deep objects doesn't exceed the recursion limit (see `_defer`)
+def _defer(work: 'Callable[[], None]') -> None:
+    """Runs `work` right away, unless other work is being run. In that case, `work` is
+    run once the current work has finished (the work pending is kept in a stack, see
+    `AnalysisContext.deferred`)."""
+    ctx = analysis_context()
+    if ctx.deferred is not None:
+        ctx.deferred.append(work)
+        return
+
+    ctx.deferred = deferred = [work]
+    try:
+        while deferred:
+            deferred.pop()()
+    finally:
+        ctx.deferred = None
+
+
 class PT(Enum):
     """Python types supported in pytropos"""
     # Undefined = 0
@@ -26,6 +47,8 @@ class PT(Enum):
 
 
 class PythonValue(AbstractDomain):
+    __slots__ = ('val',)
+
     def __init__(self,
                  val: Union[AbstractValue, PT] = PT.Top
                  ) -> None:
@@ -45,6 +68,10 @@ class PythonValue(AbstractDomain):
         return self.val is PT.Top
 
     def join(self, other: 'PythonValue') -> 'PythonValue':
+        # eg, a variable that wasn't touched in any branch of an if
+        if self is other and not self.is_mut():
+            return self
+
         if self.val is PT.Top or other.val is PT.Top:
             return PythonValue.top()
 
@@ -52,7 +79,9 @@ class PythonValue(AbstractDomain):
         assert isinstance(other.val, AbstractValue)
 
         if type(self.val) is type(other.val):  # noqa: E721
-            return PythonValue(self.val.join(other.val))
+            new_val = self.val.join(other.val)
+            # No need to create a new PythonValue if nothing changed
+            return self if new_val is self.val else PythonValue(new_val)
         return PythonValue.top()
 
     def widen_op(self, other: 'PythonValue') -> 'Tuple[PythonValue, bool]':
@@ -80,8 +109,53 @@ class PythonValue(AbstractDomain):
             # TODO(helq): This is not how a widening operator is defined, actually we
             # compare with <= not == !!!
             fix = new_val == self.val
+        if new_val is self.val:
+            return self, fix
+        return PythonValue(new_val), fix
+
+    def narrow_op(self, other: 'PythonValue') -> 'Tuple[PythonValue, bool]':
+        """Refines self using other, a value smaller than self (eg, the value computed by
+        running once more the body of a loop after widening). Returns the new value and
+        True if nothing changed.
+
+        Mutable values are not narrowed here, see `narrow_mut`."""
+        if self is other or self.is_mut() or other.is_mut():
+            return self, True
+
+        # eg: PythonValue(PT.Top) and PythonValue(Int(5))
+        if self.val is PT.Top:
+            return other, other.val is PT.Top
+
+        if other.val is PT.Top or type(self.val) is not type(other.val):  # noqa: E721
+            return self, True
+
+        assert isinstance(self.val, AbstractValue)
+
+        # Narrowing is optional, a value can always stay the same
+        if not self.__op_in_abstractvalue_overwritten(self.val.narrow_op):
+            return self, True
+
+        new_val, fix = self.val.narrow_op(other.val)
+        if new_val is self.val:
+            return self, fix
         return PythonValue(new_val), fix
 
+    def narrow_mut(self,
+                   other: 'PythonValue',
+                   visited: 'Set[Tuple[int, int]]'
+                   ) -> 'bool':
+        """Narrows a mutable value in place using other (see `narrow_op`). Returns True if
+        nothing changed.
+
+        `visited` contains the pairs of objects (mut_ids) already narrowed"""
+        assert isinstance(self.val, AbstractMutVal)
+        assert isinstance(other.val, AbstractMutVal)
+
+        if type(self.val) is not type(other.val):  # noqa: E721
+            return True
+
+        return self.val.narrow_mut(other.val, visited)
+
     def is_mut(self) -> 'bool':
         """Checks if the object is mutable"""
         return isinstance(self.val, AbstractMutVal)
@@ -95,23 +169,36 @@ class PythonValue(AbstractDomain):
     def copy_mut(self,
                  mut_heap: 'Dict[int, PythonValue]'
                  ) -> 'PythonValue':
-        """Copies a mutable object recursively"""
+        """Copies a mutable object and all objects reachable from it.
+
+        The object returned is InConstruction if it is a child of an object being copied
+        (it is copied after its parent, see `_defer`)"""
         assert isinstance(self.val, AbstractMutVal)
-        if self.is_top():
-            return self
+        val = self.val
 
-        if self.mut_id in mut_heap:
-            return mut_heap[self.mut_id]
-        else:
-            new_obj = mut_heap[self.mut_id] = PythonValue(PT.InConstruction)
-            new_obj.val = self.val.copy_mut(mut_heap)
-            return new_obj
+        mut_id = val.mut_id
+        if mut_id in mut_heap:
+            return mut_heap[mut_id]
+
+        new_obj = mut_heap[mut_id] = PythonValue(PT.InConstruction)
+
+        def copy() -> None:
+            new_obj.val = val.copy_mut(mut_heap)
+
+        if metrics.enabled():
+            metrics.count('mut_values_copied')
+
+        _defer(copy)
+        return new_obj
 
     def convert_into_top(self, converted: 'Set[int]') -> None:
         """Makes the underlying AbstractMutVal Top"""
-        assert isinstance(self.val, AbstractMutVal)
-        self.val.convert_into_top(converted)
-        self.val = self.val.top()
+        def convert() -> None:
+            assert isinstance(self.val, AbstractMutVal)
+            self.val.convert_into_top(converted)
+            self.val = self.val.top()
+
+        _defer(convert)
 
     def new_vals_to_top(
             self,
@@ -129,16 +216,18 @@ class PythonValue(AbstractDomain):
         """Joining two mutable PythonValues"""
         assert isinstance(self.val, AbstractMutVal)
         assert isinstance(other.val, AbstractMutVal)
+        left_val, right_val = self.val, other.val
 
-        left_iden = ('left', self.mut_id)
-        right_iden = ('right', other.mut_id)
+        left_id, right_id = left_val.mut_id, right_val.mut_id
+        left_iden = ('left', left_id)
+        right_iden = ('right', right_id)
 
         # Checking if we have encounter already this value
         if (left_iden in mut_heap) or (right_iden in mut_heap):
             # self and other have already been joined
-            if (left_iden in mut_heap) and mut_heap[left_iden][1] == other.mut_id:
+            if (left_iden in mut_heap) and mut_heap[left_iden][1] == right_id:
                 # assert right_iden in mut_heap
-                assert mut_heap[right_iden][0] == self.mut_id
+                assert mut_heap[right_iden][0] == left_id
                 assert mut_heap[right_iden][2] is mut_heap[left_iden][2]
                 return mut_heap[left_iden][2]
 
@@ -148,30 +237,32 @@ class PythonValue(AbstractDomain):
                 other.new_vals_to_top(mut_heap, 'right')
                 return PythonValue.top()
 
-        if type(self.val) is not type(other.val):  # noqa: E721
+        if type(left_val) is not type(right_val):  # noqa: E721
             self.new_vals_to_top(mut_heap, 'left')
             other.new_vals_to_top(mut_heap, 'right')
             return PythonValue.top()
 
         # If the value is top the result its top
-        if self.val.is_top():
+        if left_val.is_top():
             other.new_vals_to_top(mut_heap, 'right')
-            return PythonValue(self.val.top())
-        if other.val.is_top():
+            return PythonValue(left_val.top())
+        if right_val.is_top():
             self.new_vals_to_top(mut_heap, 'right')
-            return PythonValue(self.val.top())
+            return PythonValue(left_val.top())
 
         new_obj = PythonValue(PT.InConstruction)
-        mut_heap[left_iden] = mut_heap[right_iden] = \
-            (self.mut_id, other.mut_id, new_obj)
-
-        new_val = self.val.join_mut(other.val, mut_heap)
-        if new_obj.val == PT.InConstruction:
-            new_obj.val = new_val
-        # Notice that we don't change the value of the Object if it is not InConstruction.
-        # If a PythonValue is not anymore in construction it means that it has been made
-        # "top" by some call before it
-
+        mut_heap[left_iden] = mut_heap[right_iden] = (left_id, right_id, new_obj)
+
+        def join() -> None:
+            new_val = left_val.join_mut(right_val, mut_heap)
+            if new_obj.val is PT.InConstruction:
+                new_obj.val = new_val
+            # Notice that we don't change the value of the Object if it is not
+            # InConstruction. If a PythonValue is not anymore in construction it means
+            # that it has been made "top" by some call before it
+
+        # The children of self and other are joined once join_mut returns (see `_defer`)
+        _defer(join)
         return new_obj
 
     # TODO(helq): This equality function is faulty (because of the underlying mutable
@@ -184,8 +275,6 @@ class PythonValue(AbstractDomain):
             return False
         return self.val == other.val
 
-    __repr_visited = set()  # type: Set[int]
-
     def __repr__(self) -> str:
         if self.val is PT.Top:
             return "Top"
@@ -194,12 +283,13 @@ class PythonValue(AbstractDomain):
         else:  # self.type is PT.Top
             assert not isinstance(self.val, PT)
             if self.is_mut():
-                if self.mut_id in self.__repr_visited:
+                repr_visited = analysis_context().repr_visited
+                if self.mut_id in repr_visited:
                     return 'Ref'
                 else:
-                    self.__repr_visited.add(self.mut_id)
+                    repr_visited.add(self.mut_id)
                     r = self.val.abstract_repr
-                    self.__repr_visited.remove(self.mut_id)
+                    repr_visited.remove(self.mut_id)
                     return r
             else:
                 return self.val.abstract_repr
@@ -265,9 +355,8 @@ class PythonValue(AbstractDomain):
             return SubscriptsTopContainer()
 
     def __getattr__(self, name: str) -> Any:
-        # Checking if name is add, mul, truediv
-        if name in ops_symbols.keys():
-            return partial(self.operate, name)
+        # The operations (add, mul, truediv, ...) are defined below the class with
+        # _operation, this method only lets Mypy know that PythonValue has them
         raise AttributeError(f"PythonValue has no attribute called '{name}'")
 
     @staticmethod
@@ -277,53 +366,66 @@ class PythonValue(AbstractDomain):
             method.__qualname__.split('.')[0] == "AbstractValue"
         return not notoverwritten  # ie, True if method overwritten
 
-    def operate(self, op: str, other: 'PythonValue', pos: Optional[Pos] = None) -> 'PythonValue':
-        op_sym = ops_symbols[op]
-
-        if self.val is PT.Top or other.val is PT.Top:
-            return PythonValue.top()
-
-        # This assert is always true, it's just to keep Mypy from crying
-        assert isinstance(self.val, AbstractValue), \
-            f"Left type is {type(self.val)} but should have been an AbstractValue"
-        assert isinstance(other.val, AbstractValue), \
-            f"Left type is {type(other.val)} but should have been an AbstractValue"
+    @staticmethod
+    def __find_op(op: str, left: AbstractValue, right: AbstractValue
+                  ) -> 'Optional[Tuple[Any, bool]]':
+        """Finds the method that computes `left OP right`.
 
+        Returns the function (an unbound method) and whether it must be called with the
+        operands swapped, or None if the operation isn't supported."""
         # If both values have the same type use val.op_add(otherval)
-        if type(self.val) is type(other.val):  # noqa: E721
+        if type(left) is type(right):  # noqa: E721
             # Checking if op_add has been overwritten by the class that has been called
             # If it hasn't, the operation result is Top
-            op_method = getattr(self.val, f'op_{op}')
-            if self.__op_in_abstractvalue_overwritten(op_method):
-                newval = op_method(other.val, pos)
-            else:
-                TypeCheckLogger().new_warning(
-                    "E009",
-                    f"TypeError: unsupported operand type(s) for {op_sym}: "
-                    f"'{self.val.type_name}' and '{other.val.type_name}'",
-                    pos)
-
-                newval = PT.Top
+            method = getattr(left, f'op_{op}')
+            if not PythonValue.__op_in_abstractvalue_overwritten(method):
+                return None
+            swapped = False
 
         # If values have different type use val.op_add_OtherType(otherval)
-        # or otherval.op_add_Type(val)
+        # or otherval.op_radd_Type(val)
         else:
-            leftOpName = "op_r{op}_{class_name}".format(op=op, class_name=type(self.val).__name__)
-            rightOpName = "op_{op}_{class_name}".format(op=op, class_name=type(other.val).__name__)
+            method = getattr(left, f'op_{op}_{type(right).__name__}', None)
+            swapped = method is None
+            if swapped:
+                method = getattr(right, f'op_r{op}_{type(left).__name__}', None)
+                if method is None:
+                    return None
+
+        # The method is looked up in the object (it may be produced by __getattr__) but
+        # it is saved unbound, so it can be used with any other object of the same type
+        assert method.__self__ is (right if swapped else left), \
+            f"op methods must be regular methods, but {method!r} isn't"
+        return method.__func__, swapped
 
-            try:
-                newval = getattr(self.val, rightOpName)(other.val, pos)
-            except AttributeError:
-                try:
-                    newval = getattr(other.val, leftOpName)(self.val, pos)
-                except AttributeError:
-                    TypeCheckLogger().new_warning(
-                        "E009",
-                        f"TypeError: unsupported operand type(s) for {op_sym}: "
-                        f"'{self.val.type_name}' and '{other.val.type_name}'",
-                        pos)
-
-                    newval = PT.Top
+    def operate(self, op: str, other: 'PythonValue', pos: Optional[Pos] = None) -> 'PythonValue':
+        left, right = self.val, other.val
+        if left is PT.Top or right is PT.Top:
+            return PythonValue.top()
+
+        # This assert is always true, it's just to keep Mypy from crying
+        assert isinstance(left, AbstractValue), \
+            f"Left type is {type(left)} but should have been an AbstractValue"
+        assert isinstance(right, AbstractValue), \
+            f"Left type is {type(right)} but should have been an AbstractValue"
+
+        # The method to use depends only on the types of the operands
+        key = (op, type(left), type(right))
+        try:
+            found = ops_cache[key]
+        except KeyError:
+            found = ops_cache[key] = PythonValue.__find_op(op, left, right)
+
+        if found is None:
+            TypeCheckLogger().new_warning(
+                "E009",
+                f"TypeError: unsupported operand type(s) for {ops_symbols[op]}: "
+                f"'{left.type_name}' and '{right.type_name}'",
+                pos)
+            return PythonValue.top()
+
+        fun, swapped = found
+        newval = fun(right, left, pos) if swapped else fun(left, right, pos)
 
         if newval is None:
             return PythonValue.top()
@@ -397,38 +499,79 @@ class PythonValue(AbstractDomain):
         return bool(joining == other.val)
 
 
+def _operation(op: str) -> 'Callable[..., PythonValue]':
+    def operation(self: PythonValue, other: PythonValue, pos: Optional[Pos] = None
+                  ) -> PythonValue:
+        return self.operate(op, other, pos)
+    operation.__name__ = op
+    operation.__qualname__ = f'PythonValue.{op}'
+    return operation
+
+
+for _op in ops_symbols:
+    setattr(PythonValue, _op, _operation(_op))
+
+
 class AbstractMutVal(AbstractValue):
     """An AbstractValue that allows mutability"""
 
     def __init__(self, children: 'Optional[Dict[Any, PythonValue]]' = None) -> None:
         """Init must always be called
 
-        All attributes and values must be stored into `children`"""
+        All attributes and values must be stored into `children`. `children` may be shared
+        with copies of this object (copy-on-write), it must be modified through
+        `own_children`"""
         self.__mut_id = new_id()  # type: int
         self.children = {} if children is None else children
+        # If True, other objects may use the same `children` (none of them mutable)
+        self._children_shared = False
+        if metrics.enabled():
+            metrics.new_mut_value(self)
 
     @property
     def mut_id(self) -> 'int':
         """Unique id of object"""
         return self.__mut_id
 
-    __eq_visited = ({}, {})  # type: Tuple[Dict[int, int], Dict[int, int]]
+    def own_children(self) -> 'Dict[Any, PythonValue]':
+        """Returns the children of this object making sure no other object uses them, ie,
+        the children returned can be modified"""
+        if self._children_shared:
+            self.children = dict(self.children)
+            self._children_shared = False
+        return self.children
+
+    @staticmethod
+    def modified() -> None:
+        """Must be called every time a mutable value is modified in place (eg, one of its
+        children is replaced). Stores rely on it to skip comparing mutable values that
+        haven't changed"""
+        analysis_context().modifications += 1
+
+    @staticmethod
+    def modifications() -> int:
+        """Number of times a mutable value has been modified in place"""
+        return analysis_context().modifications
 
     def __eq__(self, other: Any) -> bool:
         if self is other:
             return True
         if not isinstance(other, AbstractMutVal):
             return False
-        if self.mut_id in AbstractMutVal.__eq_visited[0]:
-            return AbstractMutVal.__eq_visited[0][self.mut_id] == other.mut_id
-        if other.mut_id in AbstractMutVal.__eq_visited[1]:
-            return AbstractMutVal.__eq_visited[1][other.mut_id] == self.mut_id
+        left_visited, right_visited = analysis_context().eq_visited
+        if self.mut_id in left_visited:
+            return left_visited[self.mut_id] == other.mut_id
+        if other.mut_id in right_visited:
+            return right_visited[other.mut_id] == self.mut_id
+
+        if self.children is other.children:
+            return True
 
-        AbstractMutVal.__eq_visited[0][self.mut_id] = other.mut_id
-        AbstractMutVal.__eq_visited[1][other.mut_id] = self.mut_id
+        left_visited[self.mut_id] = other.mut_id
+        right_visited[other.mut_id] = self.mut_id
         eq = self.children == other.children
-        del AbstractMutVal.__eq_visited[0][self.mut_id]
-        del AbstractMutVal.__eq_visited[1][other.mut_id]
+        del left_visited[self.mut_id]
+        del right_visited[other.mut_id]
 
         return eq
 
@@ -438,13 +581,16 @@ class AbstractMutVal(AbstractValue):
             return
 
         converted.add(self.mut_id)
+        self.modified()
+        if metrics.enabled():
+            metrics.count('top_promotions')
 
-        children = self.children
-        for k, v in children.items():
+        for k, v in self.children.items():
             if v.is_mut():
                 assert isinstance(v.val, AbstractMutVal)
                 v.convert_into_top(converted)
-        children.clear()
+        self.children = {}
+        self._children_shared = False
 
     def new_vals_to_top(
             self,
@@ -452,29 +598,28 @@ class AbstractMutVal(AbstractValue):
             side: str
     ) -> None:
         """Makes all new children objects connected to this into Top"""
-        obj_iden = (side, self.mut_id)
-        val_children = self.children
-
-        self_topped = False
-        if obj_iden in mut_heap:
-            new_val = mut_heap[obj_iden][2]
-            if not new_val.is_top():
+        def to_top(val: 'AbstractMutVal') -> 'List[AbstractMutVal]':
+            obj_iden = (side, val.mut_id)
+            if obj_iden in mut_heap:
+                new_val = mut_heap[obj_iden][2]
+                if new_val.is_top():
+                    return []
                 new_val.val = PT.Top
-                self_topped = True
-        else:
-            mut_heap[obj_iden] = (self.mut_id, -1, PythonValue.top())
-            self_topped = True
+            else:
+                mut_heap[obj_iden] = (val.mut_id, -1, PythonValue.top())
+            if metrics.enabled():
+                metrics.count('top_promotions')
 
-        if self_topped:
-            children = dict(val_children)
-            for k, v in children.items():
-                if v.is_mut():
-                    assert isinstance(v.val, AbstractMutVal)
-                    v.val.new_vals_to_top(mut_heap, side)
+            return [v.val for v in val.children.values() if isinstance(v.val, AbstractMutVal)]
+
+        walk([self], to_top)
 
     def copy_mut(self, mut_heap: 'Dict[int, PythonValue]') -> 'Any':
         """Makes a copy of the current AbstractMutVal.
 
+        If no child is mutable, the copy shares the children with this object until any of
+        them is modified (see `own_children`).
+
         It must be overwritten to add stuff that is not children (PythonValue's)"""
         if self.is_top():
             return self
@@ -483,12 +628,20 @@ class AbstractMutVal(AbstractValue):
             and self.mut_id in mut_heap, \
             "copy_mut cannot be called with an empty mut_heap!"
 
-        children = dict(self.children)
-        for k, v in children.items():
-            if v.is_mut():
-                children[k] = v.copy_mut(mut_heap)
+        children = self.children
+        if not self._children_shared:
+            muts = [k for k, v in children.items() if v.is_mut()]
+            if muts:
+                children = dict(children)
+                for k in muts:
+                    children[k] = children[k].copy_mut(mut_heap)
+            else:
+                self._children_shared = True
+
         cls = type(self)
-        return cls(children=children)
+        new = cls(children=children)
+        new._children_shared = children is self.children
+        return new
 
     def join(self, other: 'Any') -> 'Any':
         """Join should never be called.
@@ -514,11 +667,22 @@ class AbstractMutVal(AbstractValue):
 
         left_children = self.children
         right_children = other.children
+        cls = type(self)
+
+        # Shared children are never mutable and joining a value with itself returns it
+        if left_children is right_children:
+            new = cls(children=left_children)
+            new._children_shared = self._children_shared = other._children_shared = True
+            return new
 
         new_children = {}  # Dict[Any, PythonValue]
 
+        # Keeping the order of the children (elements of lists are kept in order)
+        keys = list(left_children)
+        keys.extend(k for k in right_children if k not in left_children)
+
         # almost same code as found in store join
-        for k in set(left_children).union(right_children):
+        for k in keys:
             # The key is only in the left children
             if k not in right_children:
                 # handling the mutable case
@@ -558,13 +722,61 @@ class AbstractMutVal(AbstractValue):
                     else:  # both (val1 and val2) are not mutable
                         new_children[k] = val1.join(val2)
 
-        cls = type(self)
         return cls(children=new_children)
 
+    def widen_joined(self, old: 'Any') -> None:
+        """Turns this value, the result of joining `old` with another value (see
+        `join_mut`), into the result of widening them.
+
+        The non mutable children are widened, mutable children are widened on their own
+        (see `Store.widen_op`)"""
+        old_children = old.children
+        for k, val in list(self.children.items()):
+            old_val = old_children.get(k)
+            if old_val is not None and not old_val.is_mut() and not val.is_mut():
+                new_val, _ = old_val.widen_op(val)
+                if new_val is not val:
+                    self.own_children()[k] = new_val
+
+    def narrow_mut(self,
+                   other: 'Any',
+                   visited: 'Set[Tuple[int, int]]'
+                   ) -> 'bool':
+        """Narrows the children of this object using the children of other (see
+        `PythonValue.narrow_mut`). Returns True if nothing changed.
+
+        Children are only refined, never added nor removed. A Top child is only replaced
+        by a non mutable value, replacing it by a mutable value could break aliasing"""
+        if (self.mut_id, other.mut_id) in visited:
+            return True
+        visited.add((self.mut_id, other.mut_id))
+
+        if self.is_top() or other.is_top():
+            return True
+
+        fix = True
+        other_children = other.children
+        for k, val in list(self.children.items()):
+            if k not in other_children:
+                continue
+            other_val = other_children[k]
+
+            if val.is_mut() and other_val.is_mut():
+                fix = val.narrow_mut(other_val, visited) and fix
+            else:
+                new_val, _ = val.narrow_op(other_val)
+                if new_val is not val:
+                    self.own_children()[k] = new_val
+                    fix = False
+
+        if not fix:
+            self.modified()
+        return fix
+
     def get_attrs(self) -> 'AttrsContainer':
         if self.is_top():
             return AttrsTopContainer()
-        return AttrsMutContainer(self.type_name, self.children)
+        return AttrsMutContainer(self.type_name, self)
 
 
 class Args:
@@ -602,19 +814,19 @@ class AttrsMutContainer(AttrsContainer):
     Attributes:
 
     - type_name: The name of the object from which the attributes are being taken
-    - children: Dictionary with all the references to other PythonValues
+    - obj: The object whose children (references to other PythonValues) are accessed
     - non_mut_attrs: Dictionary with all python references that are created on the spot,
                      i.e., Not Methods!
     - read_only: Signals whether the attributes of the AbstractMutVal are writable"""
     def __init__(
             self,
             type_name: str,
-            children: 'Dict[Any, PythonValue]',
+            obj: 'AbstractMutVal',
             non_mut_attrs: 'Optional[Dict[Any, Callable[[], PythonValue]]]' = None,
             read_only: bool = False
     ) -> None:
         self.type_name = type_name
-        self.children = children
+        self.obj = obj
         self.read_only = read_only
         self.non_mut_attrs = {} if non_mut_attrs is None else non_mut_attrs
 
@@ -629,7 +841,7 @@ class AttrsMutContainer(AttrsContainer):
             return self.non_mut_attrs[key]()
 
         try:
-            return self.children[('attr', key)]
+            return self.obj.children[('attr', key)]
         except KeyError:
             TypeCheckLogger().new_warning(
                 "E011",
@@ -652,7 +864,8 @@ class AttrsMutContainer(AttrsContainer):
                 f"AttributeError: '{self.type_name}' object attribute '{key}' is read-only",
                 src_pos)
         else:
-            self.children[('attr', key)] = val
+            self.obj.own_children()[('attr', key)] = val
+            AbstractMutVal.modified()
 
     def __delitem__(self, key_: 'Union[str, Tuple[str, Pos]]') -> None:
         if not isinstance(key_, tuple):
@@ -668,7 +881,8 @@ class AttrsMutContainer(AttrsContainer):
                 src_pos)
         else:
             try:
-                del self.children[('attr', key)]
+                del self.obj.own_children()[('attr', key)]
+                AbstractMutVal.modified()
             except KeyError:
                 TypeCheckLogger().new_warning("E013", f"AttributeError: '{key}'", src_pos)
 
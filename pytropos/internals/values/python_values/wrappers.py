@@ -214,7 +214,7 @@ class BuiltinFun(AbstractMutVal):
     def get_attrs(self) -> 'AttrsContainer':
         if self.is_top():
             return AttrsTopContainer()
-        return AttrsMutContainer('builtin_function_or_method', self.children, read_only=True)
+        return AttrsMutContainer('builtin_function_or_method', self, read_only=True)
 
     def join_mut(self,
                  other: 'BuiltinFun',
@@ -364,7 +364,7 @@ class BuiltinClass(AbstractMutVal):
     def get_attrs(self) -> 'AttrsContainer':
         if self.is_top():
             return AttrsTopContainer()
-        return AttrsMutContainer('builtin class', self.children, read_only=True)
+        return AttrsMutContainer('builtin class', self, read_only=True)
 
     def fun_call(self, store: Any, args: 'Args', pos: Optional[Pos]) -> PythonValue:
         if self.is_top():
@@ -127,7 +127,7 @@ class SubscriptsNdArrayAnnContainer(SubscriptsContainer):
             shape = absval.copy_mut({absval.mut_id: PythonValue(PT.InConstruction)})
             for k, v in shape.children.items():
                 if isinstance(v.val, BuiltinType):
-                    shape.children[k] = v.val.get_absvalue()
+                    shape.own_children()[k] = v.val.get_absvalue()
             return PythonValue(NdArrayAnnotation(NdArray(shape)))
 
         return PythonValue(NdArrayAnnotation())
@@ -166,6 +166,8 @@ class NdArray(AbstractMutVal):
 
                 assert isinstance(shape.val, Tuple)
                 shape.val = self._check_tuple_all_ints(shape.val, pos)
+                # shape may be a value saved in the store
+                AbstractMutVal.modified()
 
             elif isinstance(shape, Tuple):
                 shape = self._check_tuple_all_ints(shape, pos)
@@ -204,7 +206,7 @@ class NdArray(AbstractMutVal):
                 value = shape.children[k]
 
                 if value.is_top():
-                    shape.children[k] = PythonValue(Int.top())
+                    shape.own_children()[k] = PythonValue(Int.top())
                 elif not isinstance(value.val, Int):
                     assert isinstance(value.val, AbstractValue)
                     TypeCheckLogger().new_warning(
@@ -212,7 +214,7 @@ class NdArray(AbstractMutVal):
                         f"TypeError: '{value.val.type_name}' object cannot"
                         " be interpreted as an integer",
                         pos)
-                    shape.children[k] = pv.int()
+                    shape.own_children()[k] = pv.int()
         return shape
 
     def __repr__(self) -> str:
@@ -269,7 +271,7 @@ class NdArray(AbstractMutVal):
         if not hasattr(self, '_attrs'):
             self._attrs = AttrsMutContainer(
                 'ndarray',
-                self.children,
+                self,
                 {
                     'shape': self._attr_shape,
                     'ndim': self._attr_ndim,
@@ -293,16 +295,13 @@ class NdArray(AbstractMutVal):
         'truediv', 'floordiv', 'mod', 'rtruediv', 'rfloordiv', 'rmod'
     }
 
-    def __getattribute__(self, name: str) -> Any:
-        # Checking if name is 'op_OP' (eg, 'op_add')
+    def __getattr__(self, name: str) -> Any:
+        # Only called if the attribute wasn't found, ie, for op_add_TYPE where TYPE is any
+        # type (op_add and the rest are defined below)
         op = extract_op.match(name)
-        if op and op[1] in NdArray._supported_ops:  # accepting op_add and op_add_TYPE
-            if op[3] is None:  # ex: op_add
-                return object.__getattribute__(self, 'op_OP')
-            else:  # ex: op_add_Int
-                return object.__getattribute__(self, 'op_OP_Any')
-
-        return object.__getattribute__(self, name)
+        if op and op[1] in NdArray._supported_ops and op[3]:  # ex: op_add_Int
+            return self.op_OP_Any
+        raise AttributeError(f"'NdArray' object has no attribute '{name}'")
 
     def op_OP_Any(self,
                   other: 'AbstractValue',
@@ -330,6 +329,9 @@ class NdArray(AbstractMutVal):
         else:
             return NdArray(new_shape)
 
+    op_add = op_sub = op_mul = op_radd = op_rsub = op_rmul = op_OP
+    op_truediv = op_floordiv = op_mod = op_rtruediv = op_rfloordiv = op_rmod = op_OP
+
     def _attr_shape(self) -> 'PythonValue':
         if self.is_top():
             return PythonValue(Tuple.top())
@@ -543,9 +545,9 @@ def _broadcast(left: Tuple, right: Tuple, pos: 'Optional[Pos]') -> 'Optional[Tup
     for ldim, rdim in zip(left_dims, right_dims):
         if ldim == rdim:
             new_shape.append(PythonValue(ldim))
-        elif ldim.is_top():
+        elif ldim.val is None:
             new_shape.append(PythonValue(rdim))
-        elif rdim.is_top():
+        elif rdim.val is None:
             new_shape.append(PythonValue(ldim))
         elif ldim.val == 1:
             new_shape.append(PythonValue(rdim))
@@ -572,23 +574,35 @@ def getshape_list(lst: Union[List, Tuple]) -> 'Tuple':  # noqa: C901
     shape = {}  # type: Dict[Tuple_[str, int], PythonValue]
     is_there_top = False
 
-    indices = lst.sorted_indices()
+    # A summarised list has a single element, the join of all its elements
+    summary = lst.summary
+    indices = lst.sorted_indices() if summary is None else [(0, summary)]
 
     if lst.size[0] != lst.size[1]:
         shape['index', 0] = PythonValue(Int.top())
         is_there_top = True
     else:
         shape['index', 0] = PythonValue(Int(lst.size[0]))
-        if len(indices) != lst.size[0]:
+        if summary is None and len(indices) != lst.size[0]:
             is_there_top = True
 
     shape_values = []  # type: List_[Tuple]
+    prev_scalar = False
     for _, val in indices:
         if val.is_top():
             is_there_top = True
+            prev_scalar = False
         else:
             absval = val.val
             assert isinstance(absval, AbstractValue)
+            # A run of numbers adds their shape only once (comparing it with itself
+            # changes nothing below)
+            if isinstance(absval, (Int, Float)):
+                if prev_scalar:
+                    continue
+                prev_scalar = True
+            else:
+                prev_scalar = False
             shape_val = getshape(absval)  # type: Optional[Tuple]
             if shape_val is None:
                 is_there_top = True
@@ -613,7 +627,7 @@ def getshape_list(lst: Union[List, Tuple]) -> 'Tuple':  # noqa: C901
             any_dim_eq = False
             for i, val in shape_val.sorted_indices():  # type: ignore
                 if val.is_top() or (
-                        isinstance(val.val, Int) and val.val.is_top()
+                        isinstance(val.val, Int) and val.val.val is None
                 ):
                     all_dim_eq = False
                     break
@@ -639,7 +653,7 @@ def getshape_list(lst: Union[List, Tuple]) -> 'Tuple':  # noqa: C901
             assert shape_val is not None
             for i, val in shape_val.sorted_indices():
                 if val.is_top() or (
-                        isinstance(val.val, Int) and val.val.is_top()
+                        isinstance(val.val, Int) and val.val.val is None
                 ):
                     break
                 else:
@@ -3,24 +3,51 @@
 
 import argparse
 import ast
+import io
+import json
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout, redirect_stderr
+from itertools import repeat
 from typed_ast import ast3
 from typing import TYPE_CHECKING
 import traceback
 import code
 
 from pytropos.ast_transformer import \
-    typed_ast3_to_ast, PytroposTransformer, AstTransformerError
+    typed_ast3_to_ast, PytroposTransformer, AstTransformerError, transformer_version, \
+    ClosureCompiler
 from pytropos import metadata
+import pytropos.cache as cache
 import pytropos.debug_print as debug_print
 from pytropos.debug_print import dprint, derror
-from pytropos.internals.errors import TypeCheckLogger
+from pytropos.internals.errors import TypeCheckLogger, format_warnings
+from pytropos.internals.control.execute import LoopSettings, LoopsLogger
+from pytropos.internals.control.profiling import StatementsProfiler
+from pytropos.internals.context import AnalysisOptions, analysis_context
+from pytropos.internals.metrics import Metrics
 
 if TYPE_CHECKING:
-    from typing import List, Optional, Dict, Any, Tuple  # noqa: F401
+    from typing import List, Optional, Dict, Any, Tuple, Union  # noqa: F401
     from types import CodeType  # noqa: F401
 
+    from pytropos.ast_transformer import ClosureProgram  # noqa: F401
+
     from pytropos.internals import Store  # noqa: F401
+    from pytropos.internals.miscelaneous import Pos  # noqa: F401
+    from pytropos.internals.errors import TypeCheckWarning  # noqa: F401
+
+    # (filename, exitcode, stdout, stderr) of analysing a single file in batch mode
+    FileReport = Tuple[str, int, str, str]
+
+    # What runs the analysis of a file (see `compile_pytropos`)
+    Code = Union[CodeType, ClosureProgram]
+
+# Ways to run the analysis: `exec` runs the code generated by PytroposTransformer,
+# `closures` runs the closures built by ClosureCompiler
+backends = ['exec', 'closures']
 
 
 banner = r"""Welcome to
@@ -36,17 +63,12 @@ Type `:?` or `:help` for help
 exitmsg = "Bye!! :D"
 
 
-def main(argv: 'List[str]') -> int:
-    """Program entry point.
-
-    :param argv: command-line arguments
-    :type argv: :class:`list`
-    """
+def _epilog() -> str:
     author_strings = []
     for name, email in zip(metadata.authors, metadata.emails):
         author_strings.append('Author: {0} <{1}>'.format(name, email))
 
-    epilog = (
+    return (
         '{project} {version}\n' +
         '\n' +
         '{authors}\n' +
@@ -57,11 +79,27 @@ def main(argv: 'List[str]') -> int:
         authors='\n'.join(author_strings),
         url=metadata.url)
 
+
+def main(argv: 'List[str]') -> int:
+    """Program entry point.
+
+    :param argv: command-line arguments
+    :type argv: :class:`list`
+    """
+    if len(argv) > 1 and argv[1] == 'check':
+        return main_check(argv)
+    if len(argv) > 1 and argv[1] == 'serve':
+        return main_serve(argv)
+
     arg_parser = argparse.ArgumentParser(
         prog=argv[0],
         formatter_class=argparse.RawDescriptionHelpFormatter,
-        description=metadata.description,
-        epilog=epilog)
+        description=metadata.description + '\n\n'
+        'To analyse several files or whole directories at once run:\n'
+        '  {0} check [-j N] PATH [PATH ...]\n'
+        'To keep Pytropos running, answering requests to analyse files, run:\n'
+        '  {0} serve [--socket PATH]'.format(argv[0]),
+        epilog=_epilog())
 
     arg_parser.add_argument(
         '-V', '--version',
@@ -80,6 +118,43 @@ def main(argv: 'List[str]') -> int:
         help="Checks the values at a specific line in the code"
     )
 
+    _add_cache_arguments(arg_parser)
+    _add_backend_arguments(arg_parser)
+    _add_loop_arguments(arg_parser)
+    _add_domain_arguments(arg_parser)
+
+    arg_parser.add_argument(
+        '--report-loops',
+        action='store_true',
+        default=False,
+        help="Shows how many iterations were needed to analyse each loop (the results cache "
+             "isn't used)"
+    )
+
+    arg_parser.add_argument(
+        '--profile',
+        action='store_true',
+        default=False,
+        help="Shows the time spent analysing each statement (the results cache isn't used)"
+    )
+
+    arg_parser.add_argument(
+        '--profile-output',
+        default=None,
+        metavar='FILE',
+        help="Saves the times measured by --profile in FILE in the format of pstats, eg, "
+             "to see them with a profile viewer (implies --profile)"
+    )
+
+    arg_parser.add_argument(
+        '--metrics',
+        default=None,
+        metavar='FILE',
+        help="Saves in FILE (as JSON) counters of the work done by the analysis, eg, how "
+             "many times the values of the variables were copied (the results cache isn't "
+             "used)"
+    )
+
     repl_or_file = arg_parser.add_mutually_exclusive_group()
 
     repl_or_file.add_argument(
@@ -99,6 +174,7 @@ def main(argv: 'List[str]') -> int:
 
     # Highest level of verbosity is 3
     debug_print.verbosity = 3 if args_parsed.verbose > 3 else args_parsed.verbose
+    analysis_context().options = _analysis_options(args_parsed)
 
     if args_parsed.repl:
         PytroposConsole().interact(banner=banner, exitmsg=exitmsg)
@@ -107,19 +183,413 @@ def main(argv: 'List[str]') -> int:
         cursorline = args_parsed.check_line  # type: Optional[int]
 
         file = args_parsed.file
-        exitcode = run_pytropos(file.read(), file.name, cursorline)[0]
+        source = file.read()  # type: str
+        report_loops = args_parsed.report_loops  # type: bool
+        profile_output = args_parsed.profile_output  # type: Optional[str]
+        profile = args_parsed.profile or profile_output is not None  # type: bool
+        exitcode = run_pytropos(
+            source, file.name, cursorline,
+            cache_dir=None if report_loops or profile or args_parsed.metrics
+            else _cache_dir(args_parsed),
+            backend=args_parsed.backend, profile=profile, metrics_file=args_parsed.metrics)[0]
+        if report_loops and LoopsLogger().loops:
+            dprint(LoopsLogger())
+        if profile and exitcode != 2:
+            dprint(StatementsProfiler().report(source))
+            if profile_output is not None:
+                StatementsProfiler().dump_stats(profile_output, source)
         return exitcode
 
 
-def run_pytropos(  # noqa: C901
+def _add_cache_arguments(arg_parser: argparse.ArgumentParser) -> None:
+    arg_parser.add_argument(
+        '--cache',
+        action='store_true',
+        default=False,
+        help="Saves the results of the analysis and reuses them if the file hasn't changed "
+             "since the last time it was analysed"
+    )
+
+    arg_parser.add_argument(
+        '--cache-dir',
+        default=cache.default_cache_dir,
+        metavar='DIR',
+        help="Directory where the cache is saved (default: {})".format(cache.default_cache_dir)
+    )
+
+
+def _cache_dir(args_parsed: argparse.Namespace) -> 'Optional[str]':
+    return args_parsed.cache_dir if args_parsed.cache else None
+
+
+def _add_backend_arguments(arg_parser: argparse.ArgumentParser) -> None:
+    arg_parser.add_argument(
+        '--backend',
+        choices=backends,
+        default='exec',
+        help="How the analysis is run: `exec` generates and runs Python code, `closures` "
+             "builds closures from the AST and calls them (default: exec)"
+    )
+
+
+def _add_loop_arguments(arg_parser: argparse.ArgumentParser) -> None:
+    defaults = LoopSettings()
+
+    arg_parser.add_argument(
+        '--max-unrolled',
+        type=int,
+        default=defaults.max_unrolled,
+        metavar='N',
+        help="Maximum number of iterations of a loop to run while its condition is known "
+             "(default: {})".format(defaults.max_unrolled)
+    )
+
+    arg_parser.add_argument(
+        '--widening-delay',
+        type=int,
+        default=defaults.widening_delay,
+        metavar='K',
+        help="Number of iterations of a loop to join before widening, the larger the more "
+             "precise (and slow) the analysis is (default: {})".format(defaults.widening_delay)
+    )
+
+    arg_parser.add_argument(
+        '--max-iterations',
+        type=int,
+        default=defaults.max_iterations,
+        metavar='N',
+        help="Maximum number of iterations to find a fix point of a loop, if they are not "
+             "enough the variables modified by the loop are set to Top (default: {})".format(
+                 defaults.max_iterations)
+    )
+
+    arg_parser.add_argument(
+        '--narrowing-steps',
+        type=int,
+        default=defaults.narrowing_steps,
+        metavar='N',
+        help="Maximum number of iterations to refine the values found for a loop "
+             "(default: {})".format(defaults.narrowing_steps)
+    )
+
+
+def _loop_settings(args_parsed: argparse.Namespace) -> LoopSettings:
+    return LoopSettings(
+        max_unrolled=max(0, args_parsed.max_unrolled),
+        widening_delay=max(0, args_parsed.widening_delay),
+        max_iterations=max(1, args_parsed.max_iterations),
+        narrowing_steps=max(0, args_parsed.narrowing_steps)
+    )
+
+
+def _add_domain_arguments(arg_parser: argparse.ArgumentParser) -> None:
+    arg_parser.add_argument(
+        '--intervals',
+        action='store_true',
+        default=False,
+        help="Keeps the interval of values an unknown int or float may take (eg, "
+             "`int[0, 10]`) instead of forgetting its value (`int?`). More conditions are "
+             "decided this way, but the analysis may be slower"
+    )
+
+    arg_parser.add_argument(
+        '--summary-threshold',
+        type=int,
+        default=AnalysisOptions().summary_threshold,
+        metavar='N',
+        help="Lists and tuples with more than N numbers (or other immutable values of the "
+             "same type) are summarised: only their size and the join of their elements "
+             "are kept. 0 disables summaries (default: {})".format(
+                 AnalysisOptions().summary_threshold)
+    )
+
+
+def _analysis_options(args_parsed: argparse.Namespace) -> AnalysisOptions:
+    threshold = args_parsed.summary_threshold  # type: int
+    return AnalysisOptions(
+        loops=_loop_settings(args_parsed),
+        intervals=args_parsed.intervals,
+        summary_threshold=threshold if threshold > 0 else None
+    )
+
+
+def main_check(argv: 'List[str]') -> int:
+    """Entry point for the batch mode (`pytropos check PATH...`).
+
+    :param argv: command-line arguments, `argv[1]` is `'check'`
+    :type argv: :class:`list`
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog='{} check'.format(argv[0]),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='Analyses all python files found in the given paths. Directories are '
+                    'traversed recursively',
+        epilog=_epilog())
+
+    arg_parser.add_argument(
+        '-v', '--verbose', action='count', default=0,
+        help="Shows internal parameters. This option can be stacked, so `-vvv` is possible (max: 3)"
+    )
+
+    arg_parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help="Number of files to analyse in parallel (default: number of CPUs)"
+    )
+
+    _add_cache_arguments(arg_parser)
+    _add_backend_arguments(arg_parser)
+    _add_loop_arguments(arg_parser)
+    _add_domain_arguments(arg_parser)
+
+    arg_parser.add_argument(
+        'paths',
+        nargs='+',
+        help='Files and directories to analyse')
+
+    args_parsed = arg_parser.parse_args(args=argv[2:])
+
+    if args_parsed.jobs is not None and args_parsed.jobs < 1:
+        arg_parser.error("argument -j/--jobs: it must be a positive number")
+
+    debug_print.verbosity = 3 if args_parsed.verbose > 3 else args_parsed.verbose
+    analysis_context().options = _analysis_options(args_parsed)
+
+    exitcode, reports = run_pytropos_many(
+        args_parsed.paths, jobs=args_parsed.jobs, cache_dir=_cache_dir(args_parsed),
+        backend=args_parsed.backend)
+
+    for filename, _, out, err in reports:
+        sys.stdout.write(out)
+        sys.stderr.write(err)
+
+    if not reports:
+        derror("No python files were found in the given paths")
+
+    return exitcode
+
+
+def main_serve(argv: 'List[str]') -> int:
+    """Entry point for the server mode (`pytropos serve`).
+
+    :param argv: command-line arguments, `argv[1]` is `'serve'`
+    :type argv: :class:`list`
+    """
+    from pytropos import server
+
+    arg_parser = argparse.ArgumentParser(
+        prog='{} serve'.format(argv[0]),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='Answers JSON-RPC requests to analyse files on a Unix socket (see '
+                    '`pytropos.server`). Files are only analysed again if they changed',
+        epilog=_epilog())
+
+    arg_parser.add_argument(
+        '--socket',
+        default=server.default_socket,
+        metavar='PATH',
+        help="Unix socket to listen on (default: {})".format(server.default_socket)
+    )
+
+    _add_loop_arguments(arg_parser)
+    _add_domain_arguments(arg_parser)
+
+    args_parsed = arg_parser.parse_args(args=argv[2:])
+
+    analysis_context().options = _analysis_options(args_parsed)
+
+    server.serve(args_parsed.socket)
+    return 0
+
+
+def find_python_files(paths: 'List[str]') -> 'List[str]':
+    """Returns all python files to analyse from a list of files and directories.
+
+    Directories are traversed recursively (hidden directories are ignored), files are
+    returned as given."""
+    files = []  # type: List[str]
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+
+        found = []  # type: List[str]
+        for root, dirs, filenames in os.walk(path):
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+            found.extend(os.path.join(root, f) for f in filenames if f.endswith('.py'))
+        files.extend(sorted(found))
+
+    return files
+
+
+def run_pytropos_many(
+        paths: 'List[str]',
+        jobs: 'Optional[int]' = None,
+        cache_dir: 'Optional[str]' = None,
+        backend: str = 'exec'
+) -> 'Tuple[int, List[FileReport]]':
+    """Analyses all python files found in `paths` using a pool of `jobs` processes.
+
+    The output of each file is captured and returned in the same order the files were
+    found, together with the aggregated exitcode (the worst exitcode of all files). The
+    files are analysed with the options of the current AnalysisContext.
+
+    :param paths: files and directories to analyse
+    :param jobs: number of processes to use. By default, the number of CPUs
+    :param cache_dir: directory where to cache the results (no caching if None)
+    :param backend: how the analysis is run (one of `backends`)
+    """
+    files = find_python_files(paths)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    options = analysis_context().options
+    reports = []  # type: List[FileReport]
+    if jobs == 1 or len(files) < 2:
+        reports = [
+            _run_pytropos_file(f, debug_print.verbosity, options, cache_dir, backend)
+            for f in files
+        ]
+    else:
+        chunksize = max(1, len(files) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            reports = list(executor.map(
+                _run_pytropos_file, files, repeat(debug_print.verbosity),
+                repeat(options), repeat(cache_dir),
+                repeat(backend), chunksize=chunksize
+            ))
+
+    exitcode = max((r[1] for r in reports), default=0)
+    return exitcode, reports
+
+
+def _run_pytropos_file(
+        filename: str,
+        verbosity: int,
+        options: AnalysisOptions,
+        cache_dir: 'Optional[str]',
+        backend: str
+) -> 'FileReport':
+    """Analyses a single file capturing everything it prints. Used by batch mode"""
+    debug_print.verbosity = verbosity
+    analysis_context().options = options
+
+    out, err = io.StringIO(), io.StringIO()
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            with open(filename, 'r') as file:
+                source = file.read()
+        except (OSError, UnicodeDecodeError) as msg:
+            derror(f"{filename}::: {type(msg).__name__}: {msg}")
+            exitcode = 2
+        else:
+            exitcode = run_pytropos(source, filename, cache_dir=cache_dir, backend=backend)[0]
+
+    return filename, exitcode, out.getvalue(), err.getvalue()
+
+
+def analysis_flags(options: 'Optional[AnalysisOptions]' = None) -> 'Dict[str, Any]':
+    """Options that alter the result of an analysis (by default, those of the current
+    analysis). They are part of the key used to save the results in the cache"""
+    if options is None:
+        options = analysis_context().options
+    return {'loops': list(options.loops), 'intervals': options.intervals,
+            'summary_threshold': options.summary_threshold}
+
+
+def run_pytropos(
         file: str,
         filename: str,
         cursorline: 'Optional[int]' = None,
         console: bool = False,
-        pt_globals: 'Optional[Dict[str, Any]]' = None
+        pt_globals: 'Optional[Dict[str, Any]]' = None,
+        cache_dir: 'Optional[str]' = None,
+        backend: str = 'exec',
+        profile: bool = False,
+        metrics_file: 'Optional[str]' = None,
+        options: 'Optional[AnalysisOptions]' = None
 ) -> 'Tuple[int, Optional[Store]]':
+    """Analyses the code in `file`.
+
+    The options of the analysis are those of the AnalysisContext of the current thread,
+    `options` replaces them if given (threads analysing files with different options don't
+    interfere with each other).
+
+    If `cache_dir` is given, the result of the analysis is taken from the cache (if the
+    file has been analysed before) and no Store is returned (None is returned instead).
+    The results cache is ignored when checking a line, in console mode or in verbose
+    mode. The code to run the analysis is also saved in the cache (unless the `closures`
+    backend is used, closures cannot be saved).
+
+    If `metrics_file` is given, the metrics of the analysis are saved in it (see
+    `run_transformed_type_checking_code`)."""
     dprint("Starting pytropos", verb=1)
+    if options is not None:
+        analysis_context().options = options
+
+    use_cache = cache_dir is not None and cursorline is None and not console \
+        and not profile and metrics_file is None and debug_print.verbosity == 0
+    if use_cache:
+        assert cache_dir is not None
+        result_key = cache.result_key(file, filename, analysis_flags())
+        cached = cache.load_result(cache_dir, result_key)
+        if cached is not None:
+            exitcode, warnings = cached
+            if warnings:
+                derror(format_warnings(warnings))
+            return (exitcode, None)
+
+    newast_comp = None  # type: Optional[Code]
+
+    # The code cache is not used in verbose mode, the transformed code is printed there
+    use_code_cache = cache_dir is not None and debug_print.verbosity < 2 \
+        and backend == 'exec'
+    if use_code_cache:
+        assert cache_dir is not None
+        code_key = cache.code_key(file, filename, transformer_version,
+                                  cursorline=cursorline, console=console, profile=profile)
+        newast_comp = cache.load_code(cache_dir, code_key)
+
+    if newast_comp is None:
+        newast_comp = compile_pytropos(file, filename, cursorline, console, backend=backend,
+                                       profile=profile)
+        if newast_comp is None:
+            return (2, None)
+        if use_code_cache:
+            assert cache_dir is not None
+            assert not callable(newast_comp)
+            cache.save_code(cache_dir, code_key, newast_comp)
+
+    exitvalues = run_transformed_type_checking_code(newast_comp, pt_globals, metrics_file)
+    if use_cache and exitvalues[0] != 2:
+        assert cache_dir is not None
+        cache.save_result(cache_dir, result_key, exitvalues[0], TypeCheckLogger().warnings)
+    TypeCheckLogger.clean_sing()
+
+    dprint("Closing pytropos", verb=1)
+
+    return exitvalues
 
+
+def compile_pytropos(  # noqa: C901
+        file: str,
+        filename: str,
+        cursorline: 'Optional[int]' = None,
+        console: bool = False,
+        transformer: 'Optional[PytroposTransformer]' = None,
+        backend: str = 'exec',
+        profile: bool = False,
+        tree: 'Optional[ast3.Module]' = None
+) -> 'Optional[Code]':
+    """Parses, transforms and compiles the code in `file` into the code that Pytropos runs
+    to analyse it. A `transformer` can be given to be reused (eg, by the REPL), otherwise
+    a new one is created. With the `closures` backend, the code is compiled into closures
+    by ClosureCompiler instead (and `transformer` is ignored). With `profile`, the code
+    measures the time spent analysing each statement (see StatementsProfiler). If `tree`
+    is given (the AST of `file`), the code isn't parsed again.
+
+    Returns None if the code cannot be analysed (eg, it contains a syntax error)"""
     dprint("Parsing and un-parsing a python file (it should preserve all type comments)", verb=2)
 
     if debug_print.verbosity > 1:
@@ -135,34 +605,48 @@ def run_pytropos(  # noqa: C901
 
     # Parsing file
     ast_: ast3.Module
-    try:
-        ast_ = ast3.parse(file, filename=filename)  # type: ignore
-    except SyntaxError as msg:
-        derror(f"{msg.filename}:{msg.lineno}:{msg.offset-1}: {type(msg).__name__}: {msg.msg}")
-        return (2, None)
-    except (OverflowError, ValueError) as msg:
-        derror(f"{filename}::: {type(msg).__name__}")
-        return (2, None)
+    if tree is not None:
+        ast_ = tree
+    else:
+        try:
+            ast_ = ast3.parse(file, filename=filename)  # type: ignore
+        except SyntaxError as msg:
+            derror(f"{msg.filename}:{msg.lineno}:{msg.offset-1}: "
+                   f"{type(msg).__name__}: {msg.msg}")
+            return None
+        except (OverflowError, ValueError) as msg:
+            derror(f"{filename}::: {type(msg).__name__}")
+            return None
 
     if debug_print.verbosity > 1:
         dprint("Original file:", verb=2)
         dprint("AST dump of original file:", ast3.dump(ast_), verb=3)
         dprint(unparse(ast_), verb=2)
 
+    if backend == 'closures':
+        try:
+            return ClosureCompiler(filename, cursorline=cursorline, console=console,
+                                   profile=profile).compile(ast_)
+        except AstTransformerError:
+            derror("Sorry it seems Pytropos cannot run the file. Pytropos doesn't support "
+                   "some Python characteristic it uses right now. Sorry :(")
+            traceback.print_exc()
+            return None
+
     # Converting AST (code) into Pytropos representation
+    if transformer is None:
+        transformer = PytroposTransformer(filename, cursorline=cursorline, console=console,
+                                          profile=profile)
+
     newast: ast3.Module
     try:
-        newast = PytroposTransformer(  # type: ignore
-            filename,
-            cursorline=cursorline,
-            console=console
-        ).visit(ast_)
+        newast = transformer.visit(ast_)  # type: ignore
     except AstTransformerError:
         derror("Sorry it seems Pytropos cannot run the file. Pytropos doesn't support "
                "some Python characteristic it uses right now. Sorry :(")
         traceback.print_exc()
         # derror(msg)
-        return (2, None)
+        return None
 
     if debug_print.verbosity > 1:
         dprint("Modified file:", verb=2)
@@ -182,28 +666,42 @@ def run_pytropos(  # noqa: C901
                "the flag -vvv")
         traceback.print_exc()
         # derror(msg)
-        return (2, None)
-
-    exitvalues = run_transformed_type_checking_code(newast_comp, pt_globals)
-    TypeCheckLogger.clean_sing()
+        return None
 
-    dprint("Closing pytropos", verb=1)
-
-    return exitvalues
+    return newast_comp  # type: ignore
 
 
 def run_transformed_type_checking_code(
-        newast_comp: 'CodeType',
-        pt_globals: 'Optional[Dict[str, Any]]'
+        newast_comp: 'Code',
+        pt_globals: 'Optional[Dict[str, Any]]',
+        metrics_file: 'Optional[str]' = None
 ) -> 'Tuple[int, None[Store]]':
+    """Runs the code compiled by `compile_pytropos`.
+
+    If `metrics_file` is given, the work done by the analysis is counted (see
+    `pytropos.internals.metrics`) and saved in the file as JSON, together with the time
+    taken, the exitcode and how many iterations each loop needed"""
     if pt_globals is None:
         pt_globals = {}
 
+    # The loops report and profile of the last analysis are kept until a new analysis starts
+    LoopsLogger.clean_sing()
+    StatementsProfiler.clean_sing()
+
+    ctx = analysis_context()
+    ctx.count_metrics = metrics_file is not None
+    if ctx.count_metrics:
+        Metrics.clean_sing()
+    start = time.perf_counter()
+
     # from pytropos.internals.tools import NonImplementedPT
     try:
-        # at the module level, locals and globals are the same
-        # see: https://stackoverflow.com/questions/2904274/globals-and-locals-in-python-exec
-        exec(newast_comp, pt_globals)
+        if callable(newast_comp):  # compiled by ClosureCompiler
+            newast_comp(pt_globals)
+        else:
+            # at the module level, locals and globals are the same
+            # see: https://stackoverflow.com/questions/2904274/globals-and-locals-in-python-exec
+            exec(newast_comp, pt_globals)
     except Exception:
         derror("Error: An error inside pytropos has occurred, please open an issue in:")
         derror("  ", metadata.url)
@@ -216,10 +714,31 @@ def run_transformed_type_checking_code(
         derror(pt_globals['st'], end='\n\n', verb=2)
 
         traceback.print_exc()
+        if metrics_file is not None:
+            _save_metrics(metrics_file, 2, time.perf_counter() - start)
         return (2, None)
+    finally:
+        ctx.count_metrics = False
 
+    elapsed = time.perf_counter() - start
     store = pt_globals['st']
+    _print_last_store(store)
+
+    if len(TypeCheckLogger().warnings) > 0:
+        derror(TypeCheckLogger())
+        exitcode = 1
+    else:
+        dprint('No type checking error found.', verb=1)
+        dprint('I wasn\'t able to find any error in the code, though there may be some (sorry)',
+               verb=2)
+        exitcode = 0
 
+    if metrics_file is not None:
+        _save_metrics(metrics_file, exitcode, elapsed)
+    return (exitcode, store)
+
+
+def _print_last_store(store: 'Store') -> None:
     if debug_print.verbosity == 2:
         derror("\nLast computed variables values (Store):", verb=2)
         derror(store, end='\n\n', verb=2)
@@ -231,14 +750,28 @@ def run_transformed_type_checking_code(
             derror(f"  {i!r}: PythonValue({v.val}),", verb=3)
         derror("})\n", verb=3)
 
-    if len(TypeCheckLogger().warnings) > 0:
-        derror(TypeCheckLogger())
-        return (1, store)
-    else:
-        dprint('No type checking error found.', verb=1)
-        dprint('I wasn\'t able to find any error in the code, though there may be some (sorry)',
-               verb=2)
-    return (0, store)
+
+def _save_metrics(path: str, exitcode: int, elapsed: float) -> None:
+    """Saves the metrics of the last analysis as JSON"""
+    def where(pos: 'Optional[Pos]') -> 'Dict[str, Any]':
+        if pos is None:
+            return {'file': None, 'line': None, 'col': None}
+        line, col = pos[0] if pos[0] is not None else (None, None)
+        return {'file': pos[1], 'line': line, 'col': col}
+
+    loops = [
+        dict(where(pos), runs=runs, unrolled=unrolled, iterations=iterations,
+             narrowed=narrowed, budget_exhausted=exhausted)
+        for pos, (runs, unrolled, iterations, narrowed, exhausted) in LoopsLogger().loops.items()
+    ]
+    data = dict(Metrics().as_dict(), exitcode=exitcode, time=elapsed,
+                warnings=len(TypeCheckLogger().warnings), loops=loops)
+
+    try:
+        with open(path, 'w') as file:
+            json.dump(data, file, indent=2, sort_keys=True)
+    except OSError as msg:
+        derror(f"{path}::: {type(msg).__name__}: {msg}")
 
 
 def entry_point() -> None:
@@ -261,7 +794,6 @@ class PytroposConsole(code.InteractiveConsole):
 
         self.locals['pt'] = pt
         self.locals['st'] = store = pt.Store()
-        self.locals['fn'] = '<console>'
         pt.loadBuiltinFuncs(store)
 
         def print_console(v: pv.PythonValue) -> None:
@@ -272,12 +804,30 @@ class PytroposConsole(code.InteractiveConsole):
 
         self.locals['print_console'] = print_console
 
+        # The same transformer is used for every input
+        self.transformer = PytroposTransformer('<console>', console=True)
+        # Warnings found since the REPL started (each input shows only its own warnings)
+        self.warnings = []  # type: List[TypeCheckWarning]
+
         self.help = \
             "Interpreter special commands:\n\n" \
             ":?   :help      Prints this help\n" \
             ":in  :inspect   Access to underlying objects representation" \
             " in a regular Python environment\n" \
-            ":st  :store     Prints all variables values (ie, globals())\n"
+            ":st  :store     Prints all variables values (ie, globals())\n" \
+            ":w   :warnings  Prints all warnings found since the REPL started\n"
+
+    def run_command(self, command: str) -> None:
+        """Runs a special command (eg, `:store`)"""
+        if command in [':inspect', ':in']:
+            code.InteractiveConsole(locals=self.locals).interact()
+        elif command in [':store', ':st']:
+            print(self.locals['st'])
+        elif command in [':warnings', ':w']:
+            if self.warnings:
+                print(format_warnings(self.warnings))
+        else:  # :help, :? or an unknown command
+            print(self.help)
 
     def runsource(self,
                   source: str,
@@ -286,38 +836,57 @@ class PytroposConsole(code.InteractiveConsole):
                   ) -> bool:
 
         if source and source[0] == ':':
-            if source.strip() in [':inspect', ':in']:
-                code.InteractiveConsole(locals=self.locals).interact()
-                return False
-            elif source.strip() in [':store', ':st']:
-                print(self.locals['st'])
-                return False
-            elif source.strip() in [':help', ':?']:
-                print(self.help)
-                return False
-            else:
-                print(self.help)
-                return False
+            self.run_command(source.strip())
+            return False
 
+        # Each input is parsed once, the same tree tells whether the input is complete
+        tree: ast3.Module
         try:
-            code_ = self.compile(source, filename, symbol)  # type: ignore
-        except (OverflowError, SyntaxError, ValueError):
+            tree = ast3.parse(source, filename=filename)  # type: ignore
+        except SyntaxError as err:
+            if err.msg.startswith(_eof_errors):
+                # Case 2 (incomplete input)
+                return True
+            # Case 1
+            self.showsyntaxerror(filename)
+            return False
+        except (OverflowError, ValueError):
             # Case 1
             self.showsyntaxerror(filename)
             return False
 
-        if code_ is None:
+        if _incomplete_input(source, tree):
             # Case 2
             return True
 
-        # print(source)
         # Case 3
-        run_pytropos(source,
-                     '<console>',
-                     console=True,
-                     pt_globals=self.locals)
+        # The Store is kept and only the new code is analysed
+        newast_comp = compile_pytropos(source, '<console>', console=True,
+                                       transformer=self.transformer, tree=tree)
+        if newast_comp is not None:
+            TypeCheckLogger.clean_sing()
+            run_transformed_type_checking_code(newast_comp, self.locals)
+            self.warnings.extend(TypeCheckLogger().warnings)
+            TypeCheckLogger.clean_sing()
         return False
 
 
+# Syntax errors raised because the input ended too soon
+_eof_errors = ('unexpected EOF while parsing', 'EOF while scanning')
+
+_compound_stmts = (ast3.If, ast3.While, ast3.For, ast3.AsyncFor, ast3.With, ast3.AsyncWith,
+                   ast3.Try, ast3.FunctionDef, ast3.AsyncFunctionDef, ast3.ClassDef)
+
+
+def _incomplete_input(source: str, tree: 'ast3.Module') -> bool:
+    """Returns True if the REPL must wait for more lines before running `source` (parsed
+    into `tree`), as `code.InteractiveConsole` does: the last line ends with a backslash
+    or a compound statement (eg, `if`) isn't followed by an empty line"""
+    if source.endswith('\\'):
+        return True
+    return bool(tree.body) and isinstance(tree.body[-1], _compound_stmts) \
+        and not source.endswith('\n')
+
+
 if __name__ == '__main__':
     entry_point()
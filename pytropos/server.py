@@ -0,0 +1,239 @@
+"""
+Analysis server (`pytropos serve`).
+
+The server listens on a Unix socket and answers JSON-RPC 2.0 requests, one per line. It
+keeps Pytropos loaded and remembers the code generated for each file and the results of
+its last analysis, so a file is only analysed again if its content (or name) changed.
+
+Requests are answered one at a time, a connection without requests for `idle_timeout`
+seconds is closed so it doesn't keep other clients waiting. Methods:
+
+- `analyse`: params `{"filename": str, "source": str}` (`source` is read from `filename`
+  if it isn't given). Returns `{"exitcode": int, "warnings": [...], "output": str,
+  "cached": bool}`, each warning is `{"code": str, "message": str, "line": int|null,
+  "col": int|null, "file": str|null}`. `output` contains everything Pytropos printed
+  (stdout and stderr)
+- `forget`: params `{"filename": str}`. Forgets what is known of the file
+- `shutdown`: stops the server
+
+`call` sends a request to a running server.
+"""
+
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+from contextlib import redirect_stdout, redirect_stderr
+from typing import TYPE_CHECKING
+
+import pytropos.cache as cache
+from pytropos.ast_transformer import transformer_version
+from pytropos.internals.context import AnalysisContext, AnalysisOptions, analysis_context
+from pytropos.internals.errors import TypeCheckLogger
+import pytropos.main as main
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple  # noqa: F401
+    from pytropos.internals.errors import TypeCheckWarning  # noqa: F401
+    from pytropos.main import Code  # noqa: F401
+
+__all__ = ['default_socket', 'idle_timeout', 'AnalysisServer', 'RPCError', 'serve', 'call']
+
+default_socket = '.pytropos.sock'
+
+# Seconds a connection can be idle before it is closed
+idle_timeout = 5.0
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class RPCError(Exception):
+    """An error answered to a request"""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class AnalysisServer(socketserver.UnixStreamServer):
+    """Unix socket server answering JSON-RPC requests to analyse files.
+
+    Files are analysed with `options` (by default, those of the current AnalysisContext)"""
+
+    def __init__(self, path: str, options: 'Optional[AnalysisOptions]' = None) -> None:
+        self.options = analysis_context().options if options is None else options
+        # The code generated and the last result for each file: (key, code or result)
+        self.codes = {}  # type: Dict[str, Tuple[str, Optional[Code]]]
+        self.results = {}  # type: Dict[str, Tuple[str, Dict[str, Any]]]
+        self.running = True
+
+        _remove_socket(path)
+        super().__init__(path, _RequestHandler)  # type: ignore
+
+    def serve_until_shutdown(self) -> None:
+        try:
+            while self.running:
+                self.handle_request()
+        finally:
+            self.server_close()
+            _remove_socket(self.server_address)  # type: ignore
+
+    def dispatch(self, method: str, params: 'Dict[str, Any]') -> 'Any':
+        if method == 'analyse':
+            filename = _param(params, 'filename', str)
+            source = params.get('source')
+            if source is None:
+                try:
+                    with open(filename, 'r') as file:
+                        source = file.read()
+                except (OSError, UnicodeDecodeError) as msg:
+                    raise RPCError(INVALID_PARAMS, f"{type(msg).__name__}: {msg}")
+            elif not isinstance(source, str):
+                raise RPCError(INVALID_PARAMS, "'source' must be a string")
+            return self.analyse(source, filename)
+        elif method == 'forget':
+            filename = _param(params, 'filename', str)
+            self.codes.pop(filename, None)
+            self.results.pop(filename, None)
+            return None
+        elif method == 'shutdown':
+            self.running = False
+            return None
+        raise RPCError(METHOD_NOT_FOUND, f"Method not found: {method}")
+
+    def analyse(self, source: str, filename: str) -> 'Dict[str, Any]':
+        """Analyses a file unless its last result can be reused"""
+        result_key = cache.result_key(source, filename, main.analysis_flags(self.options))
+        if filename in self.results and self.results[filename][0] == result_key:
+            return dict(self.results[filename][1], cached=True)
+
+        out = io.StringIO()
+        with redirect_stdout(out), redirect_stderr(out):
+            exitcode, warnings = AnalysisContext(self.options).run(self._run, source, filename)
+
+        result = {
+            'exitcode': exitcode,
+            'warnings': [_warning_to_json(w) for w in warnings],
+            'output': out.getvalue()
+        }
+        self.results[filename] = (result_key, result)
+        return dict(result, cached=False)
+
+    def _run(self, source: str, filename: str) -> 'Tuple[int, List[TypeCheckWarning]]':
+        code_key = cache.code_key(source, filename, transformer_version)
+        if filename in self.codes and self.codes[filename][0] == code_key:
+            code = self.codes[filename][1]
+        else:
+            code = main.compile_pytropos(source, filename)
+            self.codes[filename] = (code_key, code)
+
+        if code is None:
+            return 2, []
+
+        exitcode = main.run_transformed_type_checking_code(code, None)[0]
+        return exitcode, TypeCheckLogger().warnings
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers every request (a line) sent in a connection"""
+
+    def setup(self) -> None:
+        self.timeout = idle_timeout
+        super().setup()
+
+    def handle(self) -> None:
+        server = self.server
+        assert isinstance(server, AnalysisServer)
+        while True:
+            try:
+                line = self.rfile.readline()
+            except socket.timeout:
+                break
+            if not line:
+                break
+            if not line.strip():
+                continue
+            response = self.response(server, line)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+            if not server.running:
+                break
+
+    def response(self, server: AnalysisServer, line: bytes) -> 'Dict[str, Any]':
+        req_id = None  # type: Any
+        try:
+            try:
+                request = json.loads(line.decode('utf-8'))
+            except ValueError as msg:
+                raise RPCError(PARSE_ERROR, f"Parse error: {msg}")
+            if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+                raise RPCError(INVALID_REQUEST, "Invalid request")
+            req_id = request.get('id')
+            params = request.get('params', {})
+            if not isinstance(params, dict):
+                raise RPCError(INVALID_PARAMS, "Params must be an object")
+            result = server.dispatch(request['method'], params)
+        except RPCError as err:
+            return {'jsonrpc': '2.0', 'id': req_id,
+                    'error': {'code': err.code, 'message': err.message}}
+        except Exception as err:
+            return {'jsonrpc': '2.0', 'id': req_id,
+                    'error': {'code': INTERNAL_ERROR,
+                              'message': f"Internal error: {type(err).__name__}: {err}"}}
+        return {'jsonrpc': '2.0', 'id': req_id, 'result': result}
+
+
+def _param(params: 'Dict[str, Any]', name: str, type_: type) -> 'Any':
+    val = params.get(name)
+    if not isinstance(val, type_):
+        raise RPCError(INVALID_PARAMS, f"'{name}' must be a {type_.__name__}")
+    return val
+
+
+def _warning_to_json(warning: 'TypeCheckWarning') -> 'Dict[str, Any]':
+    err_code, msg, pos = warning
+    line = col = None  # type: Optional[int]
+    file = None  # type: Optional[str]
+    if pos is not None:
+        pos_in_file, file = pos
+        if pos_in_file is not None:
+            line, col = pos_in_file
+    return {'code': err_code, 'message': msg, 'line': line, 'col': col, 'file': file}
+
+
+def _remove_socket(path: str) -> None:
+    """Removes a socket left by a server that wasn't closed properly"""
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+    except OSError:
+        pass
+
+
+def serve(path: str = default_socket) -> None:
+    """Answers requests on the Unix socket `path` until a `shutdown` request arrives"""
+    AnalysisServer(path).serve_until_shutdown()
+
+
+def call(path: str, method: str, **params: 'Any') -> 'Any':
+    """Sends a request to the server listening on `path` and returns its result.
+
+    Raises RPCError if the server answers with an error"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        request = {'jsonrpc': '2.0', 'id': 0, 'method': method, 'params': params}
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as response_file:
+            response = json.loads(response_file.readline().decode('utf-8'))
+
+    if 'error' in response:
+        raise RPCError(response['error']['code'], response['error']['message'])
+    return response['result']
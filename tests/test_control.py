@@ -1,3 +1,6 @@
+from typing import Any, Optional  # noqa: F401
+
+import pytest
 from hypothesis import given
 import hypothesis.strategies as st
 
@@ -6,10 +9,22 @@ from pytropos.internals import Store  # noqa: F401
 import pytropos.internals.control.execute as execute
 from pytropos.internals.values.builtin_values import Int
 from pytropos.internals.values.python_values import PythonValue
+from pytropos.internals.values.python_values.builtin_mutvalues import List
 import pytropos.internals.values as pv
+from pytropos.internals.miscelaneous import Pos  # noqa: F401
+from pytropos.internals.context import analysis_context
 
 from .common_strategies import st_any_pv
 
+parametrize = pytest.mark.parametrize
+
+
+def set_loop_settings(monkeypatch: Any, **settings: int) -> None:
+    """The loops run in the test are analysed with the LoopSettings given"""
+    ctx = analysis_context()
+    loops = execute.LoopSettings(**settings)
+    monkeypatch.setattr(ctx, 'options', ctx.options._replace(loops=loops))
+
 
 class TestIf:
     @given(st_any_pv, st_any_pv)
@@ -122,3 +137,353 @@ class TestWhile:
         else:
             assert st['i'].val.is_top()
             assert st['b'].val.is_top()
+
+    def _counting_loop(self, pos: 'Optional[Pos]') -> Store:
+        """Simulates `i = 0; c = 1; while i < 10: i += 1`"""
+        st = pt.Store()
+        st['i'] = pv.int(0)
+        st['c'] = pv.int(1)
+
+        def while_qst(st: Store) -> PythonValue:
+            return st['i'].lt(pv.int(10))  # type: ignore
+
+        def while_(st: Store) -> Store:
+            st['i'] = st['i'].add(pv.int(1))
+            return st
+
+        return pt.runWhile(st, while_qst, while_, pos=pos)
+
+    def test_iterations_are_reported_per_loop(self, monkeypatch: Any) -> None:
+        set_loop_settings(monkeypatch, max_unrolled=4)
+        execute.LoopsLogger.clean_sing()
+
+        pos = ((3, 0), 'file.py')  # type: Pos
+        self._counting_loop(pos)
+        self._counting_loop(pos)
+
+        runs, unrolled, iterations, _, exhausted = execute.LoopsLogger().loops[pos]
+        assert (runs, unrolled, exhausted) == (2, 8, 0)
+        assert iterations > 0
+        assert str(execute.LoopsLogger()).startswith('file.py:3:0: loop run 2 time(s)')
+
+    def test_variables_modified_become_top_if_budget_runs_out(self, monkeypatch: Any) -> None:
+        set_loop_settings(monkeypatch, max_unrolled=4, max_iterations=1)
+        execute.LoopsLogger.clean_sing()
+
+        st = self._counting_loop(None)
+
+        assert st['i'].is_top()
+        assert st['c'] == pv.int(1)
+        runs, unrolled, iterations, _, exhausted = execute.LoopsLogger().loops[None]
+        assert (runs, unrolled, iterations, exhausted) == (1, 4, 1, 1)
+
+    def test_variables_written_only_once_others_are_top_become_top(
+            self,
+            monkeypatch: Any
+    ) -> None:
+        """
+        Simulates the following code (without enough iterations to find a fix point):
+
+        > i = 0
+        > y = 0
+        > z = 0
+        > while i < 1000:
+        >     if y > 0:
+        >         z = 2
+        >     if i > 5:
+        >         y = 1
+        >     i += 1
+        """
+        set_loop_settings(monkeypatch, max_unrolled=0, max_iterations=1, narrowing_steps=0)
+
+        st = pt.Store()
+        st['i'] = pv.int(0)
+        st['y'] = pv.int(0)
+        st['z'] = pv.int(0)
+
+        def while_qst(st: Store) -> PythonValue:
+            return st['i'].lt(pv.int(1000))  # type: ignore
+
+        def if_y(st: Store) -> Store:
+            st['z'] = pv.int(2)
+            return st
+
+        def if_i(st: Store) -> Store:
+            st['y'] = pv.int(1)
+            return st
+
+        def while_(st: Store) -> Store:
+            st = pt.runIf(st, st['y'].gt(pv.int(0)), if_y)
+            st = pt.runIf(st, st['i'].gt(pv.int(5)), if_i)
+            st['i'] = st['i'].add(pv.int(1))
+            return st
+
+        st = pt.runWhile(st, while_qst, while_)
+
+        assert st['i'].is_top()
+        assert st['y'].is_top()
+        assert st['z'].is_top()
+
+    def test_loops_do_not_leave_copies_tracked(self) -> None:
+        st = pt.Store()
+        st['i'] = pv.int(0)
+
+        def while_(st: Store) -> Store:
+            st['i'] = st['i'].add(pv.int(1))
+            return st
+
+        for _ in range(20):
+            st = pt.runWhile(st, lambda st: st['i'].lt(st['n']), while_)
+
+        # No entry of a copy made by runWhile is left in the Scope
+        assert len(st._global_scope._written) == 1
+
+    @parametrize('narrowing_steps', [0, 2])  # type: ignore
+    def test_narrowing_refines_variables_made_top(
+            self,
+            narrowing_steps: int,
+            monkeypatch: Any
+    ) -> None:
+        """
+        Simulates the following code (without enough iterations to find a fix point):
+
+        > i = 0
+        > b = 3
+        > while i < 10:
+        >     i += 1
+        >     b = 3
+        """
+        set_loop_settings(monkeypatch, max_unrolled=0, max_iterations=1,
+                          narrowing_steps=narrowing_steps)
+
+        st = pt.Store()
+        st['i'] = pv.int(0)
+        st['b'] = pv.int(3)
+
+        def while_qst(st: Store) -> PythonValue:
+            return st['i'].lt(pv.int(10))  # type: ignore
+
+        def while_(st: Store) -> Store:
+            st['i'] = st['i'].add(pv.int(1))
+            st['b'] = pv.int(3)
+            return st
+
+        st = pt.runWhile(st, while_qst, while_)
+
+        assert st['i'].is_top()
+        if narrowing_steps:
+            assert st['b'] == pv.int(3)
+        else:
+            assert st['b'].is_top()
+
+
+class TestStore:
+    @given(st_any_pv, st_any_pv)
+    def test_copy_does_not_alter_original(
+            self,
+            i: PythonValue,
+            j: PythonValue
+    ) -> None:
+        st = pt.Store()
+        st['a'] = i
+        st['b'] = i
+        st['lst'] = pv.list([pv.int(2)])
+
+        st2 = st.copy()
+        st2['a'] = j
+        del st2['b']
+        st2['c'] = j
+        st2['lst'].val.own_children()[('index', 0)] = j
+
+        assert st['a'] is i
+        assert st['b'] is i
+        assert 'c' not in st
+        assert st['lst'].val.children[('index', 0)] == pv.int(2)
+
+    def test_copied_lists_share_children_until_modified(self) -> None:
+        st = pt.Store()
+        st['lst'] = pv.list([pv.int(i) for i in range(10)])
+
+        st2 = st.copy()
+        lst, lst2 = st['lst'].val, st2['lst'].val
+        assert lst.children is lst2.children
+        assert lst == lst2
+        assert st.join(st2)['lst'].val.children is lst.children
+
+        st2['lst'].subs()[pv.int(0)] = pv.int(20)
+        assert lst.children is not lst2.children
+        assert lst.children[('index', 0)] == pv.int(0)
+        assert lst2.children[('index', 0)] == pv.int(20)
+
+        st3 = st.copy()
+        st3['lst'].val._method_append(pv.int(10), None)
+        assert ('index', 10) not in lst.children
+        assert st3['lst'].val.size == (11, 11)
+        assert lst.size == (10, 10)
+
+    def test_copying_mutable_values_does_not_copy_the_scope(self) -> None:
+        st = pt.Store()
+        st['a'] = pv.int(2)
+        st['lst'] = pv.list([pv.int(2)])
+
+        st2 = st.copy()
+        assert st2._global_scope.shares_vars_with(st._global_scope)
+        assert st2['lst'] is not st['lst']
+        assert st2['lst'] == st['lst']
+
+        st2['lst'].subs()[pv.int(0)] = pv.int(3)
+        st2['a'] = pv.int(5)
+        assert not st2._global_scope.shares_vars_with(st._global_scope)
+        assert st['lst'] == pv.list([pv.int(2)])
+        assert st2['lst'] == pv.list([pv.int(3)])
+        assert st['a'] == pv.int(2)
+
+        st3 = st2.copy()
+        st3['b'] = pv.int(1)
+        assert st3['lst'] is not st2['lst']
+        assert st3['lst'] == pv.list([pv.int(3)])
+
+    def test_items_does_not_copy_the_scope(self) -> None:
+        st = pt.Store()
+        st['a'] = pv.int(2)
+        st['lst'] = pv.list([pv.int(2)])
+        written = len(st._global_scope._written)
+
+        for _ in range(3):
+            assert dict(st.items()) == {'a': pv.int(2), 'lst': pv.list([pv.int(2)])}
+
+        assert len(st._global_scope._written) == written
+        assert not st._global_scope._shared
+
+        st2 = st.copy()
+        assert dict(st2.items())['lst'] is st2['lst'] is not st['lst']
+
+    def test_untouched_variables_are_shared_after_join(self) -> None:
+        st = pt.Store()
+        st['a'] = pv.int(2)
+        st['b'] = pv.int(3)
+        st['lst'] = pv.list([pv.int(2)])
+
+        st2 = st.copy()
+        st2['b'] = pv.int(5)
+
+        joined = st.join(st2)
+
+        assert joined['a'] is st['a']
+        assert joined['b'] == pv.int()
+        # no mutable value was modified in any store
+        assert joined['lst'] is st['lst']
+
+    def test_modified_mutable_values_are_joined(self) -> None:
+        st = pt.Store()
+        st['a'] = pv.int(2)
+        st['lst'] = pv.list([pv.int(2)])
+
+        st2 = st.copy()
+        st2['lst'].subs()[pv.int(0)] = pv.int(3)
+
+        st.join_destructive(st2)
+
+        assert st['a'] == pv.int(2)
+        assert st['lst'] == pv.list([pv.int()])
+
+    @given(st_any_pv, st_any_pv)
+    def test_join_destructive_is_the_same_as_join(
+            self,
+            i: PythonValue,
+            j: PythonValue
+    ) -> None:
+        st = pt.Store()
+        st['a'] = i
+        st['b'] = i
+        st['c'] = pv.list([i])
+
+        st2 = st.copy()
+        st2['b'] = j
+        st2['c'].subs()[pv.int(0)] = j
+        st2['d'] = j
+
+        joined = st.join(st2)
+        st.join_destructive(st2)
+
+        assert dict(st.items()) == dict(joined.items())
+        assert st['c'].val.children[('index', 0)] == i.join(j)
+
+    def test_narrowing_refines_top_and_unbounded_sizes(self) -> None:
+        st = pt.Store()
+        st['a'] = pv.int()
+        st['lst'] = pv.list([pv.int()])
+        lst = st['lst'].val
+        assert isinstance(lst, List)
+        lst.size = (0, float('inf'))
+
+        st2 = st.copy()
+        st2['a'] = pv.int(2)
+        st2['lst'] = pv.list([pv.int(5), pv.int(6)])
+
+        assert not st.narrow_op_destructive(st2)
+        assert st['a'] == pv.int(2)
+        assert st['lst'].val is lst
+        assert lst.size == (2, 2)
+        assert lst.children[('index', 0)] == pv.int(5)
+
+        # Narrowing again changes nothing
+        assert st.narrow_op_destructive(st.copy())
+
+    def test_widen_op_destructive_at_fix_point_changes_nothing(self) -> None:
+        st = pt.Store()
+        st['a'] = pv.int()
+        st['b'] = pv.float(2.0)
+
+        st2 = st.copy()
+        st2['a'] = pv.int(3)
+        a, b = st['a'], st['b']
+
+        assert st.widen_op_destructive(st2)
+        assert st['a'] is a
+        assert st['b'] is b
+
+    def test_widening_lists_jumps_to_size_thresholds(self) -> None:
+        st = pt.Store()
+        st['lst'] = pv.list([pv.int(1)])
+
+        st2 = st.copy()
+        st2['lst'] = pv.list([pv.int(1)] * 5)
+        assert not st.widen_op_destructive(st2)
+        lst = st['lst'].val
+        assert isinstance(lst, List)
+        assert lst.size == (1, 8)
+
+        st3 = st.copy()
+        st3['lst'] = pv.list([pv.int(1)] * 20)
+        assert not st.widen_op_destructive(st3)
+        lst = st['lst'].val
+        assert isinstance(lst, List)
+        assert lst.size == (1, float('inf'))
+
+    def test_deeply_nested_values_are_copied_and_joined(self) -> None:
+        depth = 5000  # deeper than the recursion limit
+
+        def nested_list(innermost: int) -> PythonValue:
+            val = pv.list([pv.int(innermost)])
+            for _ in range(depth):
+                val = pv.list([val])
+            return val
+
+        st = pt.Store()
+        st2 = st.copy()
+        st['a'] = nested_list(0)
+        st2['a'] = nested_list(1)
+
+        joined = st.join(st2)
+        copied = joined.copy()
+        assert copied['a'] is not joined['a']
+
+        val = copied['a']
+        for _ in range(depth):
+            val = val.subs()[pv.int(0)]
+        assert val.subs()[pv.int(0)] == pv.int()
+
+        copied['a'].convert_into_top(set())
+        assert copied['a'].val.is_top()
+        assert not joined['a'].val.is_top()
@@ -1,13 +1,22 @@
 import glob
+import json
 from pytest import raises
 import pytest
 from os import path
+import pstats
+import socket
+from concurrent.futures import ThreadPoolExecutor
+import threading
 from typing import Any, Tuple, Dict, Optional, List
 
-from pytropos import metadata
+from pytropos import metadata, server
 import pytropos.main as main
 from pytropos.internals.errors import TypeCheckLogger
+from pytropos.internals.context import AnalysisContext, AnalysisOptions, LoopSettings
+from pytropos.internals.control.profiling import StatementsProfiler
+import pytropos.internals.metrics as metrics
 from pytropos.internals.values.python_values import PythonValue
+from pytropos.internals.values.builtin_values import Int
 
 # The parametrize function is generated, so this doesn't work:
 #
@@ -85,10 +94,12 @@ class TestMain(object):
 
         return expected_output, expected_exitcode, expected_store
 
+    @parametrize('backend', main.backends)  # type: ignore
     @parametrize('filepath', inputs)  # type: ignore
     def test_fail_and_success_in_examples(
             self,
             filepath: str,
+            backend: str,
             capsys: Any
     ) -> None:
         # Cleaning type errors
@@ -101,7 +112,7 @@ class TestMain(object):
 
         # Executing Pytropos
         file = open(filepath)
-        exit_exitcode, exit_store = main.run_pytropos(file.read(), file.name)
+        exit_exitcode, exit_store = main.run_pytropos(file.read(), file.name, backend=backend)
         out, err = capsys.readouterr()
 
         # Checking validity of execution
@@ -123,3 +134,296 @@ class TestMain(object):
 
         # with capsys.disabled():
         #     ...
+
+    @parametrize('filepath', inputs[:10])  # type: ignore
+    def test_cached_results_are_the_same(self, filepath: str, tmpdir: Any, capsys: Any) -> None:
+        cache_dir = str(tmpdir.join('cache'))
+        source = open(filepath).read()
+
+        exitcode, store = main.run_pytropos(source, filepath, cache_dir=cache_dir)
+        out, err = capsys.readouterr()  # type: Tuple[str, str]
+
+        cached_exitcode, cached_store = main.run_pytropos(source, filepath, cache_dir=cache_dir)
+        cached_out, cached_err = capsys.readouterr()  # type: Tuple[str, str]
+
+        assert cached_exitcode == exitcode
+        assert cached_out == out
+        if exitcode != 2:
+            assert store is not None
+            # the store is not computed if the result is taken from the cache
+            assert cached_store is None
+
+        # changing the file invalidates the cache
+        _, store = main.run_pytropos(source + '\n', filepath, cache_dir=cache_dir)
+        capsys.readouterr()
+        assert (store is None) == (exitcode == 2)
+
+    def test_cached_code_is_reused(self, tmpdir: Any, capsys: Any, monkeypatch: Any) -> None:
+        cache_dir = str(tmpdir.join('cache'))
+        source = 'a = 2\nb = a / 0\n'
+
+        exitcode, store = main.run_pytropos(source, 'code.py', cursorline=2,
+                                            cache_dir=cache_dir)
+        out = capsys.readouterr()[0]
+
+        # The code should be loaded from the cache, no need to compile it again
+        def compile_pytropos(*args: Any, **kwargs: Any) -> None:
+            raise AssertionError("The code should have been taken from the cache")
+        monkeypatch.setattr(main, 'compile_pytropos', compile_pytropos)
+
+        cached_exitcode, cached_store = main.run_pytropos(source, 'code.py', cursorline=2,
+                                                          cache_dir=cache_dir)
+        assert cached_exitcode == exitcode
+        assert capsys.readouterr()[0] == out
+        assert store is not None and cached_store is not None
+        assert cached_store['b'] == store['b']
+
+    def test_positions_are_constants_in_the_generated_code(self) -> None:
+        code = main.compile_pytropos('a = 2\nb = a + 3\n', 'code.py')
+        assert code is not None and not callable(code)
+        assert ('a', ((2, 4), 'code.py')) in code.co_consts
+        assert ((2, 4), 'code.py') in code.co_consts
+        assert 'fn' not in code.co_names
+
+    @parametrize('cursorline', [2, 4, 7])  # type: ignore
+    def test_backends_print_the_same_store_at_the_cursor(self, cursorline: int,
+                                                         capsys: Any) -> None:
+        source = 'import numpy\n' \
+                 'a = 0\n' \
+                 'while a < 5:\n' \
+                 '    a += 1\n' \
+                 'if a > 2:\n' \
+                 '    b = [a, 2.0]\n' \
+                 'b[0] = None\n'
+
+        outputs = []
+        for backend in main.backends:
+            exitcode, store = main.run_pytropos(source, 'code.py', cursorline=cursorline,
+                                                backend=backend)
+            assert exitcode == 0 and store is not None
+            assert 'numpy' in store
+            outputs.append((capsys.readouterr()[0], store._global_scope))
+
+        assert outputs[0][0] != ''
+        assert outputs[0] == outputs[1]
+
+    @parametrize('backend', main.backends)  # type: ignore
+    def test_profile_counts_the_runs_of_each_statement(self, backend: str, tmpdir: Any,
+                                                       capsys: Any) -> None:
+        source = 'a = 0\n' \
+                 'while a < 5:\n' \
+                 '    a += 1\n' \
+                 '    if a > 2:\n' \
+                 '        b = a\n'
+
+        exitcode, store = main.run_pytropos(source, 'code.py', backend=backend, profile=True)
+        assert exitcode == 0
+
+        stmts = StatementsProfiler().stmts
+        runs = {pos[0]: stats[0] for pos, stats in stmts.items()}
+        assert runs == {(1, 0): 1, (2, 0): 1, (3, 4): 5, (4, 4): 5, (5, 8): 3}
+        # the time spent in a loop includes the time spent in its body
+        loop, body = stmts[((2, 0), 'code.py')], stmts[((3, 4), 'code.py')]
+        assert loop[1] >= body[1] and loop[2] <= loop[1]
+
+        report = StatementsProfiler().report(source)
+        assert 'while a < 5:' in report
+
+        stats_file = str(tmpdir.join('profile.pstats'))
+        StatementsProfiler().dump_stats(stats_file, source)
+        stats = pstats.Stats(stats_file).stats  # type: ignore
+        assert stats[('code.py', 3, 'a += 1')][:2] == (5, 5)
+        assert ('code.py', 2, 'while a < 5:') in stats[('code.py', 3, 'a += 1')][4]
+
+    def test_metrics_are_saved_as_json(self, tmpdir: Any, capsys: Any) -> None:
+        source = 'a = [1]\n' \
+                 'b = 0\n' \
+                 'while b < 200:\n' \
+                 '    b += 1\n' \
+                 '    a = [a, b]\n'
+        metrics_file = str(tmpdir.join('metrics.json'))
+
+        exitcode, store = main.run_pytropos(source, 'code.py', metrics_file=metrics_file)
+        assert exitcode == 0
+        assert not metrics.enabled()
+
+        with open(metrics_file) as f:
+            data = json.load(f)
+        assert data['exitcode'] == 0 and data['warnings'] == 0
+        assert data['store_copies'] > 0 and data['store_widenings'] > 0
+        assert data['mut_values_copied'] > 0
+        assert data['mut_values_created'] >= data['peak_live_mut_values'] > 0
+        assert data['loops'] == [{
+            'file': 'code.py', 'line': 3, 'col': 0, 'runs': 1, 'unrolled': 100,
+            'iterations': 2, 'narrowed': 1, 'budget_exhausted': 0
+        }]
+
+    @parametrize('jobs', [1, 2])  # type: ignore
+    def test_batch_mode_merges_reports_in_order(self, jobs: int, tmpdir: Any) -> None:
+        tmpdir.join('b.py').write('a = 2 / 0\n')
+        tmpdir.mkdir('sub').join('a.py').write('a = 2\n')
+        tmpdir.mkdir('.hidden').join('c.py').write('a = b\n')
+        tmpdir.join('notes.txt').write('not python')
+
+        exitcode, reports = main.run_pytropos_many([str(tmpdir)], jobs=jobs)
+
+        assert [path.relpath(r[0], str(tmpdir)) for r in reports] == ['b.py', 'sub/a.py']
+        assert [r[1] for r in reports] == [1, 0]
+        assert 'E001 ZeroDivisionError' in reports[0][2]
+        assert reports[1][2] == ''
+        assert exitcode == 1
+
+    def test_batch_mode_exitcode_is_the_worst(self, tmpdir: Any, capsys: Any) -> None:
+        tmpdir.join('a.py').write('a = 2\n')
+        tmpdir.join('b.py').write('a = \n')
+
+        exitcode = main.main(['progname', 'check', '-j', '2', str(tmpdir)])
+        out, err = capsys.readouterr()  # type: Tuple[str, str]
+
+        assert exitcode == 2
+        assert 'b.py:1:4: SyntaxError' in out
+
+    def test_analyses_can_run_in_threads(self, capsys: Any) -> None:
+        files = inputs[:20]
+        expected = [self._find_output_file_and_store(f)[1:] for f in files]
+
+        def analyse(filepath: str) -> Tuple[int, Any]:
+            exitcode, store = main.run_pytropos(open(filepath).read(), filepath)
+            return exitcode, None if store is None else store._global_scope
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(analyse, files * 3))
+
+        for (exitcode, store), (expected_exitcode, expected_store) \
+                in zip(results, expected * 3):
+            assert exitcode == expected_exitcode
+            assert store == expected_store
+        assert len(TypeCheckLogger().warnings) == 0
+
+    def test_threads_can_analyse_with_different_options(self) -> None:
+        code = "i = 0\nwhile i < 10:\n    i += 1\n"
+        no_loops = AnalysisOptions(loops=LoopSettings(max_unrolled=0, max_iterations=1,
+                                                      narrowing_steps=0))
+
+        def analyse(options: AnalysisOptions) -> PythonValue:
+            store = main.run_pytropos(code, 'loop.py', options=options)[1]
+            assert store is not None
+            return store['i']
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(analyse, [AnalysisOptions(), no_loops] * 10))
+
+        assert results == [PythonValue(Int(10)), PythonValue.top()] * 10
+
+    def test_analysis_context_isolates_warnings(self) -> None:
+        ctx = AnalysisContext()
+        ctx.run(lambda: TypeCheckLogger().new_warning('E001', 'ZeroDivisionError', None))
+
+        assert len(TypeCheckLogger().warnings) == 0
+        assert ctx.run(lambda: len(TypeCheckLogger().warnings)) == 1
+
+
+class TestServer(object):
+    def test_files_are_only_analysed_again_if_they_change(self, tmpdir: Any) -> None:
+        sock_path = str(tmpdir.join('pt.sock'))
+        analysis_server = server.AnalysisServer(sock_path)
+        thread = threading.Thread(target=analysis_server.serve_until_shutdown)
+        thread.start()
+        try:
+            source = 'a = 2 / 0\n'
+            result = server.call(sock_path, 'analyse', filename='a.py', source=source)
+            assert result['exitcode'] == 1
+            assert not result['cached']
+            assert result['warnings'] == [{
+                'code': 'E001', 'message': 'ZeroDivisionError: division by zero',
+                'line': 1, 'col': 4, 'file': 'a.py'
+            }]
+            assert 'a.py:1:4: E001' in result['output']
+
+            again = server.call(sock_path, 'analyse', filename='a.py', source=source)
+            assert again == dict(result, cached=True)
+
+            changed = server.call(sock_path, 'analyse', filename='a.py', source='a = 2\n')
+            assert (changed['exitcode'], changed['cached']) == (0, False)
+
+            with raises(server.RPCError) as exc_info:
+                server.call(sock_path, 'analyse')
+            assert exc_info.value.code == server.INVALID_PARAMS
+        finally:
+            server.call(sock_path, 'shutdown')
+            thread.join()
+
+        assert not path.exists(sock_path)
+
+    @pytest.fixture  # type: ignore
+    def sock_path(self, tmpdir: Any) -> Any:
+        sock_path = str(tmpdir.join('pt.sock'))
+        analysis_server = server.AnalysisServer(sock_path)
+        thread = threading.Thread(target=analysis_server.serve_until_shutdown)
+        thread.start()
+        yield sock_path
+        server.call(sock_path, 'shutdown')
+        thread.join()
+
+    def test_internal_errors_are_answered(self, sock_path: str, monkeypatch: Any) -> None:
+        def fail(*args: Any, **kwargs: Any) -> None:
+            raise RuntimeError('failing on purpose')
+
+        # An error in the analysis is reported in the output (printed in stderr)
+        with monkeypatch.context() as m:
+            m.setattr(PythonValue, 'add', fail)
+            result = server.call(sock_path, 'analyse', filename='a.py', source='a = 2 + 3\n')
+        assert result['exitcode'] == 2
+        assert 'RuntimeError: failing on purpose' in result['output']
+
+        # Any other error is answered as an internal error
+        with monkeypatch.context() as m:
+            m.setattr(server.cache, 'result_key', fail)
+            with raises(server.RPCError) as exc_info:
+                server.call(sock_path, 'analyse', filename='a.py', source='a = 2\n')
+        assert exc_info.value.code == server.INTERNAL_ERROR
+        assert 'failing on purpose' in exc_info.value.message
+
+        assert server.call(sock_path, 'analyse', filename='a.py', source='a = 2\n')['exitcode'] == 0
+
+    def test_idle_connections_are_closed(self, sock_path: str, monkeypatch: Any) -> None:
+        monkeypatch.setattr(server, 'idle_timeout', 0.1)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as idle:
+            idle.connect(sock_path)
+            # The server doesn't wait forever for a request from the idle connection
+            result = server.call(sock_path, 'analyse', filename='a.py', source='a = 2\n')
+            assert result['exitcode'] == 0
+            assert idle.recv(1) == b''
+
+
+class TestConsole(object):
+    def test_each_input_shows_only_its_warnings(self, capsys: Any) -> None:
+        console = main.PytroposConsole()
+        for line in ['a = 2 / 0', 'b = [1]', 'b[3]', 'a']:
+            console.push(line)
+        out = capsys.readouterr()[0]  # type: str
+
+        assert out.count('E001 ZeroDivisionError') == 1
+        assert out.count('E017') == 1
+        assert [w[0] for w in console.warnings] == ['E001', 'E017']
+
+        console.push(':warnings')
+        assert capsys.readouterr()[0] == main.format_warnings(console.warnings) + '\n'
+
+    def test_each_input_is_parsed_once(self, capsys: Any, monkeypatch: Any) -> None:
+        parse = main.ast3.parse
+        parsed = []  # type: List[str]
+
+        def counting_parse(source: str, *args: Any, **kwargs: Any) -> Any:
+            parsed.append(source)
+            return parse(source, *args, **kwargs)
+        monkeypatch.setattr(main.ast3, 'parse', counting_parse)
+
+        console = main.PytroposConsole()
+        lines = ['a = 0', 'if a < 1:', '    a = 2', '', 'b = (1,', '2)', 'c = \\', '3', 'a b']
+        more = [console.push(line) for line in lines]
+
+        assert more == [False, True, True, False, True, False, True, False, False]
+        assert len(parsed) == len(lines)
+        assert console.locals['st']['a'] == PythonValue(Int(2))
+        assert 'SyntaxError' in capsys.readouterr()[1]
@@ -11,15 +11,22 @@ import operator as ops
 import math
 from typing import Optional, Union  # noqa: F401
 
+from typing import Any, Dict  # noqa: F401
+
+import pytest
 from pytest import raises
 from hypothesis import given
 import hypothesis.strategies as st
 
 import pytropos.internals.values as pv
 from pytropos.internals.values.python_values import PythonValue
-from pytropos.internals.values.abstract_value import AbstractValue
+from pytropos.internals.values.python_values.builtin_mutvalues import List
+from pytropos.libs_checking.numpy import getshape_list
+from pytropos.internals.values.abstract_value import AbstractValue, clear_ops_cache
+import pytropos.internals.values.builtin_values as builtin_values
 from pytropos.internals.values.builtin_values import Int, Float, Bool, ops_symbols
 from pytropos.internals.errors import TypeCheckLogger
+from pytropos.internals.context import analysis_context
 from pytropos.internals.miscelaneous import Pos  # noqa: F401
 
 from .common_strategies import st_ints, st_floats, st_pv_bools_ints, st_any_pv
@@ -28,6 +35,12 @@ zeroDivisionError = re.compile('ZeroDivisionError')
 valueError = re.compile('ValueError')
 
 
+def set_options(monkeypatch: 'Any', **options: 'Any') -> None:
+    """The values created in the test use the AnalysisOptions given"""
+    ctx = analysis_context()
+    monkeypatch.setattr(ctx, 'options', ctx.options._replace(**options))
+
+
 def check_float_equality(f1: float, f2: float) -> bool:
     if not isinstance(f1, float) or not isinstance(f2, float):
         return False
@@ -159,6 +172,87 @@ class TestBools:
             assert new_val.val is b
 
 
+class TestIntervals:
+    """Testing the interval domain of Ints and Floats (see `AnalysisOptions.intervals`)"""
+
+    @pytest.fixture(autouse=True)  # type: ignore
+    def intervals(self, monkeypatch: 'Any') -> None:
+        set_options(monkeypatch, intervals=True)
+
+    @given(st.integers(), st.integers(), st.integers())
+    def test_ops_contain_results_of_all_values_joined(self, i: int, j: int, k: int) -> None:
+        joined = pv.int(i).join(pv.int(j))
+        for op in ['add', 'sub', 'mul']:
+            # Both, the operation and its reverse (eg, op_add and op_radd)
+            for pt_val, py_op in [(getattr(joined, op)(pv.int(k)), getattr(ops, op)),
+                                  (getattr(pv.int(k), op)(joined),
+                                   lambda n, k, op=op: getattr(ops, op)(k, n))]:
+                assert isinstance(pt_val.val, Int)
+                lower, upper = builtin_values._get_bounds(pt_val.val)
+                for n in [i, j]:
+                    assert lower <= py_op(n, k) <= upper
+
+        for op in ['lt', 'le', 'gt', 'ge']:
+            pt_val = getattr(joined, op)(pv.int(k))
+            assert isinstance(pt_val.val, Bool)
+            if not pt_val.val.is_top():
+                for n in [i, j]:
+                    assert pt_val.val.val is getattr(ops, op)(n, k)
+
+    def test_conditions_are_decided_with_intervals(self) -> None:
+        i = pv.int(3).join(pv.int(5))
+        assert i.val == Int(None, (3, 5))
+        assert i.val.abstract_repr == 'int[3, 5]'
+        assert i.lt(pv.int(6)) == pv.bool(True)
+        assert i.gt(pv.int(6)) == pv.bool(False)
+        assert i.lt(pv.int(4)).val.is_top()
+        assert i.bool() == pv.bool(True)
+
+        f = pv.float(0.5).join(pv.float(1.5))
+        assert f.add(pv.int(1)).val == Float(None, (1.5, 2.5))
+        assert f.ge(pv.float(0.5)) == pv.bool(True)
+
+    def test_infinite_floats_times_zero_are_top(self) -> None:
+        # A float may be inf and inf*0.0 is nan, so nothing is known of the product
+        f = pv.float(8.0).join(pv.float(math.inf))
+        assert f.val == Float(None, (8.0, math.inf))
+        assert f.mul(pv.float(0.0)).val.is_top()
+        assert pv.float(0.0).mul(f).val.is_top()
+        assert f.mul(pv.int(0)).val.is_top()
+        assert f.mul(pv.float(0.0)).lt(pv.float(1.0)).val.is_top()
+
+        # An int is never inf, so an unbounded int times 0 is 0
+        i = pv.int(0).join(pv.int(1)).widen_op(pv.int(0).join(pv.int(2)))[0]
+        assert i.mul(pv.int(0)) == pv.int(0)
+
+    def test_ints_too_large_for_a_float(self) -> None:
+        big = 10**400
+        i = pv.int(big).join(pv.int(3))
+        assert i.val == Int(None, (3, big))
+        assert i.add(pv.int(1)).val == Int(None, (4, big+1))
+        assert i.gt(pv.int(2)) == pv.bool(True)
+        # Operating the bound with inf (or converting it into a float) would fail
+        assert i.add(pv.int()).val.is_top()
+        assert i.mul(pv.int()).val.is_top()
+        assert pv.float(1.0).join(pv.float(2.0)).add(i).val.is_top()
+
+    def test_widening_moves_growing_bounds_to_infinity(self) -> None:
+        i = pv.int(0).join(pv.int(1))
+        widened, fix = i.widen_op(pv.int(0).join(pv.int(2)))
+        assert not fix
+        assert widened.val == Int(None, (0, math.inf))
+        assert widened.widen_op(pv.int(5)) == (widened, True)
+
+        narrowed, fix = widened.narrow_op(i)
+        assert not fix
+        assert narrowed == i
+
+    def test_intervals_are_not_created_by_default(self, monkeypatch: 'Any') -> None:
+        set_options(monkeypatch, intervals=False)
+        assert pv.int(3).join(pv.int(5)) == pv.int()
+        assert pv.float(3.0).join(pv.float(5.0)) == pv.float()
+
+
 class TestNone:
     """Testing bools only"""
 
@@ -169,6 +263,51 @@ class TestNone:
         assert none.val.is_top()  # type: ignore
 
 
+class TestLists:
+    """Testing lists and tuples"""
+
+    def test_deleting_shifts_elements_in_any_order(self) -> None:
+        children = {('index', i): pv.int(i) for i in reversed(range(4))}
+        lst = List(children=children)
+        lst.size = (4, 4)
+
+        del PythonValue(lst).subs()[pv.int(1)]
+
+        assert lst.size == (3, 3)
+        assert lst.sorted_indices() == [(0, pv.int(0)), (1, pv.int(2)), (2, pv.int(3))]
+
+    def test_joined_lists_keep_their_elements_in_order(self) -> None:
+        lst1 = pv.list([pv.int(i) for i in range(5)])
+        lst2 = pv.list([pv.int(i) for i in range(7)])
+        mut_heap = {}  # type: Dict[Any, Any]
+
+        joined = lst1.join_mut(lst2, mut_heap).val
+
+        assert [k[1] for k in joined.children] == list(range(7))
+        assert joined.size == (5, 7)
+
+    def test_large_lists_are_summarised(self, monkeypatch: 'Any') -> None:
+        set_options(monkeypatch, summary_threshold=3, intervals=True)
+
+        lst = pv.list([pv.int(i) for i in range(5)])
+        assert lst.val.size == (5, 5)
+        assert lst.subs()[pv.int(4)] == pv.int(0).join(pv.int(4))
+        assert getshape_list(lst.val) == pv.tuple(pv.int(5)).val
+
+        lst.val._method_append(pv.int(10), None)
+        assert lst.val.size == (6, 6)
+        assert lst.subs()[pv.int(0)] == pv.int(0).join(pv.int(10))
+
+        small = pv.list([pv.int(i) for i in range(3)])
+        assert small.val.summary is None
+        joined = small.join_mut(lst, {})  # type: ignore
+        assert joined.val.size == (3, 6)
+        assert joined.val.summary == pv.int(0).join(pv.int(10))
+
+        mixed = pv.list([pv.int(1)]*4 + [pv.float(2.0)])
+        assert mixed.val.summary is None
+
+
 class TestPythonValue:
     """Testing Top operations"""
 
@@ -336,3 +475,54 @@ class TestPythonValue:
             assert joined2.is_top() != isinstance(val1.val, type(val2.val))
 
         assert joined1 == joined2
+
+    def test_operations_are_found_again_after_clearing_the_cache(self) -> None:
+        class Unit(AbstractValue):
+            def join(self, other: 'Unit') -> 'Unit':
+                return self
+
+            def is_top(self) -> bool:
+                return False
+
+            @classmethod
+            def top(cls) -> 'Unit':
+                return cls()
+
+            type_name = 'Unit'
+            abstract_repr = 'Unit'
+
+            def __eq__(self, other: object) -> bool:
+                return isinstance(other, Unit)
+
+        TypeCheckLogger.clean_sing()
+        unit = PythonValue(Unit())
+        assert unit.add(pv.int(2)).is_top()
+        assert len(TypeCheckLogger().warnings) == 1
+
+        # Defining the operation after it has been resolved once
+        Unit.op_add_Int = lambda self, other, pos: Int(1)  # type: ignore
+        Unit.op_radd_Int = lambda self, other, pos: Int(2)  # type: ignore
+        clear_ops_cache()
+
+        TypeCheckLogger.clean_sing()
+        assert unit.add(pv.int(2)) == pv.int(1)
+        assert pv.int(2).add(unit) == pv.int(2)
+        assert len(TypeCheckLogger().warnings) == 0
+
+    def test_common_values_have_no_dict(self) -> None:
+        # __slots__ must be defined on every class in the hierarchy
+        for val in [pv.int(2), pv.float(2.0), pv.bool(True), pv.none(), pv.int()]:
+            assert not hasattr(val, '__dict__')
+            assert not hasattr(val.val, '__dict__')
+
+    def test_constants_are_shared(self) -> None:
+        assert pv.int(300) is pv.int(300)
+        assert pv.int() is pv.int()
+        assert pv.bool(True) is pv.bool(True)
+        assert pv.float(2.5) is pv.float(2.5)
+
+        # equal but different values
+        assert pv.float(2).val.val is not pv.float(2.0).val.val
+        assert math.copysign(1, pv.float(0.0).val.val) == 1
+        assert math.copysign(1, pv.float(-0.0).val.val) == -1
+        assert math.isnan(pv.float(math.nan).val.val)